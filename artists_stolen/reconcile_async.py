@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo asíncrono de la reconciliación de artistas con Wikidata
+
+En lugar de procesar el CSV fila a fila:
+  * hasta MAX_IN_FLIGHT búsquedas de artistas a la vez (wbsearchentities en hilos,
+    todas detrás del mismo limitador de peticiones de EntityCache)
+  * las entidades candidatas de todos los artistas en curso se piden juntas,
+    50 IDs por wbgetentities (EntityBatcher)
+  * cada resultado se añade en cuanto está listo a un diario JSON Lines
+        <salida>.journal.jsonl
+    que sustituye al CSV temporal: si el proceso se interrumpe, la siguiente
+    ejecución continúa con los artistas que faltan
+
+El resultado final tiene las mismas filas, en el mismo orden y con las mismas
+columnas que el modo secuencial.
+
+Uso (desde reconcile_wikidata_artists*.py):
+    python reconcile_wikidata_artists.py artists_for_openrefine.csv --async
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from wikidata_entities import EntityBatcher
+
+MAX_IN_FLIGHT = 8       # búsquedas de artistas a la vez
+
+
+def journal_path(output_file):
+    """Diario de resultados junto al CSV de salida"""
+    return os.path.splitext(output_file)[0] + '.journal.jsonl'
+
+
+def load_journal(path):
+    """{(fila, artista): resultado} de una ejecución anterior interrumpida"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue            # última línea a medio escribir
+            done[(entry['row'], entry['artist_name'])] = entry['result']
+    return done
+
+
+def to_json(value):
+    """Escalares de numpy/pandas (p. ej. works_count) a tipos de Python"""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+async def reconcile_rows_async(reconciler, rows, search_args, journal_file, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Reconcilia `rows` [(índice, fila), ...] de forma concurrente
+
+    Args:
+        reconciler (WikidataReconciler): reconciliador (find_candidates / choose_candidate)
+        rows (list): Filas del CSV con artist_name
+        search_args (callable): fila -> argumentos de reconciler.find_candidates
+        journal_file (str): Diario JSON Lines de resultados
+        max_in_flight (int): Búsquedas de artistas a la vez
+
+    Returns:
+        list: Resultados en el orden de `rows`
+    """
+    done = load_journal(journal_file)
+    keys = [(int(idx), row.get('artist_name', '')) for idx, row in rows]
+    todo = [(key, row) for key, (idx, row) in zip(keys, rows) if key not in done]
+    if len(todo) < len(rows):
+        print(f"♻️  Reanudando: {len(rows) - len(todo)} artistas ya en {journal_file}")
+
+    batcher = EntityBatcher(reconciler.entities)
+    slots = asyncio.Semaphore(max_in_flight)
+    finished = len(rows) - len(todo)
+
+    async def reconcile_one(key, row, journal):
+        nonlocal finished
+        async with slots:
+            candidates = await asyncio.to_thread(reconciler.find_candidates, *search_args(row))
+        # fuera del semáforo, para que los IDs de muchos artistas llenen cada lote
+        await batcher.prefetch([candidate.get("id") for candidate in candidates])
+        result = await asyncio.to_thread(reconciler.choose_candidate, key[1], candidates)
+
+        # Agregar información adicional del CSV original
+        result['works_count'] = row.get('works_count', 1)
+        done[key] = result
+        journal.write(json.dumps({'row': key[0], 'artist_name': key[1], 'result': result},
+                                 ensure_ascii=False, default=to_json) + '\n')
+        journal.flush()
+        finished += 1
+        print(f"  [{finished}/{len(rows)}] {key[1]} → {result['wikidata_id'] or '❌'}")
+
+    with open(journal_file, 'a', encoding='utf-8') as journal:
+        await asyncio.gather(*(reconcile_one(key, row, journal) for key, row in todo))
+
+    return [done[key] for key in keys]
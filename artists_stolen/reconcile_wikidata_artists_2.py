@@ -6,18 +6,29 @@ Alternativa al servicio de reconciliación de OpenRefine
 
 Uso:
     python reconcile_wikidata.py artists_for_openrefine.csv
+    python reconcile_wikidata.py artists_for_openrefine.csv --async   # concurrente, reanudable
 
 Autor: Claude
 Fecha: 2026-01-09
 """
 
+import asyncio
+import os
+import sys
 import pandas as pd
 import requests
-import time
 import json
 from urllib.parse import quote
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from wikidata_entities import EntityCache
+from reconcile_async import reconcile_rows_async, journal_path
+
+# Artistas por bloque: se buscan todos, luego se descargan juntas las entidades
+# candidatas (lotes de 50 por wbgetentities) y se guarda el progreso
+BLOCK_SIZE = 20
+
 class WikidataReconciler:
     """Clase para reconciliar artistas con Wikidata"""
     
@@ -27,6 +38,8 @@ class WikidataReconciler:
         self.session.headers.update({
             'User-Agent': 'ArtistReconciliation/1.0 (Ukrainian Heritage Project)'
         })
+        # Caché persistente de búsquedas y entidades (processed_data/wikidata_entities.sqlite)
+        self.entities = EntityCache(session=self.session)
     
     def search_entity(self, artist_name, limit=5):
         """
@@ -39,21 +52,8 @@ class WikidataReconciler:
         Returns:
             list: Lista de candidatos encontrados
         """
-        params = {
-            "action": "wbsearchentities",
-            "format": "json",
-            "language": "en",
-            "type": "item",
-            "limit": limit,
-            "search": artist_name
-        }
-        
         try:
-            response = self.session.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            return data.get("search", [])
+            return self.entities.search(artist_name, limit=limit)
             
         except requests.exceptions.RequestException as e:
             print(f"  ⚠️  Error en petición: {e}")
@@ -64,7 +64,8 @@ class WikidataReconciler:
     
     def get_entity_data(self, entity_id):
         """
-        Obtiene datos detallados de una entidad
+        Obtiene datos detallados de una entidad (de la caché si ya se descargó
+        con prefetch_entities)
         
         Args:
             entity_id (str): ID de Wikidata (ej: Q123456)
@@ -72,26 +73,17 @@ class WikidataReconciler:
         Returns:
             dict: Datos de la entidad
         """
-        params = {
-            "action": "wbgetentities",
-            "format": "json",
-            "ids": entity_id,
-            "props": "claims|labels|descriptions",
-            "languages": "en"
-        }
-        
-        try:
-            response = self.session.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if "entities" in data and entity_id in data["entities"]:
-                return data["entities"][entity_id]
-                
-        except Exception as e:
-            print(f"  ⚠️  Error obteniendo datos de {entity_id}: {e}")
+        return self.entities.get_entities([entity_id]).get(entity_id)
+    
+    def prefetch_entities(self, entity_ids):
+        """
+        Descarga de una vez las entidades que aún no están en caché,
+        50 IDs por petición wbgetentities
         
-        return None
+        Args:
+            entity_ids (list): IDs de Wikidata (se ignoran duplicados)
+        """
+        self.entities.get_entities(entity_ids)
     
     def extract_claim_value(self, claims, property_id):
         """
@@ -174,6 +166,23 @@ class WikidataReconciler:
         Returns:
             dict: Información del artista reconciliado
         """
+        candidates = self.find_candidates(artist_name, verified_name, cyrillic)
+        self.prefetch_entities([candidate.get("id") for candidate in candidates])
+        return self.choose_candidate(artist_name, candidates)
+    
+    def find_candidates(self, artist_name, verified_name=None, cyrillic=None):
+        """
+        Busca los candidatos de un artista con todas las variantes del nombre
+        (sin descargar sus entidades)
+        
+        Args:
+            artist_name (str): Nombre del artista
+            verified_name (str): Nombre verificado/corregido
+            cyrillic (str): Nombre en cirílico
+        
+        Returns:
+            list: Candidatos de wbsearchentities, sin duplicados
+        """
         print(f"  🔍 Buscando: {artist_name}")
         
         # Buscar candidatos con todas las variantes disponibles
@@ -205,8 +214,21 @@ class WikidataReconciler:
                 seen_ids.add(entity_id)
                 unique_candidates.append(candidate)
         
-        candidates = unique_candidates
+        return unique_candidates
+    
+    def choose_candidate(self, artist_name, candidates):
+        """
+        Elige el mejor candidato: el primer pintor o, si no hay ninguno, el
+        primer resultado (las entidades deben estar ya en caché, ver
+        prefetch_entities, para no hacer una petición por candidato)
         
+        Args:
+            artist_name (str): Nombre del artista
+            candidates (list): Candidatos de find_candidates
+        
+        Returns:
+            dict: Información del artista reconciliado
+        """
         if not candidates:
             print(f"  ❌ Sin resultados")
             return {
@@ -300,13 +322,16 @@ class WikidataReconciler:
         return result
 
 
-def reconcile_csv(input_file, output_file='data_stolen/artists_stolen/corrected_artists_reconciled.csv'):
+def reconcile_csv(input_file, output_file='data_stolen/artists_stolen/corrected_artists_reconciled.csv',
+                  use_async=False):
     """
     Reconcilia artistas desde un CSV
     
     Args:
         input_file (str): Ruta al CSV de entrada
         output_file (str): Ruta al CSV de salida
+        use_async (bool): Búsquedas concurrentes con diario reanudable
+            (ver reconcile_async.py) en lugar de bloques secuenciales
     """
     import os
     
@@ -341,38 +366,57 @@ def reconcile_csv(input_file, output_file='data_stolen/artists_stolen/corrected_
     results = []
     start_time = datetime.now()
     
-    for idx, row in df.iterrows():
-        artist_name = row.get('artist_name', '')
-        verified_name = row.get('verified_name', '')
-        cyrillic = row.get('cyrillic', '')
-        
-        if pd.isna(artist_name) or artist_name == '':
-            continue
-        
-        print(f"\n[{idx+1}/{len(df)}]", end=" ")
-        
-        # Reconciliar con todas las variantes
-        result = reconciler.reconcile_artist(artist_name, verified_name, cyrillic)
-        
-        # Agregar información adicional del CSV original
-        result['works_count'] = row.get('works_count', 1)
-        
-        results.append(result)
-        
-        # Pausa para no saturar la API
-        time.sleep(0.5)
-        
-        # Guardar progreso cada 20 artistas
-        if (idx + 1) % 20 == 0:
+    rows = [(idx, row) for idx, row in df.iterrows()
+            if pd.notna(row.get('artist_name', '')) and row.get('artist_name', '') != '']
+    
+    if use_async:
+        # Búsquedas concurrentes; cada resultado va al diario en cuanto está listo
+        journal_file = journal_path(output_file)
+        results = asyncio.run(reconcile_rows_async(
+            reconciler, rows, lambda row: (row.get('artist_name', ''), row.get('verified_name', ''), row.get('cyrillic', '')), journal_file))
+    else:
+        # Por bloques: buscar todos los artistas, descargar juntas las entidades
+        # candidatas (lotes de 50) y elegir sin más peticiones
+        for block_start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[block_start:block_start + BLOCK_SIZE]
+            
+            block_candidates = []
+            for idx, row in block:
+                artist_name = row.get('artist_name', '')
+                verified_name = row.get('verified_name', '')
+                cyrillic = row.get('cyrillic', '')
+                print(f"\n[{idx+1}/{len(df)}]", end=" ")
+                block_candidates.append(reconciler.find_candidates(artist_name, verified_name, cyrillic))
+            
+            entity_ids = [c.get("id") for candidates in block_candidates for c in candidates]
+            print(f"\n  📦 Entidades candidatas del bloque: {len(set(entity_ids))}")
+            reconciler.prefetch_entities(entity_ids)
+            
+            for (idx, row), candidates in zip(block, block_candidates):
+                artist_name = row.get('artist_name', '')
+                print(f"\n[{idx+1}/{len(df)}] {artist_name}")
+                
+                # Reconciliar con todas las variantes
+                result = reconciler.choose_candidate(artist_name, candidates)
+                
+                # Agregar información adicional del CSV original
+                result['works_count'] = row.get('works_count', 1)
+                
+                results.append(result)
+            
+            # Guardar progreso después de cada bloque
             temp_df = pd.DataFrame(results)
             # Guardar archivo temporal en el directorio actual
             temp_filename = 'temp_reconciliation_progress.csv'
             temp_df.to_csv(temp_filename, index=False)
-            print(f"\n  💾 Progreso guardado: {idx+1}/{len(df)} artistas")
+            print(f"\n  💾 Progreso guardado: {len(results)}/{len(rows)} artistas "
+                  f"({reconciler.entities.requests} peticiones a la API)")
     
     # Guardar resultados finales
     results_df = pd.DataFrame(results)
     results_df.to_csv(output_file, index=False)
+    if use_async:
+        os.remove(journal_file)
     
     # Estadísticas
     end_time = datetime.now()
@@ -391,6 +435,7 @@ def reconcile_csv(input_file, output_file='data_stolen/artists_stolen/corrected_
     print(f"🎨 Confirmados como pintores: {painters} ({painters/total*100:.1f}%)")
     print(f"⭐ Alta confianza (score ≥90): {high_confidence} ({high_confidence/total*100:.1f}%)")
     print(f"⏱️  Tiempo total: {duration/60:.1f} minutos")
+    print(f"🌐 Peticiones a la API: {reconciler.entities.requests}")
     print(f"\n📁 Archivo guardado: {output_file}")
     
     # Mostrar algunos ejemplos
@@ -433,9 +478,11 @@ def reconcile_csv(input_file, output_file='data_stolen/artists_stolen/corrected_
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    
+    if args:
+        input_file = args[0]
     else:
         input_file = "data_stolen/artists_stolen/name_corrections_applied (2).csv"
     
-    reconcile_csv(input_file)
\ No newline at end of file
+    reconcile_csv(input_file, use_async='--async' in sys.argv)
\ No newline at end of file
@@ -16,6 +16,11 @@ Tasks:
 import pandas as pd
 import numpy as np
 import re
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from keyword_rules import RuleSet
 
 # ============================================================================
 # HISTORICAL PERIODS
@@ -182,59 +187,52 @@ def translate_russian_measurements(size_str):
     return text
 
 
+# Common materials
+MATERIAL_KEYWORDS = [
+    'clay', 'iron', 'bronze', 'silver', 'gold', 'copper', 'brass',
+    'stone', 'limestone', 'sandstone', 'marble', 'granite',
+    'bone', 'wood', 'leather', 'fabric', 'glass', 'paste',
+    'carnelian', 'amber', 'lignite', 'agate', 'chalcedony',
+    'gypsum', 'kashin', 'faience', 'fired clay', 'engobe',
+    'pebbles', 'flint', 'obsidian', 'ceramic', 'terracotta',
+    'ivory', 'horn', 'shell', 'coral', 'pearl', 'sink', 'sinks'
+]
+
+# Common techniques
+TECHNIQUE_KEYWORDS = [
+    'chipping', 'blowing', 'gilding', 'niello', 'retouching',
+    'glaze', 'glazing', 'stamp', 'stamping', 'watering',
+    'painting', 'hand modeling', 'modeling', 'imprint',
+    'engraving', 'carving', 'polishing', 'varnish',
+    'thread', 'weaving', 'forging', 'casting', 'welding',
+    'incision', 'relief', 'embossing', 'inlay', 'enameling'
+]
+
+# One rule per keyword: every keyword found becomes a tag
+MATERIAL_RULES = RuleSet([(k.title(), [k]) for k in MATERIAL_KEYWORDS])
+TECHNIQUE_RULES = RuleSet([(k.title(), [k]) for k in TECHNIQUE_KEYWORDS])
+
+
 def split_material_technique(mat_tech):
     """
-    Split material_technique into materials and techniques
+    Split a material_technique column into materials and techniques
     Materials: clay, iron, bronze, silver, gold, stone, etc.
     Techniques: chipping, blowing, gilding, niello, retouching, etc.
+    Returns a DataFrame with 'material' and 'technique' columns
     """
-    if pd.isna(mat_tech) or mat_tech == '':
-        return '', ''
-
-    text = str(mat_tech).lower()
-
-    # Common materials
-    materials = []
-    material_keywords = [
-        'clay', 'iron', 'bronze', 'silver', 'gold', 'copper', 'brass',
-        'stone', 'limestone', 'sandstone', 'marble', 'granite',
-        'bone', 'wood', 'leather', 'fabric', 'glass', 'paste',
-        'carnelian', 'amber', 'lignite', 'agate', 'chalcedony',
-        'gypsum', 'kashin', 'faience', 'fired clay', 'engobe',
-        'pebbles', 'flint', 'obsidian', 'ceramic', 'terracotta',
-        'ivory', 'horn', 'shell', 'coral', 'pearl', 'sink', 'sinks'
-    ]
-
-    # Common techniques
-    techniques = []
-    technique_keywords = [
-        'chipping', 'blowing', 'gilding', 'niello', 'retouching',
-        'glaze', 'glazing', 'stamp', 'stamping', 'watering',
-        'painting', 'hand modeling', 'modeling', 'imprint',
-        'engraving', 'carving', 'polishing', 'varnish',
-        'thread', 'weaving', 'forging', 'casting', 'welding',
-        'incision', 'relief', 'embossing', 'inlay', 'enameling'
-    ]
-
-    # Extract materials
-    for material in material_keywords:
-        if material in text:
-            materials.append(material.title())
-
-    # Extract techniques
-    for technique in technique_keywords:
-        if technique in text:
-            techniques.append(technique.title())
+    empty = mat_tech.isna() | (mat_tech == '')
+    text = mat_tech.where(~empty, '')
 
     # Join with commas
-    material_str = ', '.join(sorted(set(materials))) if materials else ''
-    technique_str = ', '.join(sorted(set(techniques))) if techniques else ''
+    join_tags = lambda tags: ', '.join(sorted(set(tags)))
+    materials = MATERIAL_RULES.tags(text).map(join_tags)
+    techniques = TECHNIQUE_RULES.tags(text).map(join_tags)
 
     # If nothing found, return original as material
-    if not material_str and not technique_str:
-        material_str = mat_tech.strip()
+    nothing_found = (materials == '') & (techniques == '') & ~empty
+    materials[nothing_found] = mat_tech[nothing_found].astype(str).str.strip()
 
-    return material_str, technique_str
+    return pd.DataFrame({'material': materials, 'technique': techniques}, index=mat_tech.index)
 
 
 def normalize_textual_dates(dating_str):
@@ -596,9 +594,7 @@ def clean_hermitage_dataset(input_file, output_file):
     # STEP 6: Split material_technique
     # ========================================
     print("🔧 STEP 6: Splitting material_technique...")
-    df[['material', 'technique']] = df['material_technique'].apply(
-        lambda x: pd.Series(split_material_technique(x))
-    )
+    df[['material', 'technique']] = split_material_technique(df['material_technique'])
 
     has_material = df['material'].notna() & (df['material'] != '')
     has_technique = df['technique'].notna() & (df['technique'] != '')
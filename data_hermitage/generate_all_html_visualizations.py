@@ -12,6 +12,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from data_cube import load_cube, slice_counts, assign_oblast
 
 print("="*70)
 print("GENERATING HTML VISUALIZATIONS FOR WEB")
@@ -20,6 +24,61 @@ print("="*70)
 # Create output directory
 os.makedirs('html_visualizations', exist_ok=True)
 
+# =============================================================================
+# RENDERING CONFIG (large point sets)
+# =============================================================================
+# Above WEBGL_THRESHOLD points, scatter charts are drawn with WebGL (scattergl);
+# point maps already render through WebGL (mapbox-gl) and keep one coloured
+# marker per object.
+# Above BINNING_THRESHOLD points (None = never), points are aggregated
+# server-side into grid cells before plotting, so the HTML stays small.
+WEBGL_THRESHOLD = 1000
+BINNING_THRESHOLD = None
+TIMELINE_BIN_YEARS = 50    # year bin width for the binned timeline
+MAP_BIN_DEGREES = 0.1      # lat/lon cell size for the binned maps
+
+def use_webgl(n_points):
+    return n_points > WEBGL_THRESHOLD
+
+def use_binning(n_points):
+    return BINNING_THRESHOLD is not None and n_points > BINNING_THRESHOLD
+
+def scatter_trace(n_points, **kwargs):
+    """go.Scatter, or go.Scattergl when the trace is large"""
+    return go.Scattergl(**kwargs) if use_webgl(n_points) else go.Scatter(**kwargs)
+
+def bin_geo_points(df, color_col, cell=MAP_BIN_DEGREES):
+    """Aggregate lat/lon points into grid cells: count + dominant category per cell"""
+    binned = df.assign(
+        lat_bin=(np.floor(df['latitude'] / cell) + 0.5) * cell,
+        lon_bin=(np.floor(df['longitude'] / cell) + 0.5) * cell,
+    )
+    counts = binned.groupby(['lat_bin', 'lon_bin']).size().rename('count')
+    dominant = (binned.groupby(['lat_bin', 'lon_bin'])[color_col]
+                .agg(lambda s: s.mode().iat[0] if s.notna().any() else 'Unknown'))
+    return pd.concat([counts, dominant], axis=1).reset_index()
+
+def points_map(df, color_col, hover_name, hover_data, title):
+    """Point map: one coloured marker per object, binned cells above BINNING_THRESHOLD"""
+    common = dict(lat='latitude', lon='longitude', zoom=5.5, title=title, height=700)
+    if use_binning(len(df)):
+        cells = bin_geo_points(df, color_col)
+        fig = px.scatter_mapbox(
+            cells.rename(columns={'lat_bin': 'latitude', 'lon_bin': 'longitude'}),
+            size='count', color=color_col, size_max=30,
+            hover_data={'count': ':,', 'latitude': False, 'longitude': False},
+            color_discrete_sequence=px.colors.sequential.Reds, **common)
+    else:
+        fig = px.scatter_mapbox(df, hover_name=hover_name, hover_data=hover_data,
+                                color=color_col,
+                                color_discrete_sequence=px.colors.sequential.Reds, **common)
+    fig.update_layout(
+        mapbox_style='open-street-map',
+        title_font=dict(size=20, color='#5C3317', family='Arial Black'),
+        margin={"r":0,"t":50,"l":0,"b":0}
+    )
+    return fig
+
 # =============================================================================
 # HERMITAGE MUSEUM VISUALIZATIONS
 # =============================================================================
@@ -31,28 +90,14 @@ print("-"*70)
 df_hermitage = pd.read_csv('data_hermitage/5_FINAL_hermitage_ukraine.csv')
 print(f"✓ Loaded {len(df_hermitage):,} Hermitage objects")
 
-# Extract acquisition year
-def extract_year_from_acquisition(value):
-    if pd.isna(value):
-        return np.nan
-    try:
-        return int(float(value))
-    except:
-        pass
-    try:
-        import re
-        match = re.search(r'(\d{4})', str(value))
-        if match:
-            return int(match.group(1))
-    except:
-        pass
-    return np.nan
-
-df_hermitage['acquisition_year_only'] = df_hermitage['acquisition_year'].apply(extract_year_from_acquisition)
+# Pre-aggregated counts (dataset x category x period x oblast x location x type x year)
+# built by scripts/data_cube.py; summary charts slice it instead of the raw rows
+cube = load_cube()
+print(f"✓ Loaded data cube ({len(cube):,} cells)")
 
 # --- 1. Material Categories Bar Chart ---
 print("\n1. Material Categories Bar Chart...")
-material_counts = df_hermitage['category'].value_counts().head(12)
+material_counts = slice_counts(cube, 'hermitage', 'category').head(12)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -81,9 +126,8 @@ print("   ✓ hermitage_material_categories.html")
 
 # --- 2. Material Categories Treemap ---
 print("2. Material Categories Treemap...")
-material_df = df_hermitage['category'].value_counts().reset_index()
+material_df = slice_counts(cube, 'hermitage', 'category').reset_index()
 material_df.columns = ['Category', 'Count']
-material_df = material_df[material_df['Category'].notna()]
 
 fig = px.treemap(
     material_df,
@@ -105,7 +149,7 @@ print("   ✓ hermitage_material_treemap.html")
 
 # --- 3. Historical Periods Bar Chart ---
 print("3. Historical Periods Bar Chart...")
-period_counts = df_hermitage[df_hermitage['period_category'] != 'Unknown Period']['period_category'].value_counts().head(15)
+period_counts = slice_counts(cube, 'hermitage', 'period', exclude={'period': 'Unknown Period'}).head(15)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -137,19 +181,37 @@ print("4. Timeline Scatter Plot...")
 df_timeline = df_hermitage[df_hermitage['year_for_timeline'].notna()].copy()
 df_timeline = df_timeline.sample(min(3000, len(df_timeline)))
 
-fig = px.scatter(
-    df_timeline,
-    x='year_for_timeline',
-    y=np.random.randn(len(df_timeline)),
-    color='period_category',
-    hover_data=['object_name', 'find_location', 'material'],
-    title='Timeline: Ukrainian Objects Through History (40,000 BC - Present)',
-    labels={'year_for_timeline': 'Year'},
-    height=600,
-    color_discrete_sequence=px.colors.sequential.Reds
-)
+if use_binning(len(df_timeline)):
+    df_timeline['year_bin'] = (df_timeline['year_for_timeline'] // TIMELINE_BIN_YEARS) * TIMELINE_BIN_YEARS
+    timeline_bins = df_timeline.groupby(['year_bin', 'period_category']).size().reset_index(name='count')
+    fig = px.scatter(
+        timeline_bins,
+        x='year_bin',
+        y='period_category',
+        size='count',
+        color='period_category',
+        title='Timeline: Ukrainian Objects Through History (40,000 BC - Present)',
+        labels={'year_bin': 'Year'},
+        height=600,
+        color_discrete_sequence=px.colors.sequential.Reds,
+        render_mode='webgl'
+    )
+    fig.update_traces(marker=dict(opacity=0.6, line=dict(width=0.5, color='#4A2511')))
+else:
+    fig = px.scatter(
+        df_timeline,
+        x='year_for_timeline',
+        y=np.random.randn(len(df_timeline)),
+        color='period_category',
+        hover_data=['object_name', 'find_location', 'material'],
+        title='Timeline: Ukrainian Objects Through History (40,000 BC - Present)',
+        labels={'year_for_timeline': 'Year'},
+        height=600,
+        color_discrete_sequence=px.colors.sequential.Reds,
+        render_mode='webgl' if use_webgl(len(df_timeline)) else 'svg'
+    )
+    fig.update_traces(marker=dict(size=8, opacity=0.6, line=dict(width=0.5, color='#4A2511')))
 
-fig.update_traces(marker=dict(size=8, opacity=0.6, line=dict(width=0.5, color='#4A2511')))
 fig.update_layout(
     title_font=dict(size=20, color='#5C3317', family='Arial Black'),
     plot_bgcolor='#FFF8F0',
@@ -165,24 +227,13 @@ print("5. Geographic Map (Scatter Mapbox)...")
 df_geo = df_hermitage[df_hermitage['latitude'].notna() & df_hermitage['longitude'].notna()].copy()
 df_map = df_geo.sample(min(5000, len(df_geo)))
 
-fig = px.scatter_mapbox(
+fig = points_map(
     df_map,
-    lat='latitude',
-    lon='longitude',
+    color_col='category',
     hover_name='object_name',
     hover_data={'find_location': True, 'category': True, 'period_category': True,
                 'latitude': False, 'longitude': False},
-    color='category',
-    zoom=5.5,
-    title='Geographic Distribution of Ukrainian Archaeological Objects',
-    height=700,
-    color_discrete_sequence=px.colors.sequential.Reds
-)
-
-fig.update_layout(
-    mapbox_style='open-street-map',
-    title_font=dict(size=20, color='#5C3317', family='Arial Black'),
-    margin={"r":0,"t":50,"l":0,"b":0}
+    title='Geographic Distribution of Ukrainian Archaeological Objects'
 )
 
 fig.write_html('html_visualizations/hermitage_map.html')
@@ -190,7 +241,7 @@ print("   ✓ hermitage_map.html")
 
 # --- 6. Top Archaeological Sites ---
 print("6. Top 20 Archaeological Sites...")
-location_counts = df_geo['find_location'].value_counts().head(20)
+location_counts = slice_counts(cube, 'hermitage', 'location', exclude={'oblast': 'Unknown'}).head(20)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -219,8 +270,8 @@ print("   ✓ hermitage_sites.html")
 
 # --- 7. Acquisition Timeline ---
 print("7. Acquisition Timeline...")
-df_acq = df_hermitage[df_hermitage['acquisition_year_only'].notna()].copy()
-yearly_acq = df_acq.groupby('acquisition_year_only').size().reset_index(name='count')
+yearly_acq = slice_counts(cube, 'hermitage', 'year').sort_index().reset_index()
+yearly_acq.columns = ['acquisition_year_only', 'count']
 
 fig = go.Figure()
 fig.add_trace(go.Scatter(
@@ -277,8 +328,8 @@ def classify_acquisition_period(year):
     else:
         return 'Recent'
 
-df_acq['acquisition_period'] = df_acq['acquisition_year_only'].apply(classify_acquisition_period)
-period_acq = df_acq['acquisition_period'].value_counts()
+yearly_acq['acquisition_period'] = yearly_acq['acquisition_year_only'].apply(classify_acquisition_period)
+period_acq = yearly_acq.groupby('acquisition_period')['count'].sum()
 
 period_order = ['Before Russian Empire', 'Russian Empire (1764-1917)', 'First Independence (1917-1921)',
                 'Soviet Period (1922-1991)', 'Independence (1991-present)', 'Recent']
@@ -314,35 +365,10 @@ print("   ✓ hermitage_acquisition_periods.html")
 # --- 9. Regional Distribution (Oblasts) ---
 print("9. Regional Distribution (Oblasts)...")
 
-def assign_oblast_by_coordinates(lat, lon):
-    if pd.isna(lat) or pd.isna(lon):
-        return 'Unknown'
-    if not (22 <= lon <= 41) or not (44 <= lat <= 53):
-        return 'Outside Ukraine'
-    if lat < 46 and 33 <= lon <= 37:
-        return 'Crimea'
-    if 46 <= lat < 47.5:
-        if 28 <= lon < 31:
-            return 'Odesa'
-        elif 31 <= lon < 33:
-            return 'Mykolaiv'
-        elif 33 <= lon < 36:
-            return 'Kherson'
-    if lat >= 47.5 and 36 <= lon <= 41:
-        if lat >= 49.5:
-            return 'Kharkiv'
-        elif lat >= 48:
-            return 'Luhansk'
-        else:
-            return 'Donetsk'
-    if 46.5 <= lat < 48.5 and 33 <= lon < 36:
-        return 'Zaporizhzhia'
-    return 'Other Region'
-
-df_geo['current_oblast'] = df_geo.apply(
-    lambda row: assign_oblast_by_coordinates(row['latitude'], row['longitude']), axis=1)
+# same coordinate boxes as the cube's oblast dimension
+df_geo['current_oblast'] = assign_oblast(df_geo['latitude'], df_geo['longitude'])
 
-oblast_counts = df_geo['current_oblast'].value_counts().head(15)
+oblast_counts = slice_counts(cube, 'hermitage', 'oblast', exclude={'oblast': 'Unknown'}).head(15)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -371,13 +397,14 @@ print("   ✓ hermitage_oblasts.html")
 
 # --- 10. Materials × Periods Cross-Analysis ---
 print("10. Materials × Periods Cross-Analysis...")
-top_materials = df_hermitage['category'].value_counts().head(10).index
-top_periods = df_hermitage[df_hermitage['period_category'] != 'Unknown Period']['period_category'].value_counts().head(10).index
+top_materials = slice_counts(cube, 'hermitage', 'category').head(10).index
+top_periods = slice_counts(cube, 'hermitage', 'period', exclude={'period': 'Unknown Period'}).head(10).index
 
-cross_data = df_hermitage[
-    df_hermitage['category'].isin(top_materials) & 
-    df_hermitage['period_category'].isin(top_periods)
-].groupby(['period_category', 'category']).size().reset_index(name='count')
+cross_data = slice_counts(
+    cube, 'hermitage', ['period', 'category'],
+    where={'category': list(top_materials), 'period': list(top_periods)}
+).sort_index().reset_index()
+cross_data.columns = ['period_category', 'category', 'count']
 
 fig = px.bar(
     cross_data,
@@ -405,7 +432,7 @@ print("   ✓ hermitage_materials_periods.html")
 # --- 11. Oblast Clusters Interactive ---
 print("11. Oblast Clusters Interactive...")
 
-top_oblasts = df_geo['current_oblast'].value_counts().head(12)
+top_oblasts = slice_counts(cube, 'hermitage', 'oblast', exclude={'oblast': 'Unknown'}).head(12)
 positions = [
     (0.5, 3.5), (2, 3.5), (3.5, 3.5),
     (1.25, 2.6), (2.75, 2.6),
@@ -414,7 +441,24 @@ positions = [
 ]
 base_colors = ['#C94A38', '#E07A5F', '#D4634A', '#B8403A', '#E8927C', '#A63A2F']
 
+def cluster_point_cloud(center, radius, n_points, seed):
+    """
+    Decorative point cloud around `center`, drawn in one vectorized call.
+    Uses a local Generator so the result is reproducible per oblast and the
+    global numpy RNG state is left untouched.
+    Returns x, y, marker sizes and opacities as arrays.
+    """
+    rng = np.random.default_rng(seed)
+    r = np.minimum(np.abs(rng.normal(0, radius/2.5, n_points)), radius)
+    theta = rng.random(n_points) * 2 * np.pi
+    x = center[0] + r * np.cos(theta)
+    y = center[1] + r * np.sin(theta)
+    sizes = rng.uniform(2, 4, n_points)
+    opacities = rng.uniform(0.6, 0.85, n_points)
+    return x, y, sizes, opacities
+
 fig = go.Figure()
+cloud_x, cloud_y, cloud_size, cloud_opacity, cloud_color, cloud_hover = [], [], [], [], [], []
 
 for idx, (oblast, count) in enumerate(top_oblasts.items()):
     if idx >= len(positions):
@@ -440,24 +484,15 @@ for idx, (oblast, count) in enumerate(top_oblasts.items()):
     radius = 0.30 + (count - min_count) / (max_count - min_count) * 0.35
     
     n_points = min(int(count / 3.5), 2000)
-    np.random.seed(idx)
-    
-    points_x, points_y = [], []
-    for _ in range(n_points):
-        r = min(abs(np.random.normal(0, radius/2.5)), radius)
-        theta = np.random.random() * 2 * np.pi
-        points_x.append(x + r * np.cos(theta))
-        points_y.append(y + r * np.sin(theta))
-    
-    fig.add_trace(go.Scatter(
-        x=points_x, y=points_y,
-        mode='markers',
-        marker=dict(color=color, size=np.random.uniform(2, 4, n_points),
-                    opacity=np.random.uniform(0.6, 0.85, n_points), line=dict(width=0)),
-        name=oblast,
-        hovertemplate=f'<b>{oblast}</b><br>Total: {count:,}<br>Period: {date_range}<extra></extra>',
-        showlegend=False
-    ))
+    points_x, points_y, sizes, opacities = cluster_point_cloud((x, y), radius, n_points, seed=idx)
+    hover = np.array([[oblast, f'{count:,}', date_range]], dtype=object)
+
+    cloud_x.append(points_x)
+    cloud_y.append(points_y)
+    cloud_size.append(sizes)
+    cloud_opacity.append(opacities)
+    cloud_color.append(np.full(n_points, color))
+    cloud_hover.append(np.repeat(hover, n_points, axis=0))
     
     fig.add_annotation(x=x, y=y+0.15, text=f'<b>{oblast}</b>',
                       showarrow=False, font=dict(size=13, color='#2C1810'))
@@ -466,6 +501,20 @@ for idx, (oblast, count) in enumerate(top_oblasts.items()):
     fig.add_annotation(x=x, y=y-0.25, text=f'<i>{date_range}</i>',
                       showarrow=False, font=dict(size=10, color='#4A2511'))
 
+# all oblast clouds in a single trace
+n_cloud = sum(len(a) for a in cloud_x)
+if n_cloud:
+    fig.add_trace(scatter_trace(
+        n_cloud,
+        x=np.concatenate(cloud_x), y=np.concatenate(cloud_y),
+        mode='markers',
+        marker=dict(color=np.concatenate(cloud_color), size=np.concatenate(cloud_size),
+                    opacity=np.concatenate(cloud_opacity), line=dict(width=0)),
+        customdata=np.concatenate(cloud_hover),
+        hovertemplate='<b>%{customdata[0]}</b><br>Total: %{customdata[1]}<br>Period: %{customdata[2]}<extra></extra>',
+        showlegend=False
+    ))
+
 fig.update_layout(
     title='<b>Ukrainian Regions - Cluster Visualization</b>',
     xaxis=dict(range=[-0.3, 4.3], showgrid=False, showticklabels=False, zeroline=False),
@@ -494,7 +543,7 @@ print(f"✓ Loaded {len(df_stolen):,} stolen objects")
 
 # --- 1. Categories Bar Chart ---
 print("\n1. Categories Bar Chart...")
-category_counts = df_stolen['category'].value_counts().head(15)
+category_counts = slice_counts(cube, 'stolen', 'category').head(15)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -525,24 +574,13 @@ print("   ✓ stolen_categories.html")
 print("2. Geographic Map...")
 df_stolen_geo = df_stolen[df_stolen['latitude'].notna() & df_stolen['longitude'].notna()].copy()
 
-fig = px.scatter_mapbox(
+fig = points_map(
     df_stolen_geo,
-    lat='latitude',
-    lon='longitude',
+    color_col='category',
     hover_name='name',
     hover_data={'place_incident': True, 'category': True, 'period_category': True,
                 'latitude': False, 'longitude': False},
-    color='category',
-    zoom=5.5,
-    title='Geographic Distribution of Stolen Ukrainian Objects',
-    height=700,
-    color_discrete_sequence=px.colors.sequential.Reds
-)
-
-fig.update_layout(
-    mapbox_style='open-street-map',
-    title_font=dict(size=20, color='#5C3317', family='Arial Black'),
-    margin={"r":0,"t":50,"l":0,"b":0}
+    title='Geographic Distribution of Stolen Ukrainian Objects'
 )
 
 fig.write_html('html_visualizations/stolen_map.html')
@@ -550,7 +588,7 @@ print("   ✓ stolen_map.html")
 
 # --- 3. Historical Periods ---
 print("3. Historical Periods...")
-period_counts_stolen = df_stolen[df_stolen['period_category'] != 'Unknown Period']['period_category'].value_counts()
+period_counts_stolen = slice_counts(cube, 'stolen', 'period', exclude={'period': 'Unknown Period'})
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -579,7 +617,7 @@ print("   ✓ stolen_periods.html")
 
 # --- 4. Locations Bar Chart ---
 print("4. Top Locations...")
-location_counts_stolen = df_stolen['place_incident'].value_counts().head(15)
+location_counts_stolen = slice_counts(cube, 'stolen', 'location').head(15)
 
 fig = go.Figure()
 fig.add_trace(go.Bar(
@@ -609,25 +647,7 @@ print("   ✓ stolen_locations.html")
 # --- 5. Timeline (Year of Incident) ---
 print("5. Incident Timeline...")
 
-def extract_year_stolen(value):
-    if pd.isna(value):
-        return np.nan
-    try:
-        return int(float(value))
-    except:
-        pass
-    try:
-        import re
-        match = re.search(r'(\d{4})', str(value))
-        if match:
-            return int(match.group(1))
-    except:
-        pass
-    return np.nan
-
-df_stolen['year_only'] = df_stolen['year_incident'].apply(extract_year_stolen)
-df_stolen_timeline = df_stolen[df_stolen['year_only'].notna()].copy()
-incident_counts = df_stolen_timeline['year_only'].value_counts().sort_index()
+incident_counts = slice_counts(cube, 'stolen', 'year').sort_index()
 
 fig = go.Figure()
 fig.add_trace(go.Scatter(
@@ -655,13 +675,14 @@ print("   ✓ stolen_timeline.html")
 
 # --- 6. Categories × Periods ---
 print("6. Categories × Periods...")
-top_categories = df_stolen['category'].value_counts().head(10).index
-top_periods_stolen = df_stolen[df_stolen['period_category'] != 'Unknown Period']['period_category'].value_counts().head(8).index
-
-cross_stolen = df_stolen[
-    df_stolen['category'].isin(top_categories) & 
-    df_stolen['period_category'].isin(top_periods_stolen)
-].groupby(['period_category', 'category']).size().reset_index(name='count')
+top_categories = slice_counts(cube, 'stolen', 'category').head(10).index
+top_periods_stolen = slice_counts(cube, 'stolen', 'period', exclude={'period': 'Unknown Period'}).head(8).index
+
+cross_stolen = slice_counts(
+    cube, 'stolen', ['period', 'category'],
+    where={'category': list(top_categories), 'period': list(top_periods_stolen)}
+).sort_index().reset_index()
+cross_stolen.columns = ['period_category', 'category', 'count']
 
 fig = px.bar(
     cross_stolen,
@@ -10,6 +10,18 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
+import os
+import sys
+import base64
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+from data_cube import extract_year
+from detail_store import write_detail_store, DETAIL_STORE_JS
+
+# Tipos que plotly.js sabe decodificar desde base64 (typed arrays)
+TYPED_ARRAY_DTYPES = {'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+                      'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'}
 
 def extract_coords_from_google_maps_link(link):
     """Extrae latitud y longitud de un link de Google Maps"""
@@ -26,7 +38,424 @@ def extract_coords_from_google_maps_link(link):
     
     return None, None
 
-def create_interactive_dashboard(csv_file):
+def to_typed_array(values):
+    """Codifica un array numérico como typed array de plotly.js ({dtype, bdata})"""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu' and arr.dtype.name not in TYPED_ARRAY_DTYPES:
+        # int64 no existe en JS: int32 si cabe, si no float64
+        fits = arr.size == 0 or (arr.min() >= np.iinfo(np.int32).min and arr.max() <= np.iinfo(np.int32).max)
+        arr = arr.astype(np.int32 if fits else np.float64)
+    arr = np.ascontiguousarray(arr)
+    return {
+        'dtype': TYPED_ARRAY_DTYPES[arr.dtype.name],
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii'),
+        **({'shape': ','.join(map(str, arr.shape))} if arr.ndim > 1 else {})
+    }
+
+def is_numeric_array(value):
+    """Array/lista 1-D de números (no booleanos) con más de un elemento"""
+    if isinstance(value, np.ndarray):
+        return value.ndim == 1 and value.dtype.kind in 'iuf' and value.size > 1
+    return (isinstance(value, (list, tuple)) and len(value) > 1
+            and all(isinstance(v, (int, float, np.integer, np.floating))
+                    and not isinstance(v, bool) for v in value))
+
+def encode_trace_arrays(trace):
+    """Atributos de datos de una traza (x, y, lat, lon, marker.color...) como typed arrays"""
+    encoded = {}
+    for key, value in trace.items():
+        if isinstance(value, dict):
+            # sub-atributos (marker, line...); las listas anidadas (p. ej. cells.values
+            # de go.Table) se dejan tal cual: plotly.js no las decodifica
+            encoded[key] = encode_trace_arrays(value)
+        elif is_numeric_array(value):
+            encoded[key] = to_typed_array(np.asarray(value))
+        else:
+            encoded[key] = value
+    return encoded
+
+def encode_typed_arrays(fig_json):
+    """Codifica en base64 solo los arrays de datos de las trazas; el layout no se toca"""
+    return {**fig_json, 'data': [encode_trace_arrays(trace) for trace in fig_json.get('data', [])]}
+
+# ==================================================================
+# DETALLE DE OBJETOS BAJO DEMANDA
+# ==================================================================
+# Columnas que solo se descargan al hacer clic en un objeto del mapa
+DETAIL_FIELDS = ['name', 'original_name', 'category', 'type', 'author', 'date',
+                 'year_incident', 'place_incident', 'circumstances', 'url']
+
+# Ficha del objeto, rellenada en el navegador con el registro del detail store
+DETAIL_BOX_JS = """
+function showDetail(box, d) {
+    var esc = function (v) {
+        if (v === null || v === undefined || v === '') return 'N/A';
+        return String(v).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    if (!d) { box.innerHTML = '<em>Sin detalle para este objeto</em>'; return; }
+    box.innerHTML = '<h3>' + esc(d.name) + '</h3>' +
+        (d.original_name ? '<p><i>' + esc(d.original_name) + '</i></p>' : '') +
+        '<p><b>Categoría:</b> ' + esc(d.category) + ' · <b>Tipo:</b> ' + esc(d.type) + '</p>' +
+        '<p><b>Autor:</b> ' + esc(d.author) + ' · <b>Fecha:</b> ' + esc(d.date) + '</p>' +
+        '<p><b>Año del incidente:</b> ' + esc(d.year_incident) + ' · <b>Lugar:</b> ' + esc(d.place_incident) + '</p>' +
+        '<p><b>Circunstancias:</b> ' + esc(d.circumstances) + '</p>' +
+        (d.url ? '<p><a href="' + esc(d.url) + '" target="_blank">Ver detalles</a></p>' : '');
+}
+"""
+
+def write_object_details(df_coords, output_file):
+    """Detail store por `id` junto al HTML; devuelve su ruta relativa"""
+    detail_dir = os.path.splitext(output_file)[0] + '_details'
+    write_detail_store(df_coords, 'id', DETAIL_FIELDS, detail_dir)
+    return os.path.relpath(detail_dir, os.path.dirname(output_file) or '.').replace(os.sep, '/')
+
+def write_panel_payloads(panels, panel_dir):
+    """Un JSON por panel (data + layout), con arrays numéricos en base64"""
+    os.makedirs(panel_dir, exist_ok=True)
+    paths = {}
+    for name, fig in panels.items():
+        payload = encode_typed_arrays(fig.to_plotly_json())
+        path = os.path.join(panel_dir, f'{name}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, cls=PlotlyJSONEncoder, separators=(',', ':'))
+        paths[name] = path
+        print(f"  ✓ {path} ({os.path.getsize(path)/1024:.1f} KB)")
+    return paths
+
+# ==================================================================
+# MODO CROSSFILTER
+# ==================================================================
+# Dimensiones filtrables: columna del CSV -> nombre en el payload
+CROSSFILTER_DIMS = {'category': 'category', 'type': 'type', 'year_incident': 'year'}
+
+def dictionary_encode(series):
+    """Códigos enteros compactos + etiquetas ordenadas (faltantes = máximo del tipo)"""
+    codes, labels = pd.factorize(series, sort=True)
+    dtype = np.uint8 if len(labels) < 255 else np.uint16 if len(labels) < 65535 else np.uint32
+    codes = np.where(codes < 0, np.iinfo(dtype).max, codes).astype(dtype)
+    labels = [int(v) if isinstance(v, (float, np.floating)) and float(v).is_integer() else str(v)
+              for v in labels]
+    return codes, labels
+
+def bitmap_index(codes, n_labels):
+    """Un bitset Uint32 por valor: el bit i está activo si el objeto i tiene ese valor"""
+    n = len(codes)
+    words = (n + 31) // 32
+    bitmaps = np.zeros((n_labels, words), dtype='<u4')
+    # filas agrupadas por código; un solo buffer de n bits reutilizado por valor
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_labels + 1))
+    bits = np.zeros(words * 32, dtype=bool)
+    for k in range(n_labels):
+        rows = order[bounds[k]:bounds[k + 1]]
+        bits[rows] = True
+        bitmaps[k] = np.packbits(bits, bitorder='little').view('<u4')
+        bits[rows] = False
+    return bitmaps
+
+def encode_ids(ids):
+    """ids enteros como typed array; cualquier otro id como lista de claves del detail store"""
+    if ids.dtype.kind in 'iu':
+        return to_typed_array(ids)
+    return pd.Series(ids).astype(str).tolist()
+
+def build_crossfilter_payload(df_coords):
+    """Columnas una sola vez como typed arrays, con índices bitmap por dimensión"""
+    payload = {
+        'n': len(df_coords),
+        'lat': to_typed_array(df_coords['latitude'].to_numpy(dtype=np.float32)),
+        'lon': to_typed_array(df_coords['longitude'].to_numpy(dtype=np.float32)),
+        'ids': encode_ids(df_coords['id'].to_numpy()),
+        'dims': {},
+    }
+    for column, dim in CROSSFILTER_DIMS.items():
+        codes, labels = dictionary_encode(df_coords[column])
+        payload['dims'][dim] = {
+            'labels': labels,
+            'codes': to_typed_array(codes),
+            'bitmaps': to_typed_array(bitmap_index(codes, len(labels))),
+        }
+    return payload
+
+# Motor de filtrado en el navegador (sin dependencias de Plotly)
+CROSSFILTER_JS = """
+var TYPED = {i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+             i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array};
+
+function decodeTyped(t) {
+    var bin = atob(t.bdata), bytes = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return new TYPED[t.dtype](bytes.buffer);
+}
+
+function popcount(x) {
+    x -= (x >>> 1) & 0x55555555;
+    x = (x & 0x33333333) + ((x >>> 2) & 0x33333333);
+    return (((x + (x >>> 4)) & 0x0F0F0F0F) * 0x01010101) >>> 24;
+}
+
+function Crossfilter(payload) {
+    var n = payload.n, words = (n + 31) >>> 5;
+    this.n = n;
+    this.words = words;
+    this.lat = decodeTyped(payload.lat);
+    this.lon = decodeTyped(payload.lon);
+    this.ids = Array.isArray(payload.ids) ? payload.ids : decodeTyped(payload.ids);
+    this.dims = {};
+    this.full = new Uint32Array(words).fill(0xFFFFFFFF);
+    if (n % 32) this.full[words - 1] = (1 << (n % 32)) - 1;
+    for (var name in payload.dims) {
+        var d = payload.dims[name], flat = decodeTyped(d.bitmaps), bitmaps = [];
+        for (var k = 0; k < d.labels.length; k++) bitmaps.push(flat.subarray(k * words, (k + 1) * words));
+        this.dims[name] = {labels: d.labels, codes: decodeTyped(d.codes), bitmaps: bitmaps,
+                           selected: null, mask: null};
+    }
+}
+
+// selected: lista de códigos (null = sin filtro)
+Crossfilter.prototype.filter = function(name, selected) {
+    var dim = this.dims[name];
+    dim.selected = selected && selected.length ? selected : null;
+    dim.mask = null;
+    if (!dim.selected) return;
+    var mask = new Uint32Array(this.words);
+    dim.selected.forEach(function(code) {
+        var bm = dim.bitmaps[code];
+        for (var w = 0; w < mask.length; w++) mask[w] |= bm[w];
+    });
+    dim.mask = mask;
+};
+
+// Máscara de todos los filtros activos salvo `exclude` (un panel no se filtra a sí mismo)
+Crossfilter.prototype.mask = function(exclude) {
+    var out = this.full.slice();
+    for (var name in this.dims) {
+        var m = this.dims[name].mask;
+        if (name === exclude || !m) continue;
+        for (var w = 0; w < out.length; w++) out[w] &= m[w];
+    }
+    return out;
+};
+
+Crossfilter.prototype.count = function(mask) {
+    var total = 0;
+    for (var w = 0; w < mask.length; w++) total += popcount(mask[w]);
+    return total;
+};
+
+Crossfilter.prototype.group = function(name, mask) {
+    var dim = this.dims[name], counts = new Uint32Array(dim.labels.length), codes = dim.codes;
+    for (var w = 0; w < mask.length; w++) {
+        var bits = mask[w];
+        while (bits) {
+            var low = bits & -bits, code = codes[(w << 5) + 31 - Math.clz32(low)];
+            if (code < counts.length) counts[code]++;
+            bits ^= low;
+        }
+    }
+    return counts;
+};
+
+Crossfilter.prototype.points = function(mask) {
+    var total = this.count(mask), lat = new Float32Array(total), lon = new Float32Array(total),
+        idx = new Uint32Array(total), j = 0;
+    for (var w = 0; w < mask.length; w++) {
+        var bits = mask[w];
+        while (bits) {
+            var low = bits & -bits, i = (w << 5) + 31 - Math.clz32(low);
+            lat[j] = this.lat[i]; lon[j] = this.lon[i]; idx[j++] = i;
+            bits ^= low;
+        }
+    }
+    return {lat: lat, lon: lon, idx: idx};
+};
+"""
+
+def create_crossfilter_dashboard(csv_file, output_file='dashboard_objetos_robados_ucrania_crossfilter.html'):
+    """Dashboard en modo crossfilter: los paneles se filtran entre sí en el navegador"""
+    
+    print("\n" + "="*70)
+    print("CREANDO DASHBOARD CROSSFILTER")
+    print("="*70 + "\n")
+    
+    print(f"📖 Leyendo archivo: {csv_file}")
+    df = pd.read_csv(csv_file)
+    df[['latitude', 'longitude']] = df['google_maps_link'].apply(
+        lambda x: pd.Series(extract_coords_from_google_maps_link(x))
+    )
+    df_coords = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+    df_coords['year_incident'] = df_coords['year_incident'].apply(extract_year)
+    print(f"✓ {len(df_coords)} objetos con coordenadas válidas\n")
+    
+    if len(df_coords) == 0:
+        print("⚠️  No hay objetos con coordenadas para visualizar")
+        return
+    
+    # Payload único (columnas + bitmaps), descargado una sola vez
+    print("📦 Codificando columnas e índices bitmap...")
+    payload_file = os.path.splitext(output_file)[0] + '.json'
+    with open(payload_file, 'w', encoding='utf-8') as f:
+        json.dump(build_crossfilter_payload(df_coords), f, separators=(',', ':'))
+    print(f"  ✓ {payload_file} ({os.path.getsize(payload_file)/1024:.1f} KB)")
+    details_src = write_object_details(df_coords, output_file)
+    print()
+    payload_src = os.path.relpath(payload_file, os.path.dirname(output_file) or '.').replace(os.sep, '/')
+    
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Crossfilter - Objetos Culturales Robados en Ucrania</title>
+        <script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 0; background-color: #f5f5f5; }}
+            .header {{ background-color: #1f77b4; color: white; padding: 20px; text-align: center; }}
+            .header h1 {{ margin: 0; font-size: 2em; }}
+            .toolbar {{ display: flex; gap: 20px; align-items: center; padding: 10px 20px;
+                        background-color: white; margin: 20px 20px 0 20px; border-radius: 10px; }}
+            .toolbar b {{ color: #d62728; font-size: 1.5em; }}
+            .toolbar button {{ padding: 6px 14px; cursor: pointer; }}
+            .hint {{ color: #666; font-size: 0.9em; }}
+            .dashboard-grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 20px; padding: 20px; }}
+            .dashboard-item {{ background-color: white; border-radius: 10px; padding: 15px;
+                               box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+            .full-width {{ grid-column: 1 / -1; }}
+            .detail {{ color: #333; }}
+            .detail h3 {{ margin-top: 0; color: #d62728; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>🏛️ Objetos Culturales Robados en Ucrania — Crossfilter</h1>
+        </div>
+        <div class="toolbar">
+            <span><b id="selected">…</b> / <span id="total">…</span> objetos seleccionados</span>
+            <span class="hint" id="timing"></span>
+            <button id="reset">Quitar filtros</button>
+            <span class="hint">Clic en barras o sectores para filtrar · arrastra sobre la línea temporal para seleccionar años</span>
+        </div>
+        <div class="dashboard-grid">
+            <div class="dashboard-item full-width"><div id="map" style="height: 600px;"></div></div>
+            <div class="dashboard-item full-width detail" id="detail"><em>Haz clic en un objeto del mapa para ver su ficha</em></div>
+            <div class="dashboard-item"><div id="categories" style="height: 400px;"></div></div>
+            <div class="dashboard-item"><div id="timeline" style="height: 400px;"></div></div>
+            <div class="dashboard-item full-width"><div id="pie" style="height: 400px;"></div></div>
+        </div>
+        <script>
+{CROSSFILTER_JS}
+{DETAIL_STORE_JS}
+{DETAIL_BOX_JS}
+            var details = detailStore('{details_src}'), shownPoints = null;
+            var SELECTED_COLOR = '#d62728', MUTED_COLOR = '#cccccc';
+
+            function barColors(dim) {{
+                return dim.labels.map(function(_, code) {{
+                    return !dim.selected || dim.selected.indexOf(code) >= 0 ? SELECTED_COLOR : MUTED_COLOR;
+                }});
+            }}
+
+            function toggle(cf, name, code) {{
+                var current = (cf.dims[name].selected || []).slice(), pos = current.indexOf(code);
+                if (pos >= 0) current.splice(pos, 1); else current.push(code);
+                cf.filter(name, current);
+            }}
+
+            function render(cf) {{
+                var t0 = performance.now();
+                var all = cf.mask(null), pts = cf.points(all);
+                var cat = cf.dims.category, year = cf.dims.year, type = cf.dims.type;
+                var catCounts = cf.group('category', cf.mask('category'));
+                var yearCounts = cf.group('year', cf.mask('year'));
+                var typeCounts = cf.group('type', cf.mask('type'));
+                var elapsed = performance.now() - t0;
+                shownPoints = pts;
+
+                Plotly.react('map', [{{
+                    type: 'scattermapbox', lat: pts.lat, lon: pts.lon, mode: 'markers',
+                    marker: {{size: 7, color: SELECTED_COLOR, opacity: 0.7}},
+                    text: Array.prototype.map.call(pts.idx, function(i) {{
+                        return cat.labels[cat.codes[i]] || '';
+                    }}),
+                    hoverinfo: 'text'
+                }}], {{
+                    title: 'Mapa de Objetos Culturales Robados en Ucrania', uirevision: 'map',
+                    mapbox: {{style: 'open-street-map', center: {{lat: 48.5, lon: 31.5}}, zoom: 5}},
+                    margin: {{r: 0, t: 50, l: 0, b: 0}}
+                }}, {{responsive: true}});
+
+                Plotly.react('categories', [{{
+                    type: 'bar', x: cat.labels, y: catCounts, marker: {{color: barColors(cat)}}
+                }}], {{
+                    title: 'Objetos Robados por Categoría', uirevision: 'categories',
+                    xaxis: {{tickangle: -45}}, yaxis: {{title: 'Número de Objetos'}}
+                }}, {{responsive: true}});
+
+                Plotly.react('timeline', [{{
+                    type: 'bar', x: year.labels, y: yearCounts, marker: {{color: barColors(year)}}
+                }}], {{
+                    title: 'Evolución Temporal de Robos', uirevision: 'timeline', dragmode: 'select',
+                    selectdirection: 'h', xaxis: {{title: 'Año del Incidente'}},
+                    yaxis: {{title: 'Número de Objetos', fixedrange: true}}
+                }}, {{responsive: true}});
+
+                Plotly.react('pie', [{{
+                    type: 'pie', labels: type.labels, values: typeCounts, hole: 0.4, sort: false,
+                    pull: type.labels.map(function(_, code) {{
+                        return type.selected && type.selected.indexOf(code) >= 0 ? 0.1 : 0;
+                    }})
+                }}], {{title: 'Tipos de Objetos Robados', uirevision: 'pie'}}, {{responsive: true}});
+
+                document.getElementById('selected').textContent = pts.idx.length.toLocaleString();
+                document.getElementById('timing').textContent = 'filtrado en ' + elapsed.toFixed(1) + ' ms';
+            }}
+
+            fetch('{payload_src}')
+                .then(function(r) {{ return r.json(); }})
+                .then(function(payload) {{
+                    var cf = new Crossfilter(payload);
+                    document.getElementById('total').textContent = cf.n.toLocaleString();
+                    render(cf);
+
+                    document.getElementById('map').on('plotly_click', function(ev) {{
+                        var box = document.getElementById('detail');
+                        box.innerHTML = 'Cargando…';
+                        details.get(cf.ids[shownPoints.idx[ev.points[0].pointIndex]])
+                            .then(function(d) {{ showDetail(box, d); }});
+                    }});
+                    document.getElementById('categories').on('plotly_click', function(ev) {{
+                        toggle(cf, 'category', ev.points[0].pointIndex); render(cf);
+                    }});
+                    document.getElementById('pie').on('plotly_click', function(ev) {{
+                        toggle(cf, 'type', ev.points[0].pointNumber); render(cf);
+                        return false;
+                    }});
+                    var timeline = document.getElementById('timeline');
+                    timeline.on('plotly_selected', function(ev) {{
+                        cf.filter('year', ev ? ev.points.map(function(p) {{ return p.pointIndex; }}) : null);
+                        render(cf);
+                    }});
+                    timeline.on('plotly_deselect', function() {{ cf.filter('year', null); render(cf); }});
+                    document.getElementById('reset').addEventListener('click', function() {{
+                        Object.keys(cf.dims).forEach(function(name) {{ cf.filter(name, null); }});
+                        render(cf);
+                    }});
+                }});
+        </script>
+    </body>
+    </html>
+    """
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    
+    print(f"✓ Dashboard crossfilter guardado: {output_file}")
+    print(f"✓ Sirve la carpeta (p. ej. python -m http.server) y abre '{output_file}'")
+    print("="*70 + "\n")
+
+def create_interactive_dashboard(csv_file, output_file='dashboard_objetos_robados_ucrania.html'):
     """Crea un dashboard interactivo completo con mapa y gráficos"""
     
     print("\n" + "="*70)
@@ -51,15 +480,10 @@ def create_interactive_dashboard(csv_file):
         print("⚠️  No hay objetos con coordenadas para visualizar")
         return
     
-    # Preparar datos
-    df_coords['hover_text'] = df_coords.apply(
-        lambda row: f"<b>{row.get('name', 'Sin nombre')}</b><br>" +
-                    f"Categoría: {row.get('category', 'N/A')}<br>" +
-                    f"Año: {row.get('year_incident', 'N/A')}<br>" +
-                    f"Lugar: {row.get('place_incident', 'N/A')}<br>" +
-                    f"<a href='{row.get('url', '#')}'>Ver detalles</a>",
-        axis=1
-    )
+    # Detalle de cada objeto fuera del HTML: el mapa solo lleva su id
+    print("🗄️  Guardando detalle de objetos...")
+    details_src = write_object_details(df_coords, output_file)
+    print()
     
     print("📊 Creando visualizaciones...\n")
     
@@ -76,11 +500,10 @@ def create_interactive_dashboard(csv_file):
         hover_name='name',
         hover_data={
             'category': True,
-            'year_incident': True,
-            'place_incident': True,
             'latitude': False,
             'longitude': False
         },
+        custom_data=['id'],
         title='Mapa de Objetos Culturales Robados en Ucrania',
         color_discrete_sequence=px.colors.qualitative.Set1
     )
@@ -198,9 +621,31 @@ def create_interactive_dashboard(csv_file):
     )
     
     # ==================================================================
-    # CREAR HTML CON TODOS LOS GRÁFICOS
+    # PAYLOADS POR PANEL + HTML LIGERO (carga diferida)
     # ==================================================================
-    print("📝 Generando HTML...\n")
+    # Cada panel se guarda en su propio JSON; la página solo descarga y
+    # dibuja un panel cuando entra en pantalla (IntersectionObserver).
+    print("📦 Guardando paneles...")
+    panel_dir = os.path.splitext(output_file)[0] + '_panels'
+    panels = {
+        'map': fig_map,
+        'categories': fig_categories,
+        'timeline': fig_timeline,
+        'pie': fig_pie,
+        'locations': fig_locations,
+        'density': fig_density,
+    }
+    panel_paths = write_panel_payloads(panels, panel_dir)
+    panel_src = {name: os.path.relpath(path, os.path.dirname(output_file) or '.').replace(os.sep, '/')
+                 for name, path in panel_paths.items()}
+    panel_height = {name: fig.layout.height or 400 for name, fig in panels.items()}
+
+    def panel_div(name, details=None):
+        details_attr = f' data-details="{details}"' if details else ''
+        return (f'<div id="{name}" class="panel" data-panel="{panel_src[name]}"{details_attr} '
+                f'style="min-height: {panel_height[name]}px;"></div>')
+    
+    print("\n📝 Generando HTML...\n")
     
     html_content = f"""
     <!DOCTYPE html>
@@ -208,7 +653,7 @@ def create_interactive_dashboard(csv_file):
     <head>
         <meta charset="UTF-8">
         <title>Dashboard - Objetos Culturales Robados en Ucrania</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+        <script src="https://cdn.plot.ly/plotly-2.35.2.min.js" defer></script>
         <style>
             body {{
                 font-family: Arial, sans-serif;
@@ -268,6 +713,14 @@ def create_interactive_dashboard(csv_file):
             .full-width {{
                 grid-column: 1 / -1;
             }}
+            .detail {{
+                padding: 10px;
+                color: #333;
+            }}
+            .detail h3 {{
+                margin-top: 0;
+                color: #d62728;
+            }}
             .footer {{
                 background-color: #333;
                 color: white;
@@ -304,27 +757,28 @@ def create_interactive_dashboard(csv_file):
         
         <div class="dashboard-grid">
             <div class="dashboard-item full-width">
-                <div id="map"></div>
+                {panel_div('map', details_src)}
+                <div id="detail" class="detail"><em>Haz clic en un objeto del mapa para ver su ficha</em></div>
             </div>
             
             <div class="dashboard-item">
-                <div id="categories"></div>
+                {panel_div('categories')}
             </div>
             
             <div class="dashboard-item">
-                <div id="timeline"></div>
+                {panel_div('timeline')}
             </div>
             
             <div class="dashboard-item">
-                <div id="pie"></div>
+                {panel_div('pie')}
             </div>
             
             <div class="dashboard-item">
-                <div id="locations"></div>
+                {panel_div('locations')}
             </div>
             
             <div class="dashboard-item full-width">
-                <div id="density"></div>
+                {panel_div('density')}
             </div>
         </div>
         
@@ -334,36 +788,53 @@ def create_interactive_dashboard(csv_file):
         </div>
         
         <script>
-            // Mapa principal
-            var mapData = {fig_map.to_json()};
-            Plotly.newPlot('map', mapData.data, mapData.layout);
-            
-            // Gráfico de categorías
-            var categoriesData = {fig_categories.to_json()};
-            Plotly.newPlot('categories', categoriesData.data, categoriesData.layout);
-            
-            // Timeline
-            var timelineData = {fig_timeline.to_json()};
-            Plotly.newPlot('timeline', timelineData.data, timelineData.layout);
-            
-            // Pie chart
-            var pieData = {fig_pie.to_json()};
-            Plotly.newPlot('pie', pieData.data, pieData.layout);
-            
-            // Tabla de lugares
-            var locationsData = {fig_locations.to_json()};
-            Plotly.newPlot('locations', locationsData.data, locationsData.layout);
-            
-            // Mapa de densidad
-            var densityData = {fig_density.to_json()};
-            Plotly.newPlot('density', densityData.data, densityData.layout);
+{DETAIL_STORE_JS}
+{DETAIL_BOX_JS}
+            // Ficha del objeto: se descarga del detail store al hacer clic (customdata[0] = id)
+            function bindDetails(el) {{
+                var details = detailStore(el.dataset.details), box = document.getElementById('detail');
+                el.on('plotly_click', function(ev) {{
+                    box.innerHTML = 'Cargando…';
+                    details.get(ev.points[0].customdata[0]).then(function(d) {{ showDetail(box, d); }});
+                }});
+            }}
+
+            // Carga diferida: cada panel se descarga y dibuja al hacerse visible
+            document.addEventListener('DOMContentLoaded', function() {{
+                function renderPanel(el) {{
+                    fetch(el.dataset.panel)
+                        .then(function(r) {{ return r.json(); }})
+                        .then(function(fig) {{
+                            return Plotly.newPlot(el, fig.data, fig.layout, {{responsive: true}});
+                        }})
+                        .then(function() {{
+                            if (el.dataset.details) bindDetails(el);
+                        }})
+                        .catch(function(err) {{
+                            el.textContent = 'No se pudo cargar el panel: ' + err;
+                        }});
+                }}
+                var panels = document.querySelectorAll('.panel[data-panel]');
+                if (!('IntersectionObserver' in window)) {{
+                    panels.forEach(renderPanel);
+                    return;
+                }}
+                var observer = new IntersectionObserver(function(entries) {{
+                    entries.forEach(function(entry) {{
+                        if (entry.isIntersecting) {{
+                            observer.unobserve(entry.target);
+                            renderPanel(entry.target);
+                        }}
+                    }});
+                }}, {{rootMargin: '200px'}});
+                panels.forEach(function(el) {{ observer.observe(el); }});
+            }});
         </script>
     </body>
     </html>
     """
     
     # Guardar HTML
-    output_file = 'dashboard_objetos_robados_ucrania.html'
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
@@ -388,7 +859,8 @@ def create_interactive_dashboard(csv_file):
     
     print("\n" + "="*70)
     print("✓ Dashboard completado")
-    print(f"✓ Abre '{output_file}' en tu navegador")
+    print(f"✓ Sirve la carpeta (p. ej. python -m http.server) y abre '{output_file}'")
+    print(f"  (los paneles se cargan desde '{panel_dir}/')")
     print("="*70 + "\n")
 
 # Ejecutar
@@ -401,7 +873,10 @@ if __name__ == "__main__":
         print("="*70)
         print("\nAsegúrate de tener instalado: pip install plotly pandas\n")
         
-        create_interactive_dashboard(csv_filename)
+        if '--crossfilter' in sys.argv:
+            create_crossfilter_dashboard(csv_filename)
+        else:
+            create_interactive_dashboard(csv_filename)
         
     except FileNotFoundError:
         print(f"\n✗ ERROR: No se encontró el archivo '{csv_filename}'")
@@ -1,13 +1,25 @@
 import requests
+import numpy as np
 import pandas as pd
 import re
 import os
-from rdflib import Dataset
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from itertools import product
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
 
 PATH_L4R_TRIG_URL = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/raw_data/https___linked4resilience.eu_graphs_cultural-site-damage-events.trig"
 
 LOCAL_TRIG_PATH = "cultural-site-damage-events.trig"
-OUTPUT_DIR = "DisperseArt_InformationVisualization/processed_data"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+OUTPUT_DIR = os.path.join(REPO_ROOT, "processed_data")
 OUTPUT_FILE = "cultural_damage_L4R2.csv"
 OUTPUT_PATH = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
 
@@ -26,70 +38,342 @@ def download_file(url, local_path):
             return False
     return True
 
-def extract_linked4resilience_data(path):
-    """Analizza il file TriG ed estrae i metadati tramite SPARQL."""
+
+# Variabile SPARQL -> colonna di output
+RESULT_COLUMNS = {
+    "site": "URI",
+    "name": "Site_Name",
+    "address": "Address",
+    "observationYear": "Observation_Year",
+    "comment": "Comment",
+    "wikiUA": "Wiki_UA_Link",
+    "newsLink": "News_Link",
+}
+
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+# Coppia "x y" (un'eventuale Z/M viene ignorata)
+COORD_PAIR = rf"({NUMBER})\s+({NUMBER})(?:\s+{NUMBER})*"
+WKT_POINT = rf"^\s*(?:<[^>]*>\s*)?POINT\s*[ZM]*\s*\(\s*(?P<x>{NUMBER})\s+(?P<y>{NUMBER})"
+
+
+def extract_points(wkt):
+    """(lon, lat) float dei POINT, NaN altrove; con pyarrow la regex gira in RE2 (~5x)"""
+    if pc is not None:
+        found = pc.extract_regex(pa.array(wkt.to_numpy(dtype=object), type=pa.string(), from_pandas=True),
+                                 "(?i)" + WKT_POINT)
+        return tuple(pc.cast(pc.struct_field(found, name), pa.float64()).to_numpy(zero_copy_only=False)
+                     for name in ("x", "y"))
+    found = wkt.str.extract(WKT_POINT, flags=re.IGNORECASE)
+    return found["x"].astype(float).to_numpy(), found["y"].astype(float).to_numpy()
+
+
+def wkt_centroids(wkt):
+    """
+    Serie di WKT -> DataFrame(lon, lat) in un unico passaggio vettoriale.
+      POINT       il punto
+      MULTIPOINT  media dei punti
+      POLYGON     baricentro (area) dell'anello esterno; media dei vertici se degenere
+    Un eventuale prefisso CRS (<http://...> POINT(...)) è ammesso; altri tipi -> NaN.
+    """
+    wkt = pd.Series(wkt, dtype=object)
+    wkt = wkt.where(wkt.notna(), None).astype(object)
+
+    # POINT (il caso comune): una sola estrazione per tutta la colonna
+    lon, lat = extract_points(wkt)
+    out = pd.DataFrame({"lon": lon, "lat": lat}, index=wkt.index)
+
+    rest = wkt[np.isnan(lon) & wkt.notna().to_numpy()].astype("string")
+    kind = rest.str.extract(r"^\s*(?:<[^>]*>\s*)?([A-Za-z]+)", expand=False).str.upper()
+
+    # MULTIPOINT: media di tutte le coppie
+    pairs = rest[kind == "MULTIPOINT"].str.extractall(COORD_PAIR).astype(float)
+    if len(pairs):
+        means = pairs.groupby(level=0).mean()
+        out.loc[means.index, "lon"] = means[0]
+        out.loc[means.index, "lat"] = means[1]
+
+    # POLYGON: formula del laccio sull'anello esterno (chiuso o no)
+    rings = rest[kind == "POLYGON"].str.extract(r"\(\s*\(([^()]*)\)", expand=False).dropna()
+    pairs = rings.str.extractall(COORD_PAIR).astype(float)
+    if len(pairs):
+        ring = pairs.groupby(level=0)
+        x, y = pairs[0], pairs[1]
+        x1 = ring[0].shift(-1).fillna(ring[0].transform("first"))
+        y1 = ring[1].shift(-1).fillna(ring[1].transform("first"))
+        cross = x * y1 - x1 * y
+        # media dei vertici senza il vertice di chiusura (ultimo == primo)
+        last = ring.cumcount(ascending=False).to_numpy() == 0
+        closing = last & (x == ring[0].transform("first")) & (y == ring[1].transform("first"))
+        closing &= ring[0].transform("size") > 1
+        sums = pd.DataFrame({"a": cross, "cx": (x + x1) * cross, "cy": (y + y1) * cross,
+                             "x": x.mask(closing), "y": y.mask(closing)}).groupby(level=0).agg(
+            a=("a", "sum"), cx=("cx", "sum"), cy=("cy", "sum"), x=("x", "mean"), y=("y", "mean"))
+        area3 = 3 * sums["a"]
+        flat = area3.abs() < 1e-15
+        out.loc[sums.index, "lon"] = np.where(flat, sums["x"], sums["cx"] / area3.where(~flat, 1))
+        out.loc[sums.index, "lat"] = np.where(flat, sums["y"], sums["cy"] / area3.where(~flat, 1))
+    return out
+
+
+L4R_QUERY = """
+PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+PREFIX schema: <https://schema.org/>
+PREFIX vocab: <https://linked4resilience.eu/vocab/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?site ?name ?address ?observationYear ?comment ?wikiUA ?newsLink ?wkt
+WHERE {
+  GRAPH ?g {
+    ?site geo:hasGeometry ?geom .
+    ?geom geo:asWKT ?wkt .
+    OPTIONAL { ?site schema:name ?name . }
+    OPTIONAL { ?site schema:address ?address . }
+    OPTIONAL { ?site schema:observationTime ?observationYear . }
+    OPTIONAL { ?site rdfs:comment ?comment . }
+    OPTIONAL { ?site vocab:wikipediaUkrainian ?wikiUA . }
+    OPTIONAL { ?site vocab:wasMentionedIn ?newsLink . }
+  }
+}
+"""
+
+
+def extract_linked4resilience_data(path, use_store=True):
+    """
+    Analizza il file TriG ed estrae i metadati tramite SPARQL.
+    Con use_store la query gira sullo store indicizzato (l4r_store), che
+    riparsa il file solo quando il suo hash cambia.
+    """
     if not os.path.exists(path):
         print(f"Error: File {path} not found.")
         return pd.DataFrame()
 
-    print("Parsing TriG file (this may take a moment)...")
-    g = Dataset()
-    g.parse(path, format="trig")
-    print(f"✓ Parsed {len(g)} triples.")
-
-    query = """
-    PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-    PREFIX schema: <https://schema.org/>
-    PREFIX vocab: <https://linked4resilience.eu/vocab/>
-    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-    SELECT ?site ?name ?address ?observationYear ?comment ?wikiUA ?newsLink ?wkt
-    WHERE {
-      GRAPH ?g {
-        ?site geo:hasGeometry ?geom .
-        ?geom geo:asWKT ?wkt .
-        OPTIONAL { ?site schema:name ?name . }
-        OPTIONAL { ?site schema:address ?address . }
-        OPTIONAL { ?site schema:observationTime ?observationYear . }
-        OPTIONAL { ?site rdfs:comment ?comment . }
-        OPTIONAL { ?site vocab:wikipediaUkrainian ?wikiUA . }
-        OPTIONAL { ?site vocab:wasMentionedIn ?newsLink . }
-      }
-    }
+    if use_store:
+        from l4r_store import open_dataset
+        g = open_dataset(path)
+    else:
+        from rdflib import Dataset
+
+        print("Parsing TriG file (this may take a moment)...")
+        g = Dataset()
+        g.parse(path, format="trig")
+        print(f"✓ Parsed {len(g)} triples.")
+
+    # Colonne grezze: un elenco per variabile SPARQL, poi WKT -> float in blocco
+    results = g.query(L4R_QUERY)
+    rows = list(results)
+    raw = dict(zip([str(v) for v in results.vars], zip(*rows))) if rows else {}
+    column = lambda var: [str(t) if t else None for t in raw.get(var, [])]
+
+    df = pd.DataFrame({col: column(var) for var, col in RESULT_COLUMNS.items()},
+                      columns=list(RESULT_COLUMNS.values()))
+    coords = wkt_centroids(pd.Series(column("wkt"), dtype=object))
+    df["Latitude"] = coords["lat"].to_numpy()
+    df["Longitude"] = coords["lon"].to_numpy()
+    return df
+
+
+# ============================================================================
+# ESTRAZIONE IN STREAMING (N-Quads / TriG riga per tripla)
+# ============================================================================
+
+GEO_HAS_GEOMETRY = "http://www.opengis.net/ont/geosparql#hasGeometry"
+GEO_AS_WKT = "http://www.opengis.net/ont/geosparql#asWKT"
+
+# Predicato -> colonna, nell'ordine delle OPTIONAL della query SPARQL
+OPTIONAL_FIELDS = {
+    "https://schema.org/name": "Site_Name",
+    "https://schema.org/address": "Address",
+    "https://schema.org/observationTime": "Observation_Year",
+    "http://www.w3.org/2000/01/rdf-schema#comment": "Comment",
+    "https://linked4resilience.eu/vocab/wikipediaUkrainian": "Wiki_UA_Link",
+    "https://linked4resilience.eu/vocab/wasMentionedIn": "News_Link",
+}
+
+# IRI | blank node | literal (con @lingua o ^^datatype)
+TERM = re.compile(r'<([^>]*)>|(_:[^\s.]+)|"((?:[^"\\]|\\.)*)"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?')
+ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+ESCAPE_CHARS = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f"}
+
+
+def unescape_literal(text):
+    if "\\" not in text:
+        return text
+    return ESCAPE.sub(lambda m: chr(int(m.group(1) or m.group(2), 16)) if (m.group(1) or m.group(2))
+                      else ESCAPE_CHARS.get(m.group(3), m.group(3)), text)
+
+
+def parse_terms(line, line_no):
+    """Termini di una riga N-Triples/N-Quads come stringhe (IRI o valore lessicale)"""
+    terms, pos, end = [], 0, len(line)
+    while True:
+        while pos < end and line[pos] in " \t":
+            pos += 1
+        if pos >= end or line[pos] == ".":
+            break
+        m = TERM.match(line, pos)
+        if not m:
+            raise ValueError(f"Line {line_no}: unsupported syntax (expected N-Quads terms): {line[:120]}")
+        if m.group(1) is not None:
+            terms.append(m.group(1))
+        elif m.group(2) is not None:
+            terms.append(m.group(2))
+        else:
+            terms.append(unescape_literal(m.group(3)))
+        pos = m.end()
+    return terms
+
+
+def iter_quads(path):
+    """
+    Legge un file N-Quads, o un TriG in forma canonica (blocchi `<grafo> { ... }`
+    con una tripla N-Triples per riga, come l'export di linked4resilience),
+    e restituisce (soggetto, predicato, oggetto, grafo) una riga alla volta.
+    """
+    graph = None
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line == "}":
+                graph = None
+                continue
+            if line.endswith("{"):
+                graph = parse_terms(line[:-1], line_no)[0]
+                continue
+            terms = parse_terms(line, line_no)
+            if len(terms) == 3:
+                yield terms[0], terms[1], terms[2], graph
+            elif len(terms) == 4:
+                yield tuple(terms)
+            else:
+                raise ValueError(f"Line {line_no}: expected 3 or 4 terms, got {len(terms)}")
+
+
+def group_by_subject(quads):
+    """Raggruppa triple consecutive con lo stesso soggetto: (soggetto, {predicato: [oggetti]})"""
+    current, predicates = None, None
+    for s, p, o, g in quads:
+        if g is None:           # la query usa GRAPH ?g: il grafo di default non conta
+            continue
+        if s != current:
+            if current is not None:
+                yield current, predicates
+            current, predicates = s, defaultdict(list)
+        predicates[p].append(o)
+    if current is not None:
+        yield current, predicates
+
+
+def site_rows(uri, predicates, wkts):
+    """Righe di un sito come la SPARQL: prodotto cartesiano dei valori (None se OPTIONAL vuota)"""
+    values = [wkts] + [[v or None for v in predicates.get(p, [])] or [None] for p in OPTIONAL_FIELDS]
+    for wkt, *fields in product(*values):
+        yield (uri, *fields, wkt)
+
+
+def iter_linked4resilience_records(path):
+    """
+    Stesse righe di extract_linked4resilience_data (con la WKT grezza al posto di
+    Latitude/Longitude), in un solo passaggio sul file.
+    Le triple di uno stesso soggetto devono essere contigue (export ordinati per
+    soggetto). La memoria non è costante: oltre al soggetto corrente restano le WKT
+    di tutte le geometrie lette (un sito successivo può ancora riferirsi a una
+    geometria già usata) e i siti che aspettano una geometria non ancora letta.
+    Cresce quindi con il numero di geometrie, non con quello delle triple.
     """
+    wkt_of = {}                    # geometria -> [WKT]
+    waiting = defaultdict(list)    # geometria -> siti che la aspettano
+    pending = {}                   # sito -> (predicati, geometrie mancanti)
+
+    def ready(uri):
+        predicates, missing = pending.pop(uri)
+        wkts = [w for geom in predicates[GEO_HAS_GEOMETRY] for w in wkt_of.get(geom, [])]
+        return site_rows(uri, predicates, wkts)
+
+    for subject, predicates in group_by_subject(iter_quads(path)):
+        if GEO_AS_WKT in predicates:
+            wkt_of[subject] = predicates[GEO_AS_WKT]
+            for uri in waiting.pop(subject, []):
+                pending[uri][1].discard(subject)
+                if not pending[uri][1]:
+                    yield from ready(uri)
+        if GEO_HAS_GEOMETRY in predicates:
+            missing = {geom for geom in predicates[GEO_HAS_GEOMETRY] if geom not in wkt_of}
+            pending[subject] = (predicates, missing)
+            if missing:
+                for geom in missing:
+                    waiting[geom].append(subject)
+            else:
+                yield from ready(subject)
+
+    # Geometrie mai trovate: come nella SPARQL contano solo quelle con WKT
+    for uri in list(pending):
+        yield from ready(uri)
+
+
+def extract_linked4resilience_stream(path):
+    """Versione in streaming di extract_linked4resilience_data (senza rdflib)"""
+    if not os.path.exists(path):
+        print(f"Error: File {path} not found.")
+        return pd.DataFrame()
+    df = pd.DataFrame.from_records(iter_linked4resilience_records(path),
+                                   columns=list(RESULT_COLUMNS.values()) + ["WKT"])
+    coords = wkt_centroids(df.pop("WKT"))
+    df["Latitude"] = coords["lat"]
+    df["Longitude"] = coords["lon"]
+    return df
+
+
+def benchmark(path, copies=1):
+    """rdflib vs streaming sullo stesso file (replicato `copies` volte con URI distinti)"""
+    if copies > 1:
+        bench_path = f"{path}.x{copies}.trig"
+        with open(path, encoding="utf-8") as f:
+            body = [line for line in f if line.strip() not in {"}"} and not line.rstrip().endswith("{")]
+        with open(bench_path, "w", encoding="utf-8") as f:
+            f.write("<https://linked4resilience.eu/graphs/cultural-site-damage-events> {\n")
+            for i in range(copies):
+                f.writelines(re.sub(r"<(https://(?:linked4resilience\.eu/data|triplydb\.com)[^>]*)>",
+                                    rf"<\1/{i}>", line) for line in body)
+            f.write("}\n")
+        path = bench_path
+
+    results = {}
+    for label, extract in [("rdflib", lambda p: extract_linked4resilience_data(p, use_store=False)),
+                           ("streaming", extract_linked4resilience_stream)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        df = extract(path)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        results[label] = df
+        print(f"{label:>10}: {len(df):,} rows in {elapsed:.2f} s, peak {peak:,.1f} MiB")
+
+    key = lambda df: sorted(map(tuple, df.astype(object).where(df.notna(), None).values.tolist()), key=str)
+    print("✓ Same records" if key(results["rdflib"]) == key(results["streaming"]) else "✗ Records differ")
 
-    results = g.query(query)
-    extracted_records = []
-
-    for row in results:
-        # Regex per estrarre Lat/Lon dal formato WKT: "POINT(lon lat)"
-        wkt_text = str(row["wkt"])
-        lon, lat = None, None
-        coord_match = re.search(r"POINT\s*\(\s*([-0-9\.]+)\s+([-0-9\.]+)\s*\)", wkt_text, flags=re.IGNORECASE)
-        if coord_match:
-            lon, lat = float(coord_match.group(1)), float(coord_match.group(2))
-
-        extracted_records.append({
-            "URI": str(row["site"]),
-            "Site_Name": str(row["name"]) if row["name"] else None,
-            "Address": str(row["address"]) if row["address"] else None,
-            "Observation_Year": str(row["observationYear"]) if row["observationYear"] else None,
-            "Comment": str(row["comment"]) if row["comment"] else None,
-            "Wiki_UA_Link": str(row["wikiUA"]) if row["wikiUA"] else None,
-            "News_Link": str(row["newsLink"]) if row["newsLink"] else None,
-            "Latitude": lat,
-            "Longitude": lon
-        })
-
-    return pd.DataFrame(extracted_records)
 
 def main():
+    if "--benchmark" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--benchmark"]
+        benchmark(LOCAL_TRIG_PATH, int(args[0]) if args else 1)
+        return
+
     if download_file(PATH_L4R_TRIG_URL, LOCAL_TRIG_PATH):
 
-        df = extract_linked4resilience_data(LOCAL_TRIG_PATH)
+        if "--rdflib" in sys.argv:
+            df = extract_linked4resilience_data(LOCAL_TRIG_PATH, use_store=False)
+        elif "--store" in sys.argv:
+            df = extract_linked4resilience_data(LOCAL_TRIG_PATH, use_store=True)
+        else:
+            df = extract_linked4resilience_stream(LOCAL_TRIG_PATH)
 
         if not df.empty:
             os.makedirs(OUTPUT_DIR, exist_ok=True)
+            # ordine stabile per URI, uguale con rdflib e in streaming
+            df = df.sort_values("URI", kind="stable", ignore_index=True)
 
             df.to_csv(OUTPUT_PATH, index=False, encoding='utf-8')
             print(f"Success! Saved {len(df)} records to: {OUTPUT_PATH}")
@@ -0,0 +1,225 @@
+"""
+L4R STORE - persistent, indexed triple store for the linked4resilience graph
+
+The TriG file is parsed ONCE into a SQLite file keyed by its SHA-256:
+    terms(id, n3)          every IRI / literal / blank node, in N3 form
+    quads(g, s, p, o)      term ids, indexed as SPO, POS and OSP (+ graph)
+and served to rdflib through a read-only Store plugin, so any SPARQL query
+(GRAPH ?g, OPTIONAL, FILTER...) runs on the indexes without re-parsing.
+When the source file changes its hash changes: the store is rebuilt and the
+stale one removed.
+
+Usage:
+    from l4r_store import open_dataset
+    ds = open_dataset("cultural-site-damage-events.trig")
+    for row in ds.query(QUERY): ...
+
+    python scripts/data_analysis/l4r_store.py FILE.trig [QUERY.rq]
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+
+from rdflib import Dataset, Graph
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.store import Store
+from rdflib.util import from_n3
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORE_DIR = os.path.join(REPO_ROOT, "processed_data", "l4r_store")
+STORE_VERSION = 1        # da incrementare se cambia lo schema
+INSERT_BATCH = 100_000
+
+SCHEMA = """
+CREATE TABLE terms (id INTEGER PRIMARY KEY, n3 TEXT NOT NULL UNIQUE);
+CREATE TABLE quads (g INTEGER NOT NULL, s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL);
+"""
+INDEXES = """
+CREATE UNIQUE INDEX spo ON quads (s, p, o, g);
+CREATE INDEX pos ON quads (p, o, s, g);
+CREATE INDEX osp ON quads (o, s, p, g);
+"""
+
+
+# ============================================================================
+# INGEST
+# ============================================================================
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_path(source, store_dir=STORE_DIR, sha=None):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    sha = sha or file_sha256(source)
+    return os.path.join(store_dir, f"{stem}.v{STORE_VERSION}.{sha[:16]}.sqlite")
+
+
+def ingest(source, db_path, format="trig"):
+    """Parsa `source` con rdflib e scrive termini e quad nel file SQLite `db_path`"""
+    print(f"Ingesting {source} into {db_path} (one-off)...")
+    start = time.perf_counter()
+    parsed = Dataset()
+    parsed.parse(source, format=format)
+
+    tmp = db_path + ".part"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    con.executescript(SCHEMA)
+    ids = {}
+
+    def term_id(term):
+        key = term.n3()
+        if key not in ids:
+            ids[key] = len(ids) + 1
+        return ids[key]
+
+    batch = []
+    for s, p, o, g in parsed.quads((None, None, None, None)):
+        g = g.identifier if isinstance(g, Graph) else (g or DATASET_DEFAULT_GRAPH_ID)
+        batch.append((term_id(g), term_id(s), term_id(p), term_id(o)))
+        if len(batch) >= INSERT_BATCH:
+            con.executemany("INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)", batch)
+            batch = []
+    con.executemany("INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)", batch)
+    con.executemany("INSERT INTO terms VALUES (?, ?)", ((i, n3) for n3, i in ids.items()))
+    con.executescript(INDEXES)
+    con.commit()
+    con.close()
+    os.replace(tmp, db_path)
+    print(f"✓ {len(parsed):,} quads, {len(ids):,} terms in {time.perf_counter() - start:.1f} s")
+
+
+def open_dataset(source, store_dir=STORE_DIR, format="trig"):
+    """Dataset rdflib sullo store di `source`, (ri)costruito solo se il file è cambiato"""
+    sha = file_sha256(source)
+    db_path = store_path(source, store_dir, sha)
+    if not os.path.exists(db_path):
+        os.makedirs(store_dir, exist_ok=True)
+        ingest(source, db_path, format)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        for stale in glob.glob(os.path.join(store_dir, f"{stem}.v*.sqlite")):
+            if stale != db_path:
+                os.remove(stale)
+    return Dataset(store=SQLiteQuadStore(db_path))
+
+
+# ============================================================================
+# STORE RDFLIB (sola lettura)
+# ============================================================================
+
+class SQLiteQuadStore(Store):
+    context_aware = True
+    graph_aware = True
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration, identifier)
+        self.graphs = {}
+        if configuration:
+            self.open(configuration)
+
+    def open(self, configuration, create=False):
+        self.con = sqlite3.connect(f"file:{configuration}?mode=ro", uri=True, check_same_thread=False)
+        self.decode = lru_cache(maxsize=200_000)(self._decode)
+        self.encode = lru_cache(maxsize=200_000)(self._encode)
+        return 1
+
+    def close(self, commit_pending_transaction=False):
+        self.con.close()
+
+    def _decode(self, term_id):
+        return from_n3(self.con.execute("SELECT n3 FROM terms WHERE id = ?", (term_id,)).fetchone()[0])
+
+    def _encode(self, n3):
+        row = self.con.execute("SELECT id FROM terms WHERE n3 = ?", (n3,)).fetchone()
+        return row[0] if row else None
+
+    def graph_of(self, g_id):
+        if g_id not in self.graphs:
+            self.graphs[g_id] = Graph(store=self, identifier=self.decode(g_id))
+        return self.graphs[g_id]
+
+    def _where(self, triple, context):
+        """Clausola WHERE sui termini fissati; None se un termine non esiste nello store"""
+        clauses, params = [], []
+        graph = getattr(context, "identifier", context)
+        columns = zip("spo", triple)
+        if graph is not None:
+            columns = list(columns) + [("g", graph)]
+        for column, term in columns:
+            if term is None:
+                continue
+            term_id = self.encode(term.n3())
+            if term_id is None:
+                return None
+            clauses.append(f"{column} = ?")
+            params.append(term_id)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def triples(self, triple_pattern, context=None):
+        where = self._where(triple_pattern, context)
+        if where is None:
+            return
+        clause, params = where
+        if context is None:
+            rows = self.con.execute(f"SELECT DISTINCT s, p, o FROM quads{clause}", params).fetchall()
+            for s, p, o in rows:
+                yield (self.decode(s), self.decode(p), self.decode(o)), self._contexts_of(s, p, o)
+        else:
+            rows = self.con.execute(f"SELECT s, p, o FROM quads{clause}", params).fetchall()
+            for s, p, o in rows:
+                yield (self.decode(s), self.decode(p), self.decode(o)), iter([context])
+
+    def _contexts_of(self, s, p, o):
+        rows = self.con.execute("SELECT g FROM quads WHERE s = ? AND p = ? AND o = ?", (s, p, o))
+        return (self.graph_of(g) for (g,) in rows.fetchall())
+
+    def __len__(self, context=None):
+        where = self._where((None, None, None), context)
+        if where is None:
+            return 0
+        return self.con.execute(f"SELECT COUNT(*) FROM quads{where[0]}", where[1]).fetchone()[0]
+
+    def contexts(self, triple=None):
+        if triple is None:
+            rows = self.con.execute("SELECT DISTINCT g FROM quads").fetchall()
+            return (self.graph_of(g) for (g,) in rows)
+        where = self._where(triple, None)
+        if where is None:
+            return iter([])
+        rows = self.con.execute(f"SELECT DISTINCT g FROM quads{where[0]}", where[1]).fetchall()
+        return (self.graph_of(g) for (g,) in rows)
+
+    def add_graph(self, graph):
+        pass                    # i grafi vuoti non vengono persistiti
+
+    def add(self, triple, context, quoted=False):
+        raise TypeError("SQLiteQuadStore is read-only: edit the source file and reopen")
+
+    def remove(self, triple, context=None):
+        raise TypeError("SQLiteQuadStore is read-only: edit the source file and reopen")
+
+
+if __name__ == "__main__":
+    source = sys.argv[1]
+    ds = open_dataset(source)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], encoding="utf-8") as f:
+            query = f.read()
+        start = time.perf_counter()
+        rows = list(ds.query(query))
+        print(f"✓ {len(rows):,} rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+        for row in rows[:10]:
+            print(row)
+    else:
+        print(f"✓ {len(ds.store):,} quads in {store_path(source)}")
@@ -0,0 +1,195 @@
+"""
+DATA CUBE - pre-aggregated counts behind the summary charts
+
+Materializes one compact table of object counts over
+    (dataset, category, period, oblast, location, type, year)
+so bar charts, treemaps, timelines and cross-tabs slice it instead of
+re-running value_counts() over the raw rows every time.
+
+Usage (from the repo root):
+    python scripts/data_cube.py            # (re)build processed_data/summary_cube.parquet
+
+In a chart script:
+    cube = load_cube()
+    slice_counts(cube, 'hermitage', 'category').head(12)
+    slice_counts(cube, 'stolen', ['period', 'category'])
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+CUBE_PATH = 'processed_data/summary_cube.parquet'
+
+SOURCES = {
+    'hermitage': 'data_hermitage/5_FINAL_hermitage_ukraine.csv',
+    'stolen': 'data_stolen/5_stolen_objects_final.csv',
+}
+
+CUBE_DIMS = ['dataset', 'category', 'period', 'oblast', 'location', 'type', 'year']
+
+# ============================================================================
+# ROW-LEVEL HELPERS
+# ============================================================================
+
+def extract_year(value):
+    """First 4-digit year of a value (int, float, '1937', '2022-01-01', ...)"""
+    if pd.isna(value):
+        return np.nan
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r'(\d{4})', str(value))
+    if match:
+        return int(match.group(1))
+    return np.nan
+
+
+def assign_oblast(lat, lon):
+    """
+    Vectorized rough oblast bins from coordinates (same boxes as the
+    Hermitage regional chart). Works on Series/arrays.
+    """
+    lat = pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(pd.Series(lon), errors='coerce').to_numpy(dtype=float)
+
+    missing = np.isnan(lat) | np.isnan(lon)
+    outside = ~((22 <= lon) & (lon <= 41)) | ~((44 <= lat) & (lat <= 53))
+    south = (46 <= lat) & (lat < 47.5)
+    east = (lat >= 47.5) & (36 <= lon) & (lon <= 41)
+
+    conditions = [
+        missing,
+        outside,
+        (lat < 46) & (33 <= lon) & (lon <= 37),
+        south & (28 <= lon) & (lon < 31),
+        south & (31 <= lon) & (lon < 33),
+        south & (33 <= lon) & (lon < 36),
+        east & (lat >= 49.5),
+        east & (lat >= 48),
+        east,
+        (46.5 <= lat) & (lat < 48.5) & (33 <= lon) & (lon < 36),
+    ]
+    choices = ['Unknown', 'Outside Ukraine', 'Crimea', 'Odesa', 'Mykolaiv', 'Kherson',
+               'Kharkiv', 'Luhansk', 'Donetsk', 'Zaporizhzhia']
+    return np.select(conditions, choices, default='Other Region')
+
+# ============================================================================
+# CUBE CONSTRUCTION
+# ============================================================================
+
+def to_cube_rows(df, dataset, **columns):
+    """
+    Project a raw frame onto the cube dimensions.
+    `columns` maps a cube dimension to a source column, e.g. category='site_type'.
+    Dimensions without a source column are left empty.
+    """
+    rows = pd.DataFrame(index=df.index)
+    rows['dataset'] = dataset
+    for dim in CUBE_DIMS[1:]:
+        src = columns.get(dim)
+        rows[dim] = df[src] if src is not None and src in df.columns else np.nan
+    return rows
+
+
+def build_cube(frames):
+    """Count rows per combination of dimensions (missing values are kept as keys)"""
+    rows = pd.concat(frames, ignore_index=True)
+    rows['year'] = rows['year'].apply(extract_year).astype('Int64')
+    for dim in CUBE_DIMS[1:-1]:
+        rows[dim] = rows[dim].astype('string')
+    cube = rows.groupby(CUBE_DIMS, dropna=False).size().reset_index(name='count')
+    for dim in CUBE_DIMS[:-1]:
+        cube[dim] = cube[dim].astype('category')
+    return cube
+
+
+def hermitage_rows(df):
+    df = df.assign(oblast=assign_oblast(df['latitude'], df['longitude']))
+    return to_cube_rows(df, 'hermitage', category='category', period='period_category',
+                        oblast='oblast', location='find_location', year='acquisition_year')
+
+
+def stolen_rows(df):
+    df = df.assign(oblast=assign_oblast(df['latitude'], df['longitude']))
+    return to_cube_rows(df, 'stolen', category='category', period='period_category',
+                        oblast='oblast', location='place_incident', type='type',
+                        year='year_incident')
+
+
+ROW_BUILDERS = {
+    'hermitage': hermitage_rows,
+    'stolen': stolen_rows,
+}
+
+
+def build_cube_from_sources(sources=SOURCES):
+    frames = []
+    for dataset, path in sources.items():
+        if not os.path.exists(path):
+            print(f"  ⚠ {dataset}: {path} not found, skipped")
+            continue
+        df = pd.read_csv(path)
+        frames.append(ROW_BUILDERS[dataset](df))
+        print(f"  ✓ {dataset}: {len(df):,} rows")
+    return build_cube(frames)
+
+
+def load_cube(path=CUBE_PATH, sources=SOURCES, rebuild=False):
+    """Read the Parquet cube, rebuilding it when missing or older than its sources"""
+    source_mtimes = [os.path.getmtime(p) for p in sources.values() if os.path.exists(p)]
+    stale = (not os.path.exists(path)
+             or (source_mtimes and max(source_mtimes) > os.path.getmtime(path)))
+    if rebuild or stale:
+        print("Building data cube...")
+        cube = build_cube_from_sources(sources)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        cube.to_parquet(path, index=False)
+        print(f"✓ Saved {len(cube):,} cells to {path}")
+        return cube
+    return pd.read_parquet(path)
+
+# ============================================================================
+# SLICING
+# ============================================================================
+
+def slice_counts(cube, dataset, by, where=None, exclude=None):
+    """
+    Equivalent of df[filters].value_counts(by) on the raw rows.
+
+    where   : {dim: value or list of values} to keep
+    exclude : {dim: value or list of values} to drop
+    Rows with a missing value in any `by` dimension are dropped, like value_counts().
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    sub = cube[cube['dataset'] == dataset]
+    for dim, values in (where or {}).items():
+        values = values if isinstance(values, (list, tuple, set, pd.Index)) else [values]
+        sub = sub[sub[dim].isin(values)]
+    for dim, values in (exclude or {}).items():
+        values = values if isinstance(values, (list, tuple, set, pd.Index)) else [values]
+        sub = sub[~sub[dim].isin(values)]
+    sub = sub.dropna(subset=by)
+    counts = sub.groupby(by, observed=True)['count'].sum()
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    if len(by) == 1:
+        counts.index = counts.index.astype(object)
+    counts.name = 'count'
+    return counts
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("BUILDING SUMMARY DATA CUBE")
+    print("="*70)
+    cube = load_cube(rebuild=True)
+    print(f"\n📦 {os.path.getsize(CUBE_PATH)/1024:,.1f} KB")
+    print(cube.groupby('dataset', observed=True)['count'].agg(['size', 'sum'])
+          .rename(columns={'size': 'cells', 'sum': 'objects'}))
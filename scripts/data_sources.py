@@ -0,0 +1,144 @@
+"""
+DATA SOURCES - resolve the project's GitHub dataset URLs to local files
+
+Scripts keep their URL_* constants; read_csv(URL) / resolve(URL) pick, in order:
+  1. the copy already in this repository (raw.githubusercontent / media.githubusercontent
+     URLs of this repo map to <repo root>/<path>), unless it is a git-lfs pointer
+  2. an on-disk cache (CACHE_DIR), revalidated with If-None-Match/ETag
+     (a 304 costs one round trip, no download)
+  3. a fresh download into the cache
+
+Offline mode (DISPERSEART_OFFLINE=1 or set_offline()) never touches the network:
+local copy or cached file, otherwise FileNotFoundError. If the network fails
+while online, a cached copy is used with a warning.
+
+Usage:
+    from data_sources import read_csv
+    unesco = read_csv(URL_UNESCO)
+    acled  = read_csv(URL_ACLED, sep=";")
+
+    python scripts/data_sources.py URL [URL ...]     # prime the cache / show where URLs resolve
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+CACHE_DIR = os.environ.get('DISPERSEART_CACHE',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'disperseart'))
+OFFLINE = os.environ.get('DISPERSEART_OFFLINE', '').lower() in {'1', 'true', 'yes'}
+TIMEOUT = 60
+
+# .../csalguero10/DisperseArt_InformationVisualization/<ref>/<path>, ref = main | refs/heads/main | <sha>
+REPO_URL = re.compile(
+    r"^https://(?:raw|media)\.githubusercontent\.com/(?:media/)?"
+    r"csalguero10/DisperseArt_InformationVisualization/"
+    r"(?:refs/heads/[^/]+|[^/]+)/(?P<path>.+)$"
+)
+LFS_POINTER = b"version https://git-lfs.github.com/spec/"
+
+
+def set_offline(offline=True):
+    global OFFLINE
+    OFFLINE = offline
+
+# ============================================================================
+# RESOLUTION
+# ============================================================================
+
+def local_copy(url):
+    """Path of this repo's own copy of `url`, or None (missing / git-lfs pointer)"""
+    match = REPO_URL.match(url)
+    if not match:
+        return None
+    path = os.path.join(REPO_ROOT, *urllib.parse.unquote(match.group('path')).split('/'))
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(LFS_POINTER)) == LFS_POINTER:
+            return None
+    return path
+
+
+def cache_paths(url):
+    """(data file, metadata json) for `url` inside CACHE_DIR"""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', url.rsplit('/', 1)[-1])[-80:] or 'data'
+    base = os.path.join(CACHE_DIR, f"{key}_{name}")
+    return base, base + '.json'
+
+
+def fetch(url, data_path, meta_path):
+    """Conditional GET into the cache; returns data_path"""
+    meta = {}
+    if os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+
+    request = urllib.request.Request(url)
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = data_path + '.part'
+            with open(tmp, 'wb') as f:
+                while chunk := response.read(1 << 20):
+                    f.write(chunk)
+            os.replace(tmp, data_path)
+            meta = {'url': url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')}
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            print(f"✓ Downloaded {url} -> {data_path}")
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            raise
+    return data_path
+
+
+def resolve(url):
+    """Local path for a dataset URL (local copy > validated cache > download)"""
+    path = local_copy(url)
+    if path:
+        return path
+
+    data_path, meta_path = cache_paths(url)
+    if OFFLINE:
+        if os.path.exists(data_path):
+            return data_path
+        raise FileNotFoundError(f"Offline and not cached: {url}")
+
+    try:
+        return fetch(url, data_path, meta_path)
+    except (urllib.error.URLError, OSError) as e:
+        if os.path.exists(data_path):
+            print(f"⚠️ {url}: {e} - using cached copy")
+            return data_path
+        raise
+
+
+def read_csv(url, **kwargs):
+    """pd.read_csv on the resolved local path of `url`"""
+    return pd.read_csv(resolve(url), **kwargs)
+
+
+if __name__ == "__main__":
+    for url in sys.argv[1:]:
+        print(f"{url}\n  -> {resolve(url)}")
@@ -0,0 +1,102 @@
+"""
+DETAIL STORE - detalle por registro, cargado bajo demanda
+Guarda las columnas pesadas (notas, actores, fuentes, URLs...) en JSON
+fragmentados por clave, fuera del HTML. El mapa/dashboard solo lleva la
+clave de cada registro y descarga el fragmento cuando se abre un popup.
+
+Estructura en disco:
+    <store>/index.json      {"shards": N, "hash": "fnv1a32", "key": ..., "fields": [...]}
+    <store>/<shard>.json    {"<clave>": {campo: valor, ...}, ...}
+
+Uso:
+    write_detail_store(df, 'event_id_cnty', ['notes', 'actor1'], 'mapa_details')
+    # en la página: DETAIL_STORE_JS + detailStore('mapa_details').get(key)
+"""
+
+import json
+import os
+
+DEFAULT_SHARDS = 64
+
+def fnv1a32(text):
+    """Hash FNV-1a de 32 bits sobre UTF-8 (idéntico al de DETAIL_STORE_JS)"""
+    h = 0x811C9DC5
+    for byte in str(text).encode('utf-8'):
+        h ^= byte
+        h = (h * 0x01000193) & 0xFFFFFFFF
+    return h
+
+def shard_of(key, n_shards=DEFAULT_SHARDS):
+    return fnv1a32(key) % n_shards
+
+def write_detail_store(df, key_col, columns, out_dir, n_shards=DEFAULT_SHARDS):
+    """Escribe un JSON por fragmento con {clave: {columna: valor}}; devuelve el índice"""
+    os.makedirs(out_dir, exist_ok=True)
+    # fragmentos de una ejecución anterior (quizá con otro número de fragmentos)
+    for name in os.listdir(out_dir):
+        if name == 'index.json' or (name.endswith('.json') and name[:-5].isdigit()):
+            os.remove(os.path.join(out_dir, name))
+    columns = [c for c in columns if c in df.columns and c != key_col]
+
+    records = df[columns].astype(object).where(df[columns].notna(), None)
+    keys = df[key_col].astype(str)
+    shards = keys.map(lambda k: shard_of(k, n_shards))
+
+    for shard, idx in shards.groupby(shards).groups.items():
+        part = dict(zip(keys.loc[idx], records.loc[idx].to_dict('records')))
+        with open(os.path.join(out_dir, f'{shard}.json'), 'w', encoding='utf-8') as f:
+            json.dump(part, f, ensure_ascii=False, separators=(',', ':'), default=str)
+
+    index = {'shards': n_shards, 'hash': 'fnv1a32', 'key': key_col, 'fields': columns,
+             'records': int(len(df))}
+    with open(os.path.join(out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+    print(f"  ✓ Detalle de {len(df):,} registros en {out_dir}/ "
+          f"({shards.nunique()} fragmentos, {size/1024:.1f} KB)")
+    return index
+
+def read_detail(out_dir, key):
+    """Lectura de un registro desde Python (útil para comprobar el store)"""
+    with open(os.path.join(out_dir, 'index.json'), encoding='utf-8') as f:
+        index = json.load(f)
+    path = os.path.join(out_dir, f"{shard_of(key, index['shards'])}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get(str(key))
+
+# Cliente en el navegador: descarga cada fragmento una sola vez y lo cachea
+DETAIL_STORE_JS = """
+function detailStore(baseUrl) {
+    var index = null, shards = {};
+    function fnv1a32(text) {
+        var bytes = new TextEncoder().encode(String(text)), h = 0x811C9DC5;
+        for (var i = 0; i < bytes.length; i++) {
+            h ^= bytes[i];
+            h = Math.imul(h, 0x01000193) >>> 0;
+        }
+        return h;
+    }
+    function getJSON(url) {
+        return fetch(url).then(function (r) {
+            if (r.status === 404) return {};  // fragmento vacío: no se escribe
+            if (!r.ok) throw new Error(r.status + ' ' + url);
+            return r.json();
+        });
+    }
+    return {
+        get: function (key) {
+            index = index || getJSON(baseUrl + '/index.json');
+            return index.then(function (idx) {
+                var shard = fnv1a32(key) % idx.shards;
+                shards[shard] = shards[shard] || getJSON(baseUrl + '/' + shard + '.json');
+                return shards[shard];
+            }).then(function (records) {
+                return records[String(key)] || null;
+            });
+        }
+    };
+}
+"""
@@ -3,41 +3,70 @@ WIKIDATA SPARQL QUERY: Ukrainian Artists and Their Works
 Query artworks by Ukrainian artists from Wikidata
 """
 
-from SPARQLWrapper import SPARQLWrapper, JSON
+from SPARQLWrapper import SPARQLWrapper, JSON, CSV, POST
 import pandas as pd
+import os
+import sys
 import time
 
+from sparql_cache import cached_query
+from sparql_pages import paged_query, parse_csv_page
+
 # ============================================================================
 # SPARQL ENDPOINT CONFIGURATION
 # ============================================================================
 
-def query_wikidata(sparql_query):
+# WIKIDATA_SPARQL=http://127.0.0.1:8890/sparql points at the local stand-in
+# (python scripts/sparql_cache.py serve); results are cached per Wikidata query either way
+ENDPOINT = os.environ.get("WIKIDATA_SPARQL", "https://query.wikidata.org/sparql")
+WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
+REQUEST_INTERVAL = 2     # seconds between live requests (Wikidata rate limits)
+_last_request = 0.0
+
+
+def query_wikidata(sparql_query, refresh=False):
     """
-    Execute a SPARQL query against Wikidata endpoint
+    Execute a SPARQL query against Wikidata endpoint, through the local result cache
     
     Parameters:
     -----------
     sparql_query : str
         SPARQL query string
+    refresh : bool
+        Ignore a cached result and query the endpoint again
     
     Returns:
     --------
     dict or None
         JSON results from Wikidata or None if error
     """
-    endpoint = "https://query.wikidata.org/sparql"
-    sparql = SPARQLWrapper(endpoint)
+    return cached_query(sparql_query, fetch=fetch_wikidata, endpoint=WIKIDATA_ENDPOINT, refresh=refresh)
+
+
+def wikidata_client(sparql_query, return_format=JSON):
+    """SPARQLWrapper for ENDPOINT, spaced by REQUEST_INTERVAL from the previous request"""
+    wait = _last_request + REQUEST_INTERVAL - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+    sparql = SPARQLWrapper(ENDPOINT)
     
     # Set query and format
     sparql.setQuery(sparql_query)
-    sparql.setReturnFormat(JSON)
+    sparql.setReturnFormat(return_format)
     
     # Add required User-Agent header
     sparql.addCustomHttpHeader("User-Agent", "UkrainianCulturalHeritageResearch/1.0")
     
     # Set timeout (60 seconds)
     sparql.setTimeout(60)
-    
+    return sparql
+
+
+def fetch_wikidata(sparql_query):
+    """Live request to ENDPOINT (no cache)"""
+    global _last_request
+    sparql = wikidata_client(sparql_query)
     try:
         print("  Executing query...", end=' ')
         results = sparql.query().convert()
@@ -47,12 +76,25 @@ def query_wikidata(sparql_query):
         print(f"✗")
         print(f"  Error: {type(e).__name__}: {e}")
         return None
+    finally:
+        _last_request = time.monotonic()
+
+
+def fetch_wikidata_page(sparql_query):
+    """One result page as CSV -> DataFrame; raises on error so the pager can retry/resume"""
+    global _last_request
+    sparql = wikidata_client(sparql_query, CSV)
+    sparql.setMethod(POST)      # chunk queries carry hundreds of VALUES keys
+    try:
+        return parse_csv_page(sparql.query().convert())
+    finally:
+        _last_request = time.monotonic()
 
 # ============================================================================
 # QUERY 1: FAMOUS UKRAINIAN ARTISTS
 # ============================================================================
 
-def get_famous_ukrainian_artists():
+def get_famous_ukrainian_artists(refresh=False):
     """
     Query for famous Ukrainian artists from Wikidata
     
@@ -89,38 +131,40 @@ def get_famous_ukrainian_artists():
     }
     """
     
-    print("\n1️⃣ Querying ALL Ukrainian Artists (no limit)...")
-    results = query_wikidata(query)
+    # Partitioning query: the artists alone, then the query above per chunk of them
+    keys_query = """
+    SELECT DISTINCT ?artist
+    WHERE {
+      ?artist wdt:P27 wd:Q212 .
+      { ?artist wdt:P106 wd:Q1028181 . } UNION { ?artist wdt:P106 wd:Q483501 . }
+    }
+    """
     
-    if results and 'results' in results and 'bindings' in results['results']:
-        bindings = results['results']['bindings']
-        if bindings:
-            # Convert to DataFrame
-            data = []
-            for item in bindings:
-                data.append({
-                    'artist_id': item.get('artist', {}).get('value', '').split('/')[-1],
-                    'name': item.get('artistLabel', {}).get('value', ''),
-                    'birth_date': item.get('birthDate', {}).get('value', ''),
-                    'death_date': item.get('deathDate', {}).get('value', ''),
-                    'description': item.get('description', {}).get('value', '')
-                })
-            
-            df = pd.DataFrame(data)
-            print(f"  ✓ Found {len(df)} Ukrainian artists")
-            return df
-        else:
-            print("  ⚠ Query returned no results")
-            return pd.DataFrame()
-    else:
-        print("  ✗ Error in Wikidata response")
+    print("\n1️⃣ Querying ALL Ukrainian Artists (no limit, paged)...")
+    try:
+        pages = [pd.DataFrame({
+            'artist_id': page['artist'].str.split('/').str[-1],
+            'name': page['artistLabel'],
+            'birth_date': page['birthDate'],
+            'death_date': page['deathDate'],
+            'description': page['description']
+        }) for page in paged_query(query, keys_query, 'artist', fetch_wikidata_page, refresh=refresh)]
+    except RuntimeError as e:
+        print(f"  ✗ Error in Wikidata response: {e}")
+        return pd.DataFrame()
+    
+    df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    if df.empty:
+        print("  ⚠ Query returned no results")
         return pd.DataFrame()
+    print(f"  ✓ Found {len(df)} Ukrainian artists")
+    return df
 
 # ============================================================================
 # QUERY 2: ARTWORKS BY UKRAINIAN ARTISTS
 # ============================================================================
 
-def get_ukrainian_artworks():
+def get_ukrainian_artworks(refresh=False):
     """
     Query for artworks created by Ukrainian artists
     
@@ -156,39 +200,42 @@ def get_ukrainian_artworks():
     }
     """
     
-    print("\n2️⃣ Querying ALL Artworks by Ukrainian Artists (no limit)...")
-    results = query_wikidata(query)
+    # Partitioning query: the artworks alone, then the query above per chunk of them
+    keys_query = """
+    SELECT DISTINCT ?artwork
+    WHERE {
+      ?artwork wdt:P170 ?artist .
+      ?artist wdt:P27 wd:Q212 .
+      { ?artwork wdt:P31 wd:Q3305213 . } UNION { ?artwork wdt:P31 wd:Q838948 . }
+    }
+    """
     
-    if results and 'results' in results and 'bindings' in results['results']:
-        bindings = results['results']['bindings']
-        if bindings:
-            # Convert to DataFrame
-            data = []
-            for item in bindings:
-                data.append({
-                    'artwork_id': item.get('artwork', {}).get('value', '').split('/')[-1],
-                    'artwork_name': item.get('artworkLabel', {}).get('value', ''),
-                    'artist': item.get('artistLabel', {}).get('value', ''),
-                    'year': item.get('inception', {}).get('value', ''),
-                    'collection': item.get('collectionLabel', {}).get('value', ''),
-                    'image_url': item.get('image', {}).get('value', '')
-                })
-            
-            df = pd.DataFrame(data)
-            print(f"  ✓ Found {len(df)} artworks")
-            return df
-        else:
-            print("  ⚠ Query returned no results")
-            return pd.DataFrame()
-    else:
-        print("  ✗ Error in Wikidata response")
+    print("\n2️⃣ Querying ALL Artworks by Ukrainian Artists (no limit, paged)...")
+    try:
+        pages = [pd.DataFrame({
+            'artwork_id': page['artwork'].str.split('/').str[-1],
+            'artwork_name': page['artworkLabel'],
+            'artist': page['artistLabel'],
+            'year': page['inception'],
+            'collection': page['collectionLabel'],
+            'image_url': page['image']
+        }) for page in paged_query(query, keys_query, 'artwork', fetch_wikidata_page, refresh=refresh)]
+    except RuntimeError as e:
+        print(f"  ✗ Error in Wikidata response: {e}")
+        return pd.DataFrame()
+    
+    df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    if df.empty:
+        print("  ⚠ Query returned no results")
         return pd.DataFrame()
+    print(f"  ✓ Found {len(df)} artworks")
+    return df
 
 # ============================================================================
 # QUERY 3: SPECIFIC FAMOUS ARTISTS' WORKS
 # ============================================================================
 
-def get_works_by_famous_artists():
+def get_works_by_famous_artists(refresh=False):
     """
     Query works by specific famous Ukrainian artists:
     - Maria Prymachenko (Q234496)
@@ -223,7 +270,7 @@ def get_works_by_famous_artists():
     """
     
     print("\n3️⃣ Querying ALL Works by Famous Ukrainian Artists (no limit)...")
-    results = query_wikidata(query)
+    results = query_wikidata(query, refresh=refresh)
     
     if results and 'results' in results and 'bindings' in results['results']:
         bindings = results['results']['bindings']
@@ -259,9 +306,14 @@ if __name__ == "__main__":
     print("WIKIDATA SPARQL: UKRAINIAN ARTISTS AND ARTWORKS")
     print("="*70)
     
+    # --refresh=artists,artworks,famous re-queries those (cached results are reused otherwise)
+    refresh = set()
+    for arg in sys.argv[1:]:
+        if arg.startswith("--refresh="):
+            refresh |= set(arg.split("=", 1)[1].split(","))
+
     # Query 1: Ukrainian Artists
-    artists_df = get_famous_ukrainian_artists()
-    time.sleep(2)  # Respect Wikidata rate limits
+    artists_df = get_famous_ukrainian_artists(refresh="artists" in refresh)
     
     if not artists_df.empty:
         print("\n📊 Sample Artists:")
@@ -272,8 +324,7 @@ if __name__ == "__main__":
         print("\n✓ Saved: wikidata_ukrainian_artists.csv")
     
     # Query 2: All artworks by Ukrainian artists
-    artworks_df = get_ukrainian_artworks()
-    time.sleep(2)
+    artworks_df = get_ukrainian_artworks(refresh="artworks" in refresh)
     
     if not artworks_df.empty:
         print("\n📊 Sample Artworks:")
@@ -284,8 +335,7 @@ if __name__ == "__main__":
         print("\n✓ Saved: wikidata_ukrainian_artworks.csv")
     
     # Query 3: Famous artists' works
-    famous_works_df = get_works_by_famous_artists()
-    time.sleep(2)
+    famous_works_df = get_works_by_famous_artists(refresh="famous" in refresh)
     
     if not famous_works_df.empty:
         print("\n📊 Works by Famous Artists:")
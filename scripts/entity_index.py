@@ -0,0 +1,284 @@
+"""
+ENTITY INDEX - persistent cross-dataset entity-resolution keys
+
+Every source (Red List, stolen objects, UNESCO lists, UNESCO/L4R damage,
+Wikidata artists/artworks) is normalized ONCE into blocked keys:
+    qid     Q-number extracted from a bare id or an entity URL
+    title   folded title (fuzzy_match.fold_text: case, Cyrillic/Latin, spelling)
+    author  folded author tokens in sorted order ("Shevchenko Taras" == "Taras Shevchenko")
+    geo     GEO_CELL-degree grid cell; joins also look at the 8 neighbouring cells
+
+Keys live in processed_data/entity_index/keys/<source>.parquet and are only
+rebuilt for a source whose CSV changed. A pairing of two sources is cached in
+pairs/<a>__<b>.parquet and recomputed only when one of those two sources
+changed, so adding a new source never touches the existing pairings.
+
+Usage (from the repo root):
+    python scripts/entity_index.py                       # build/refresh keys for every source
+    python scripts/entity_index.py join redlist stolen   # candidate links between two sources
+
+In a script:
+    links = join('unesco_list', 'l4r_damage', key_types=['qid', 'geo'])
+    links[links['key_types'].str.contains('qid')]
+"""
+
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from fuzzy_match import fold_text
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+INDEX_DIR = 'processed_data/entity_index'
+INDEX_VERSION = 1          # bump when key normalization changes
+
+KEY_TYPES = ['qid', 'title', 'author', 'geo']
+GEO_CELL = 0.01            # degrees (~1 km)
+MAX_BLOCK_PAIRS = 100_000  # blocks producing more pairs than this are skipped
+
+# Column roles per source: id (required), title, author, qid, lat + lon or coords ("lat, lon")
+SOURCES = {
+    'redlist': {
+        'path': 'raw_data/red_list.csv',
+        'id': 'ID', 'title': 'title', 'author': 'author',
+    },
+    'stolen': {
+        'path': 'data_stolen/5_stolen_objects_final.csv',
+        'id': 'id', 'title': 'name', 'author': 'author', 'lat': 'latitude', 'lon': 'longitude',
+    },
+    'unesco_list': {
+        'path': 'processed_data/2_ukraine_list_qid_coord.csv', 'read': {'sep': ';'},
+        'id': 'id', 'title': 'name', 'qid': 'QID', 'coords': 'coordinates',
+    },
+    'unesco_damage': {
+        'path': 'processed_data/unesco-damage-sites-qid.csv',
+        'id': 'Column', 'title': 'Title of the damage site in English', 'qid': 'qid',
+        'coords': 'Geo location',
+    },
+    'l4r_damage': {
+        'path': 'processed_data/cultural_damage_l4R_wiki_enriched.csv',
+        'id': 'site', 'title': 'name', 'qid': 'wikidata_id', 'lat': 'latitude', 'lon': 'longitude',
+    },
+    'wikidata_artists': {
+        'path': 'Wikidata/wikidata_ukrainian_artists.csv',
+        'id': 'artist_id', 'author': 'name', 'qid': 'artist_id',
+    },
+    'wikidata_artworks': {
+        'path': 'Wikidata/wikidata_ukrainian_artworks.csv',
+        'id': 'artwork_id', 'title': 'artwork_name', 'author': 'artist', 'qid': 'artwork_id',
+    },
+}
+
+# ============================================================================
+# KEY NORMALIZATION
+# ============================================================================
+
+def qid_key(value):
+    if pd.isna(value):
+        return ''
+    match = re.search(r'\b(Q\d+)\b', str(value))
+    return match.group(1) if match else ''
+
+
+def author_key(value):
+    return ' '.join(sorted(fold_text(value).split()))
+
+
+def geo_cells(lat, lon):
+    """'row:col' grid cell per coordinate pair ('' when missing)"""
+    lat = pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(pd.Series(lon), errors='coerce').to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    cells = np.full(len(lat), '', dtype=object)
+    rows = np.floor(lat[valid] / GEO_CELL).astype(np.int64)
+    cols = np.floor(lon[valid] / GEO_CELL).astype(np.int64)
+    cells[valid] = [f'{r}:{c}' for r, c in zip(rows, cols)]
+    return cells
+
+
+def neighbour_cells(cells):
+    """Each 'row:col' cell expanded to itself plus its 8 neighbours (index preserved)"""
+    rc = cells.str.split(':', expand=True).astype(np.int64)
+    return pd.concat([(rc[0] + dr).astype(str) + ':' + (rc[1] + dc).astype(str)
+                      for dr in (-1, 0, 1) for dc in (-1, 0, 1)])
+
+
+def split_coords(series):
+    """'lat, lon' strings -> (lat, lon) float Series"""
+    parts = series.astype('string').str.extract(r'(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)')
+    return pd.to_numeric(parts[0], errors='coerce'), pd.to_numeric(parts[1], errors='coerce')
+
+
+def record_keys(df, spec):
+    """Long table (record_id, key_type, key) of every non-empty key of a source"""
+    ids = df[spec['id']].astype('string').str.strip()
+    frames = []
+
+    def add(key_type, keys):
+        frames.append(pd.DataFrame({'record_id': ids.to_numpy(), 'key_type': key_type,
+                                    'key': pd.Series(keys, index=df.index).to_numpy()}))
+
+    if 'qid' in spec:
+        add('qid', df[spec['qid']].map(qid_key))
+    if 'title' in spec:
+        add('title', df[spec['title']].map(fold_text))
+    if 'author' in spec:
+        add('author', df[spec['author']].map(author_key))
+    if 'coords' in spec:
+        add('geo', geo_cells(*split_coords(df[spec['coords']])))
+    elif 'lat' in spec:
+        add('geo', geo_cells(df[spec['lat']], df[spec['lon']]))
+
+    keys = pd.concat(frames, ignore_index=True)
+    keys = keys[keys['record_id'].notna() & keys['key'].notna() & (keys['key'] != '')]
+    keys = keys.drop_duplicates().reset_index(drop=True)
+    keys['key_type'] = keys['key_type'].astype('category')
+    return keys
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+def fingerprint(spec):
+    stat = os.stat(spec['path'])
+    return f'v{INDEX_VERSION}:{stat.st_size}:{int(stat.st_mtime)}'
+
+
+def manifest_path(index_dir):
+    return os.path.join(index_dir, 'manifest.json')
+
+
+def load_manifest(index_dir=INDEX_DIR):
+    path = manifest_path(index_dir)
+    if not os.path.exists(path):
+        return {'sources': {}, 'pairs': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, index_dir=INDEX_DIR):
+    with open(manifest_path(index_dir), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def keys_path(source, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, 'keys', f'{source}.parquet')
+
+
+def pair_path(a, b, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, 'pairs', f'{a}__{b}.parquet')
+
+
+def update_index(sources=None, index_dir=INDEX_DIR, rebuild=False):
+    """(Re)build keys for the given sources whose CSV changed; returns their fingerprints"""
+    names = list(sources or SOURCES)
+    manifest = load_manifest(index_dir)
+    os.makedirs(os.path.join(index_dir, 'keys'), exist_ok=True)
+
+    fingerprints = {}
+    for name in names:
+        spec = SOURCES[name]
+        if not os.path.exists(spec['path']):
+            print(f"  ⚠ {name}: {spec['path']} not found, skipped")
+            continue
+        fp = fingerprint(spec)
+        fingerprints[name] = fp
+        if not rebuild and manifest['sources'].get(name) == fp and os.path.exists(keys_path(name, index_dir)):
+            continue
+        df = pd.read_csv(spec['path'], **spec.get('read', {}))
+        keys = record_keys(df, spec)
+        keys.to_parquet(keys_path(name, index_dir), index=False)
+        manifest['sources'][name] = fp
+        counts = keys['key_type'].value_counts().to_dict()
+        print(f"  ✓ {name}: {len(df):,} rows -> {len(keys):,} keys {counts}")
+
+    save_manifest(manifest, index_dir)
+    return fingerprints
+
+
+def load_keys(source, index_dir=INDEX_DIR):
+    return pd.read_parquet(keys_path(source, index_dir))
+
+# ============================================================================
+# JOINS
+# ============================================================================
+
+def link_keys(keys_a, keys_b, key_types=KEY_TYPES, max_block_pairs=MAX_BLOCK_PAIRS):
+    """One row per (a_id, b_id, key_type, key) sharing a blocked key"""
+    keys_a = keys_a[keys_a['key_type'].isin(key_types)].astype({'key_type': str})
+    keys_b = keys_b[keys_b['key_type'].isin(key_types)].astype({'key_type': str})
+
+    geo_b = keys_b['key_type'] == 'geo'
+    if geo_b.any():
+        near = keys_b[geo_b]
+        near = near.loc[near.index.repeat(9)].assign(key=neighbour_cells(near['key']).sort_index().to_numpy())
+        keys_b = pd.concat([keys_b[~geo_b], near], ignore_index=True)
+
+    size_a = keys_a.groupby(['key_type', 'key']).size().rename('n_a')
+    size_b = keys_b.groupby(['key_type', 'key']).size().rename('n_b')
+    blocks = pd.concat([size_a, size_b], axis=1, join='inner')
+    oversized = blocks.index[blocks['n_a'] * blocks['n_b'] > max_block_pairs]
+    if len(oversized):
+        print(f"  ⚠ {len(oversized)} blocks over {max_block_pairs:,} pairs skipped")
+        keys_a = keys_a[~pd.MultiIndex.from_frame(keys_a[['key_type', 'key']]).isin(oversized)]
+
+    linked = keys_a.merge(keys_b, on=['key_type', 'key'], suffixes=('_a', '_b'))
+    return linked.rename(columns={'record_id_a': 'a_id', 'record_id_b': 'b_id'})
+
+
+def summarize_links(linked):
+    """Collapse per-key links into one row per record pair"""
+    if linked.empty:
+        return pd.DataFrame(columns=['a_id', 'b_id', 'key_types', 'n_keys'])
+    pairs = (linked.drop_duplicates(['a_id', 'b_id', 'key_type'])
+             .sort_values('key_type')
+             .groupby(['a_id', 'b_id'])['key_type']
+             .agg(key_types='+'.join, n_keys='size')
+             .reset_index())
+    return pairs.sort_values(['n_keys', 'a_id', 'b_id'], ascending=[False, True, True],
+                             ignore_index=True)
+
+
+def join(a, b, key_types=KEY_TYPES, index_dir=INDEX_DIR, rebuild=False):
+    """
+    Candidate links between two sources: one row per (a_id, b_id) with the
+    key types they share ('qid+title', 'geo', ...) and how many.
+    Served from the pair cache unless a or b changed since it was written.
+    """
+    key_types = [k for k in KEY_TYPES if k in key_types]
+    fingerprints = update_index([a, b], index_dir)
+    if a not in fingerprints or b not in fingerprints:
+        return summarize_links(pd.DataFrame())
+
+    stamp = [fingerprints[a], fingerprints[b], '+'.join(key_types)]
+    manifest = load_manifest(index_dir)
+    path = pair_path(a, b, index_dir)
+    if not rebuild and manifest['pairs'].get(f'{a}__{b}') == stamp and os.path.exists(path):
+        return pd.read_parquet(path)
+
+    pairs = summarize_links(link_keys(load_keys(a, index_dir), load_keys(b, index_dir), key_types))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pairs.to_parquet(path, index=False)
+    manifest['pairs'][f'{a}__{b}'] = stamp
+    save_manifest(manifest, index_dir)
+    print(f"  ✓ {a} x {b}: {len(pairs):,} linked pairs")
+    return pairs
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("ENTITY RESOLUTION INDEX")
+    print("="*70)
+    if len(sys.argv) == 4 and sys.argv[1] == 'join':
+        links = join(sys.argv[2], sys.argv[3])
+        print(links['key_types'].value_counts().to_string())
+        print(links.head(20).to_string(index=False))
+    else:
+        update_index(sys.argv[1:] or None)
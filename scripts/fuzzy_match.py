@@ -0,0 +1,287 @@
+"""
+FUZZY MATCH - coincidencias aproximadas Red List <-> objetos robados
+
+Encuentra variantes de transliteración (Айвазовський / Aivazovskyi /
+Aivazovsky) y erratas que la comparación exacta no ve:
+  1. Plegado: minúsculas, transliteración cirílico -> latín, y/j -> i,
+     letras dobles -> una
+  2. Candidatos: MinHash sobre n-gramas de caracteres + LSH por bandas
+     (solo se comparan pares que comparten al menos un cubo)
+  3. Puntuación: similitud de edición normalizada (rapidfuzz si está
+     instalado, difflib si no) y umbral por campo
+
+La puntuación de candidatos se reparte entre procesos (n_jobs).
+
+Uso (desde la raíz del repo):
+    python scripts/stolen_objects_match_redlist.py --fuzzy
+    python scripts/fuzzy_match.py --benchmark 1000000     # catálogos sintéticos
+
+En un script:
+    fuzzy_matches(redlist, stolen, thresholds={'title': 0.9, 'author': 0.85})
+"""
+
+import os
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+NGRAM = 3
+NUM_PERM = 64
+BANDS = 16              # 16 bandas x 4 filas -> umbral de Jaccard ~0.5
+MAX_BUCKET = 500        # cubos más poblados se ignoran (n-gramas triviales)
+MIN_JACCARD = 0.3       # Jaccard estimada mínima para pasar a la puntuación
+SIGNATURE_BLOCK = 2000  # textos por bloque de firmas (~n_gramas x NUM_PERM x 8 B)
+CHUNK_SIZE = 20000      # pares por tarea de puntuación
+
+DEFAULT_THRESHOLDS = {'title': 0.85, 'author': 0.85}
+
+# Campo Red List -> campo objetos robados
+FIELDS = {'title': 'name', 'author': 'author'}
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e',
+    'є': 'ie', 'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i',
+    'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch',
+    'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu', 'я': 'ia', 'ъ': '', 'ы': 'y',
+    'э': 'e', 'ё': 'io', "'": '', '’': '', 'ʼ': '',
+}
+_TRANSLIT = str.maketrans(CYRILLIC_TO_LATIN)
+
+# ============================================================================
+# PLEGADO Y N-GRAMAS
+# ============================================================================
+
+def fold_text(text):
+    """Forma canónica para comparar nombres entre alfabetos y grafías"""
+    if pd.isna(text) or text == '':
+        return ''
+    text = str(text).lower().translate(_TRANSLIT)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'[yj]', 'i', text)
+    text = re.sub(r'(\w)\1+', r'\1', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def ngram_hashes(texts, n=NGRAM):
+    """
+    Hashes CRC32 de los n-gramas de cada texto, concatenados.
+    Devuelve (hashes uint64, offsets) con offsets[i]:offsets[i+1] = texto i.
+    """
+    hashes, offsets = [], [0]
+    for text in texts:
+        padded = f' {text} '
+        grams = {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+        hashes.extend(zlib.crc32(g.encode('utf-8')) for g in grams)
+        offsets.append(len(hashes))
+    return np.array(hashes, dtype=np.uint64), np.array(offsets, dtype=np.int64)
+
+# ============================================================================
+# MINHASH + LSH
+# ============================================================================
+
+def hash_params(num_perm=NUM_PERM, seed=1):
+    """Multiplicadores impares y sumandos para hashing multiply-shift (64 bits)"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=1, n=NGRAM):
+    """Firma MinHash (len(texts), num_perm) uint32; los textos no pueden estar vacíos"""
+    a, b = hash_params(num_perm, seed)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for start in range(0, len(texts), SIGNATURE_BLOCK):
+            block = texts[start:start + SIGNATURE_BLOCK]
+            hashes, offsets = ngram_hashes(block, n)
+            permuted = (hashes[:, None] * a + b) >> np.uint64(32)
+            signatures[start:start + len(block)] = np.minimum.reduceat(permuted, offsets[:-1], axis=0)
+    return signatures
+
+def band_keys(signatures, bands=BANDS):
+    """Una clave uint64 por (registro, banda) combinando las filas de la banda"""
+    rows = signatures.shape[1] // bands
+    sig = signatures[:, :rows * bands].astype(np.uint64).reshape(len(signatures), bands, rows)
+    mix = (np.arange(rows, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)) | np.uint64(1)
+    with np.errstate(over='ignore'):
+        return (sig * mix).sum(axis=2, dtype=np.uint64)
+
+def lsh_candidates(left_texts, right_texts, num_perm=NUM_PERM, bands=BANDS,
+                   max_bucket=MAX_BUCKET, seed=1):
+    """
+    Pares (i izquierda, j derecha) que comparten al menos un cubo LSH, con
+    la Jaccard de n-gramas estimada por la fracción de firmas iguales.
+    Los textos vacíos no generan candidatos.
+    """
+    left_pos = np.flatnonzero([t != '' for t in left_texts])
+    right_pos = np.flatnonzero([t != '' for t in right_texts])
+    if len(left_pos) == 0 or len(right_pos) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    left_sig = minhash_signatures([left_texts[i] for i in left_pos], num_perm, seed)
+    right_sig = minhash_signatures([right_texts[j] for j in right_pos], num_perm, seed)
+    left_keys, right_keys = band_keys(left_sig, bands), band_keys(right_sig, bands)
+
+    pairs = []
+    for band in range(left_keys.shape[1]):
+        right = pd.DataFrame({'key': right_keys[:, band], 'j': np.arange(len(right_pos))})
+        sizes = right['key'].map(right['key'].value_counts())
+        right = right[sizes <= max_bucket]
+        left = pd.DataFrame({'key': left_keys[:, band], 'i': np.arange(len(left_pos))})
+        pairs.append(left.merge(right, on='key')[['i', 'j']])
+
+    pairs = pd.concat(pairs, ignore_index=True).drop_duplicates()
+    pairs = pairs.sort_values(['i', 'j'], kind='stable')
+    i, j = pairs['i'].to_numpy(np.int64), pairs['j'].to_numpy(np.int64)
+
+    jaccard = np.empty(len(i))
+    for s in range(0, len(i), CHUNK_SIZE):
+        jaccard[s:s + CHUNK_SIZE] = (left_sig[i[s:s + CHUNK_SIZE]] == right_sig[j[s:s + CHUNK_SIZE]]).mean(axis=1)
+    return left_pos[i], right_pos[j], jaccard
+
+# ============================================================================
+# PUNTUACIÓN
+# ============================================================================
+
+def similarity(a, b):
+    """Similitud de edición normalizada en [0, 1] (2·coincidencias / longitud total)"""
+    if Indel is not None:
+        return Indel.normalized_similarity(a, b)
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def _score_chunk(args):
+    left, right = args
+    return np.array([similarity(a, b) for a, b in zip(left, right)], dtype=float)
+
+def score_pairs(left_texts, right_texts, i, j, n_jobs=1):
+    """Similitud de cada par candidato; n_jobs > 1 reparte los bloques entre procesos"""
+    chunks = [([left_texts[k] for k in i[s:s + CHUNK_SIZE]],
+               [right_texts[k] for k in j[s:s + CHUNK_SIZE]])
+              for s in range(0, len(i), CHUNK_SIZE)]
+    if not chunks:
+        return np.empty(0, dtype=float)
+    if n_jobs == 1 or len(chunks) == 1:
+        return np.concatenate([_score_chunk(c) for c in chunks])
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return np.concatenate(list(pool.map(_score_chunk, chunks)))
+
+# ============================================================================
+# EMPAREJAMIENTO
+# ============================================================================
+
+def match_field(left, right, threshold, n_jobs=1, min_jaccard=MIN_JACCARD, **lsh_options):
+    """
+    Pares (i, j, similitud) con similitud >= threshold entre dos listas de
+    textos plegados. Antes de puntuar se descartan los candidatos cuya
+    Jaccard estimada < min_jaccard y los que no pueden llegar al umbral por
+    longitud (similitud <= 2·min(la, lb) / (la + lb)).
+    """
+    i, j, jaccard = lsh_candidates(left, right, **lsh_options)
+    left_len = np.array([len(t) for t in left])[i]
+    right_len = np.array([len(t) for t in right])[j]
+    bound = 2 * np.minimum(left_len, right_len) / (left_len + right_len)
+    keep = (jaccard >= min_jaccard) & (bound >= threshold)
+    i, j = i[keep], j[keep]
+
+    scores = score_pairs(left, right, i, j, n_jobs)
+    keep = scores >= threshold
+    return i[keep], j[keep], scores[keep]
+
+def fuzzy_matches(redlist, stolen, thresholds=None, n_jobs=None, **options):
+    """
+    Coincidencias aproximadas por título/nombre y por autor, con las mismas
+    columnas que find_matches más 'similarity'. match_type es
+    'fuzzy_title' o 'fuzzy_author'; confidence siempre 'low'.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    red_cols = {'ID': 'redlist_id', 'title': 'redlist_title',
+                'author': 'redlist_author', 'category': 'redlist_category'}
+    stolen_cols = {'id': 'stolen_id', 'name': 'stolen_name', 'author': 'stolen_author',
+                   'type': 'stolen_type', 'category': 'stolen_category'}
+    red_part = redlist[list(red_cols)].rename(columns=red_cols).reset_index(drop=True)
+    stolen_part = stolen[list(stolen_cols)].rename(columns=stolen_cols).reset_index(drop=True)
+
+    frames = []
+    for field, threshold in thresholds.items():
+        left = [fold_text(t) for t in redlist[field]]
+        right = [fold_text(t) for t in stolen[FIELDS[field]]]
+        i, j, scores = match_field(left, right, threshold, n_jobs, **options)
+        found = pd.concat([red_part.iloc[i].reset_index(drop=True),
+                           stolen_part.iloc[j].reset_index(drop=True)], axis=1)
+        found['match_type'] = f'fuzzy_{field}'
+        found['confidence'] = 'low'
+        found['similarity'] = scores.round(3)
+        frames.append(found)
+
+    return pd.concat(frames, ignore_index=True)
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def synthetic_catalog(n_rows, seed=0):
+    """Catálogo de títulos y autores aleatorios a partir de sílabas"""
+    rng = np.random.default_rng(seed)
+    syllables = np.array([c + v for c in 'bdhklmnprstvz' for v in 'aeiou'] +
+                         ['shev', 'chen', 'sky', 'ko', 'enko', 'ych'])
+    def words(k):
+        parts = syllables[rng.integers(0, len(syllables), size=(n_rows, k))]
+        return [''.join(p) for p in parts]
+    authors = [f'{a} {b}' for a, b in zip(words(2), words(4))]
+    titles = [f'{a} {b} {c}' for a, b, c in zip(words(3), words(2), words(3))]
+    return pd.DataFrame({'title': titles, 'author': authors})
+
+def add_typo(text, rng):
+    pos = int(rng.integers(0, len(text)))
+    return text[:pos] + text[pos + 1:]
+
+def benchmark(n_rows=1_000_000, n_redlist=None, n_jobs=None):
+    """Red List sintética (n_redlist) contra catálogo robado sintético (n_rows)"""
+    n_redlist = n_redlist or n_rows
+    rng = np.random.default_rng(42)
+    stolen = synthetic_catalog(n_rows, seed=1).rename(columns={'title': 'name'})
+    stolen['id'] = np.arange(n_rows)
+    stolen['type'] = 'Painting'
+    stolen['category'] = 'Painting'
+
+    redlist = synthetic_catalog(n_redlist, seed=2)
+    redlist['ID'] = np.arange(n_redlist)
+    redlist['category'] = 'paintings'
+    planted = rng.choice(n_redlist, size=max(n_redlist // 50, 1), replace=False)
+    sources = rng.integers(0, n_rows, size=len(planted))
+    redlist.loc[planted, 'title'] = [add_typo(stolen.at[s, 'name'], rng) for s in sources]
+
+    print(f"Red List {n_redlist:,} x robados {n_rows:,}; {len(planted):,} erratas sembradas")
+    start = time.perf_counter()
+    found = fuzzy_matches(redlist, stolen, thresholds={'title': 0.9}, n_jobs=n_jobs)
+    elapsed = time.perf_counter() - start
+
+    hits = set(zip(found['redlist_id'], found['stolen_id']))
+    recall = np.mean([(p, s) in hits for p, s in zip(planted, sources)])
+    print(f"✓ {len(found):,} coincidencias en {elapsed:,.1f} s; recall sembradas {recall:.1%}")
+    return found
+
+
+if __name__ == "__main__":
+    if '--benchmark' in sys.argv:
+        args = [a for a in sys.argv[1:] if a != '--benchmark']
+        benchmark(int(args[0]) if args else 1_000_000)
+    else:
+        print(__doc__)
@@ -0,0 +1,75 @@
+"""
+KEYWORD MATCHER - Aho-Corasick automaton over named keyword lists
+
+Compiles several keyword lists into one automaton, so a single pass over a
+text reports which lists have at least one substring hit, as a bitmask
+(bit i = i-th list). Equivalent to
+    any(k in text for k in keywords)
+for every list at once.
+
+Usage:
+    matcher = KeywordMatcher({'icon': ICON_KW, 'books': BOOKS_KW})
+    masks = matcher.masks(df['text_blob'])        # one int per row
+    df['is_icon'] = matcher.hit(masks, 'icon')    # bool array
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class KeywordMatcher:
+    def __init__(self, groups):
+        self.names = list(groups)
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.full_mask = (1 << len(self.names)) - 1
+
+        # Trie: goto[state] = {char: next_state}; out[state] = bitmask of lists ending here
+        self.goto, self.out = [{}], [0]
+        for name, keywords in groups.items():
+            for keyword in keywords:
+                state = 0
+                for ch in keyword:
+                    if ch not in self.goto[state]:
+                        self.goto.append({})
+                        self.out.append(0)
+                        self.goto[state][ch] = len(self.goto) - 1
+                    state = self.goto[state][ch]
+                self.out[state] |= self.bits[name]
+
+        # Failure links (BFS); each state also reports the lists of its suffixes
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] |= self.out[self.fail[nxt]]
+
+    def mask(self, text):
+        """Bitmask of the lists with at least one keyword inside `text`"""
+        goto, fail, out, full = self.goto, self.fail, self.out, self.full_mask
+        state, mask = 0, 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                mask |= out[state]
+                if mask == full:
+                    break
+        return mask
+
+    def masks(self, texts):
+        """Vectorized mask() over a Series/list; each distinct text is scanned once"""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(''))
+        return np.array([self.mask(t) for t in uniques], dtype=np.int64)[codes]
+
+    def hit(self, masks, name):
+        """Boolean array: does list `name` hit in each mask?"""
+        return (np.asarray(masks) & self.bits[name]) != 0
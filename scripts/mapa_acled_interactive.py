@@ -6,11 +6,151 @@ Mapa interactivo con filtros, timeline y análisis
 import pandas as pd
 import folium
 from folium import plugins
+from folium.template import Template
 from datetime import datetime
 import json
+import os
 
-def create_acled_interactive_map(csv_file):
-    """Crea un mapa interactivo del dataset de ACLED"""
+from detail_store import write_detail_store, DETAIL_STORE_JS
+
+# Colores por tipo de evento
+EVENT_COLORS = {
+    'Looting/property destruction': 'red',
+    'Looting': 'orange',
+    'Property destruction': 'darkred'
+}
+
+# Propiedades que viajan con cada evento en modo GeoJSON (el popup se arma en el navegador)
+FEATURE_PROPERTIES = ['event_id_cnty', 'event_date', 'event_type', 'sub_event_type',
+                      'location', 'admin1', 'actor1', 'actor2', 'fatalities', 'notes', 'source']
+NOTES_MAX_CHARS = 500
+
+# Con el detail store, solo viajan en el HTML las propiedades ligeras; el
+# resto (notas completas, actores, fuente) se descarga al abrir el popup
+LIGHT_PROPERTIES = ['event_id_cnty', 'event_date', 'sub_event_type', 'location', 'admin1', 'fatalities']
+DETAIL_PROPERTIES = ['event_type', 'actor1', 'actor2', 'notes', 'source']
+
+# Plantilla del popup: misma estructura que el popup HTML por marcador
+POPUP_TEMPLATE_JS = """
+function (p) {
+    var esc = function (v, fallback) {
+        if (v === null || v === undefined || v === '') return fallback || 'N/A';
+        return String(v).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    return '<div style="width: 400px; max-height: 400px; overflow-y: auto;">' +
+        '<h4 style="margin-bottom: 10px; color: #d62728;">' + esc(p.event_type) + '</h4><hr>' +
+        '<p><strong>📅 Fecha:</strong> ' + esc(p.event_date) + '</p>' +
+        '<p><strong>📍 Ubicación:</strong> ' + esc(p.location) + ', ' + esc(p.admin1) + '</p>' +
+        '<p><strong>🏷️ Sub-tipo:</strong> ' + esc(p.sub_event_type) + '</p>' +
+        '<p><strong>👥 Actor 1:</strong> ' + esc(p.actor1) + '</p>' +
+        '<p><strong>👥 Actor 2:</strong> ' + esc(p.actor2) + '</p>' +
+        '<p><strong>💀 Fatalidades:</strong> ' + esc(p.fatalities, '0') + '</p><hr>' +
+        '<p><strong>📝 Notas:</strong></p>' +
+        '<p style="font-size: 0.9em; max-height: 150px; overflow-y: auto;">' + esc(p.notes, 'Sin notas') + '...</p><hr>' +
+        '<p style="font-size: 0.8em; color: #666;"><strong>Fuente:</strong> ' + esc(p.source) +
+        '<br><strong>ID:</strong> ' + esc(p.event_id_cnty) + '</p></div>';
+}
+"""
+
+
+class GeoJsonMarkerCluster(plugins.MarkerCluster):
+    """
+    MarkerCluster alimentado por una FeatureCollection de puntos.
+    Los puntos se dibujan como circleMarkers sobre un único renderer canvas
+    y el popup se genera en el navegador (solo al abrirlo) a partir de las
+    propiedades de cada feature.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var colors = {{ this.colors|tojson }};
+                var popupTemplate = {{ this.popup_template }};
+                var renderer = L.canvas({padding: 0.5});
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                {%- if this.detail_url %}
+                var details = detailStore({{ this.detail_url|tojson }});
+                {%- endif %}
+
+                L.geoJSON({{ this.data|tojson }}, {
+                    pointToLayer: function (feature, latlng) {
+                        var color = colors[feature.properties.sub_event_type] || 'gray';
+                        return L.circleMarker(latlng, {
+                            renderer: renderer, radius: 5, color: color, weight: 2,
+                            fill: true, fillColor: color, fillOpacity: 0.7
+                        });
+                    },
+                    onEachFeature: function (feature, layer) {
+                        var p = feature.properties;
+                        {%- if this.detail_url %}
+                        layer.bindPopup('Cargando…', {maxWidth: 400});
+                        layer.on('popupopen', function (e) {
+                            details.get(p.event_id_cnty).then(function (d) {
+                                e.popup.setContent(popupTemplate(Object.assign({}, p, d)));
+                            }).catch(function () {
+                                e.popup.setContent(popupTemplate(p));
+                            });
+                        });
+                        {%- else %}
+                        layer.bindPopup(function () { return popupTemplate(p); }, {maxWidth: 400});
+                        {%- endif %}
+                        layer.bindTooltip((p.location || 'Ubicación') + ': ' + (p.event_date || ''));
+                    }
+                }).addTo(cluster);
+
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, data, colors, popup_template=POPUP_TEMPLATE_JS, name=None,
+                 detail_url=None, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self._name = "GeoJsonMarkerCluster"
+        self.data = data
+        self.colors = colors
+        self.popup_template = popup_template.strip()
+        self.detail_url = detail_url
+
+
+def events_to_geojson(df, properties=FEATURE_PROPERTIES):
+    """FeatureCollection de puntos con propiedades ligeras (sin HTML)"""
+    props = df.reindex(columns=properties).copy()
+    props['event_date'] = df['event_date'].dt.strftime('%Y-%m-%d')
+    if 'notes' in props:
+        props['notes'] = props['notes'].fillna('').astype(str).str.slice(0, NOTES_MAX_CHARS)
+    props['fatalities'] = pd.to_numeric(props['fatalities'], errors='coerce').fillna(0).astype(int)
+    props = props.astype(object).where(props.notna(), None)
+    
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [round(lon, 5), round(lat, 5)]},
+                'properties': p,
+            }
+            for lat, lon, p in zip(df['latitude'].astype(float), df['longitude'].astype(float),
+                                   props.to_dict('records'))
+        ]
+    }
+
+def create_acled_interactive_map(csv_file, render_mode='geojson', detail_store=True,
+                                 output_file='mapa_acled_looting_destruction.html'):
+    """
+    Crea un mapa interactivo del dataset de ACLED
+
+    render_mode:
+        'geojson' -> una FeatureCollection por año, clusters + canvas, popups en el navegador
+        'markers' -> un CircleMarker de folium por evento, con popup HTML propio
+    detail_store:
+        solo en modo 'geojson': notas, actores y fuente se guardan en JSON
+        fragmentados por event_id_cnty y se descargan al abrir cada popup
+    """
     
     print("\n" + "="*70)
     print("CREANDO VISUALIZACIÓN INTERACTIVA - ACLED DATASET")
@@ -60,12 +200,18 @@ def create_acled_interactive_map(csv_file):
     folium.TileLayer('CartoDB positron', name='CartoDB Positivo').add_to(m)
     folium.TileLayer('CartoDB dark_matter', name='CartoDB Oscuro').add_to(m)
     
-    # Colores por tipo de evento
-    event_colors = {
-        'Looting/property destruction': 'red',
-        'Looting': 'orange',
-        'Property destruction': 'darkred'
-    }
+    event_colors = EVENT_COLORS
+    
+    # Detalle de cada evento fuera del HTML
+    detail_url = None
+    if render_mode == 'geojson' and detail_store:
+        print("🗄️  Guardando detalle de eventos...")
+        detail_dir = os.path.splitext(output_file)[0] + '_details'
+        write_detail_store(df_coords, 'event_id_cnty', DETAIL_PROPERTIES, detail_dir)
+        detail_url = os.path.relpath(detail_dir, os.path.dirname(output_file) or '.').replace(os.sep, '/')
+        m.get_root().header.add_child(folium.Element(f"<script>{DETAIL_STORE_JS}</script>"))
+        print()
+    feature_properties = LIGHT_PROPERTIES if detail_url else FEATURE_PROPERTIES
     
     # Crear grupos de marcadores por año
     print("📍 Creando capas por año...")
@@ -77,6 +223,15 @@ def create_acled_interactive_map(csv_file):
         # Crear grupo para este año
         year_group = folium.FeatureGroup(name=f'📅 {year} ({len(df_year)} eventos)', show=True)
         
+        if render_mode == 'geojson':
+            marker_cluster = GeoJsonMarkerCluster(
+                events_to_geojson(df_year, feature_properties), event_colors,
+                name=f'Cluster {year}', detail_url=detail_url
+            )
+            marker_cluster.add_to(year_group)
+            year_group.add_to(m)
+            continue
+        
         # Crear cluster de marcadores para este año
         marker_cluster = plugins.MarkerCluster(name=f'Cluster {year}')
         
@@ -130,7 +285,7 @@ def create_acled_interactive_map(csv_file):
     
     # Crear mapa de calor
     print("🔥 Creando mapa de calor...")
-    heat_data = [[row['latitude'], row['longitude']] for idx, row in df_coords.iterrows()]
+    heat_data = df_coords[['latitude', 'longitude']].values.tolist()
     
     heat_group = folium.FeatureGroup(name='🔥 Mapa de Calor', show=False)
     plugins.HeatMap(
@@ -259,7 +414,6 @@ def create_acled_interactive_map(csv_file):
     ).add_to(m)
     
     # Guardar mapa
-    output_file = 'mapa_acled_looting_destruction.html'
     m.save(output_file)
     
     print(f"✓ Mapa guardado: {output_file}\n")
@@ -288,7 +442,10 @@ def create_acled_interactive_map(csv_file):
     
     print("\n" + "="*70)
     print("✓ Visualización completada")
-    print(f"✓ Abre '{output_file}' en tu navegador")
+    if detail_url:
+        print(f"✓ Sirve la carpeta (p. ej. python -m http.server) y abre '{output_file}'")
+    else:
+        print(f"✓ Abre '{output_file}' en tu navegador")
     print("="*70)
     print("\n🎯 CARACTERÍSTICAS DEL MAPA:")
     print("  ✓ Capas por año (activa/desactiva)")
@@ -0,0 +1,241 @@
+"""
+SPARQL CACHE - persistent SPARQL results keyed by a normalized query fingerprint
+
+fingerprint = sha256(endpoint + query without comments, whitespace collapsed),
+so reformatting or re-commenting a query still hits the same entry.
+Each entry is stored as
+    processed_data/sparql_cache/<fingerprint>.parquet   bindings, one column per
+        variable (+ <var>.type / <var>.xml:lang / <var>.datatype when present)
+    processed_data/sparql_cache/<fingerprint>.json      query, endpoint, vars, fetched_at
+and returned in SPARQL-JSON form ({'head': ..., 'results': {'bindings': ...}}),
+i.e. a drop-in for SPARQLWrapper's query().convert().
+Entries older than TTL_DAYS are re-fetched; refresh=True forces it.
+
+A local stand-in endpoint answers GET/POST ?query= from the cache only - and
+the keys / chunk queries of sparql_pages from its saved parts, as CSV (404 when
+a query was never fetched), so scripts can be exercised without network access.
+
+Usage:
+    from sparql_cache import cached_query
+    results = cached_query(query, fetch=my_fetch)       # fetch(query) -> SPARQL JSON
+
+    python scripts/sparql_cache.py list
+    python scripts/sparql_cache.py refresh <fingerprint-prefix>   # drop one entry
+    python scripts/sparql_cache.py serve [port]                   # http://127.0.0.1:8890/sparql
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+CACHE_DIR = 'processed_data/sparql_cache'
+WIKIDATA_ENDPOINT = 'https://query.wikidata.org/sparql'
+TTL_DAYS = 7
+SERVE_PORT = 8890
+
+# IRIs and string literals are kept verbatim; comments dropped; whitespace collapsed
+QUERY_TOKEN = re.compile(r'''<[^<>"{}|^`\\\s]*>|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|(#[^\n]*|\s+)|[^<"'#\s]+|.''')
+BINDING_KEYS = ('type', 'xml:lang', 'datatype')
+
+# ============================================================================
+# FINGERPRINT / STORAGE
+# ============================================================================
+
+def normalize_query(query):
+    parts = []
+    for m in QUERY_TOKEN.finditer(query):
+        if m.group(1) is None:
+            parts.append(m.group(0))
+        elif parts and parts[-1] != ' ':
+            parts.append(' ')
+    return ''.join(parts).strip()
+
+
+def fingerprint(query, endpoint=WIKIDATA_ENDPOINT):
+    key = f"{endpoint}\n{normalize_query(query)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+
+def entry_paths(fp, cache_dir=CACHE_DIR):
+    base = os.path.join(cache_dir, fp)
+    return base + '.parquet', base + '.json'
+
+
+def bindings_to_frame(results):
+    """SPARQL-JSON -> DataFrame (value columns + .type/.xml:lang/.datatype columns)"""
+    variables = results['head']['vars']
+    rows = []
+    for binding in results['results']['bindings']:
+        row = {}
+        for var, term in binding.items():
+            row[var] = term.get('value')
+            for key in BINDING_KEYS:
+                if key in term:
+                    row[f'{var}.{key}'] = term[key]
+        rows.append(row)
+    columns = list(variables)
+    extra = sorted({c for row in rows for c in row} - set(columns))
+    return pd.DataFrame(rows, columns=columns + extra, dtype=object)
+
+
+def frame_to_bindings(df, variables):
+    """Inverse of bindings_to_frame"""
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    bindings = []
+    for record in records:
+        binding = {}
+        for var in variables:
+            if record.get(var) is None:
+                continue
+            term = {'value': record[var]}
+            for key in BINDING_KEYS:
+                if record.get(f'{var}.{key}') is not None:
+                    term[key] = record[f'{var}.{key}']
+            term.setdefault('type', 'literal')
+            binding[var] = term
+        bindings.append(binding)
+    return {'head': {'vars': list(variables)}, 'results': {'bindings': bindings}}
+
+
+def load_entry(fp, cache_dir=CACHE_DIR):
+    """(results, meta) of a cached entry, or (None, None)"""
+    data_path, meta_path = entry_paths(fp, cache_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return frame_to_bindings(pd.read_parquet(data_path), meta['vars']), meta
+
+
+def save_entry(fp, query, endpoint, results, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, meta_path = entry_paths(fp, cache_dir)
+    bindings_to_frame(results).astype('string').to_parquet(data_path, index=False)
+    meta = {'fingerprint': fp, 'endpoint': endpoint, 'vars': results['head']['vars'],
+            'rows': len(results['results']['bindings']),
+            'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'query': query}
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def is_fresh(meta, ttl_days=TTL_DAYS):
+    fetched = datetime.fromisoformat(meta['fetched_at'])
+    return (datetime.now(timezone.utc) - fetched).total_seconds() < ttl_days * 86400
+
+# ============================================================================
+# QUERY
+# ============================================================================
+
+def cached_query(query, fetch, endpoint=WIKIDATA_ENDPOINT, ttl_days=TTL_DAYS,
+                 refresh=False, cache_dir=CACHE_DIR):
+    """
+    SPARQL-JSON results for `query`: from the cache when fresh, else fetch(query)
+    (which returns SPARQL-JSON or None on error) and store it. If the fetch fails,
+    a stale cached copy is returned rather than nothing.
+    """
+    fp = fingerprint(query, endpoint)
+    results, meta = load_entry(fp, cache_dir)
+    if results is not None and not refresh and is_fresh(meta, ttl_days):
+        print(f"  Cached result {fp[:10]} ({meta['rows']:,} rows, {meta['fetched_at']})")
+        return results
+
+    fetched = fetch(query)
+    if fetched is None:
+        if results is not None:
+            print(f"  ⚠ Fetch failed - using stale cache {fp[:10]} ({meta['fetched_at']})")
+        return results
+    save_entry(fp, query, endpoint, fetched, cache_dir)
+    return fetched
+
+
+def list_entries(cache_dir=CACHE_DIR):
+    rows = []
+    for meta_path in sorted(glob.glob(os.path.join(cache_dir, '*.json'))):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        rows.append({'fingerprint': meta['fingerprint'], 'rows': meta['rows'],
+                     'fetched_at': meta['fetched_at'], 'fresh': is_fresh(meta),
+                     'query': normalize_query(meta['query'])[:60]})
+    return pd.DataFrame(rows, columns=['fingerprint', 'rows', 'fetched_at', 'fresh', 'query'])
+
+
+def drop_entry(prefix, cache_dir=CACHE_DIR):
+    """Remove the entries whose fingerprint starts with `prefix` (next run re-fetches)"""
+    removed = 0
+    for path in glob.glob(os.path.join(cache_dir, f'{prefix}*')):
+        os.remove(path)
+        removed += path.endswith('.json')
+    return removed
+
+# ============================================================================
+# LOCAL STAND-IN ENDPOINT
+# ============================================================================
+
+def serve(port=SERVE_PORT, upstream=WIKIDATA_ENDPOINT, cache_dir=CACHE_DIR):
+    """HTTP server answering SPARQL requests from the cache / page store only (call serve_forever())"""
+    from sparql_pages import find_part
+
+    class Handler(BaseHTTPRequestHandler):
+        def answer(self, params):
+            query = (params.get('query') or [''])[0]
+            results, meta = load_entry(fingerprint(query, upstream), cache_dir) if query else (None, None)
+            part = find_part(query, upstream) if query and results is None else None
+            if results is None and part is None:
+                self.send_response(404)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.end_headers()
+                self.wfile.write(b'Query not in cache\n')
+                return
+            if results is None:
+                body, content_type = part.to_csv(index=False).encode('utf-8'), 'text/csv'
+            else:
+                body, content_type = json.dumps(results).encode('utf-8'), 'application/sparql-results+json'
+            self.send_response(200)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.answer(parse_qs(urlparse(self.path).query))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length).decode('utf-8')
+            if self.headers.get('Content-Type', '').startswith('application/sparql-query'):
+                self.answer({'query': [body]})
+            else:
+                self.answer(parse_qs(body))
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"✓ Serving cached results of {upstream} at http://127.0.0.1:{port}/sparql")
+    return server
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'list':
+        print(list_entries().to_string(index=False))
+    elif command == 'refresh':
+        print(f"✓ Dropped {drop_entry(sys.argv[2])} entries")
+    elif command == 'serve':
+        server = serve(int(sys.argv[2]) if len(sys.argv) > 2 else SERVE_PORT)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        print(__doc__)
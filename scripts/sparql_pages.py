@@ -0,0 +1,199 @@
+"""
+SPARQL PAGES - paged, resumable fetch of large SPARQL results
+
+A large query is cut on a partitioning key, not with LIMIT/OFFSET (which makes
+the endpoint evaluate, label and sort the whole result again for every page):
+  1. keys_query lists the key values once, e.g.
+         SELECT DISTINCT ?artist WHERE { ?artist wdt:P27 wd:Q212 ... }
+     a cheap query without OPTIONALs or the label service
+  2. the full query runs once per chunk of CHUNK_SIZE keys, bound with
+         VALUES ?artist { <...> <...> }
+     at the top of its WHERE, so each request only joins and labels its chunk
+Each request is made as SPARQL CSV, decoded straight into string columns and
+written as its own Parquet part, so only one chunk is ever held in memory:
+    processed_data/sparql_pages/<fingerprint>/keys.parquet
+    processed_data/sparql_pages/<fingerprint>/page-000000.parquet ...
+    processed_data/sparql_pages/<fingerprint>/manifest.json
+A fetch is built in <fingerprint>.new and swapped in once complete: an
+interrupted run resumes after its last saved chunk, and the previous result
+stays readable (and is kept when refreshing it fails). A complete result is
+reused until TTL_DAYS old (same fingerprint / TTL as sparql_cache);
+refresh=True starts over.
+The sparql_cache stand-in endpoint answers the keys / chunk queries from these
+parts too (find_part), so paged queries also run offline once fetched.
+
+Values are the plain SPARQL values (IRIs as strings, literals without
+language/datatype), '' when unbound - what item.get(var, {}).get('value', '') gave.
+
+Usage:
+    from sparql_pages import paged_query
+    for page in paged_query(query, keys_query, 'artist', fetch_page):   # fetch_page(query) -> DataFrame
+        ...
+"""
+
+import io
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from sparql_cache import WIKIDATA_ENDPOINT, TTL_DAYS, fingerprint
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+PAGES_DIR = 'processed_data/sparql_pages'
+CHUNK_SIZE = 500         # keys per request (sent as POST: no URL length limit)
+MAX_RETRIES = 4
+BACKOFF = 5              # seconds before the first retry of a request, doubled each time
+KEYS_FILE = 'keys.parquet'
+
+# ============================================================================
+# PAGES
+# ============================================================================
+
+def with_values(query, var, keys):
+    """`query` with VALUES ?var { <key> ... } at the top of its WHERE (keys are IRIs)"""
+    where = re.search(r'WHERE\s*\{', query, re.IGNORECASE)
+    if not where:
+        raise ValueError("Paged queries need an explicit SELECT ... WHERE {")
+    values = f"\n  VALUES ?{var} {{ {' '.join(f'<{key}>' for key in keys)} }}"
+    return query[:where.end()] + values + query[where.end():]
+
+
+def parse_csv_page(data):
+    """SPARQL CSV bytes -> DataFrame of strings ('' when unbound)"""
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, na_filter=False)
+
+
+def page_path(directory, number):
+    return os.path.join(directory, f'page-{number:06d}.parquet')
+
+
+def read_pages(directory, manifest):
+    for number in range(manifest['pages']):
+        yield pd.read_parquet(page_path(directory, number))
+
+
+def load_manifest(directory):
+    path = os.path.join(directory, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(directory, manifest):
+    tmp = os.path.join(directory, 'manifest.json.part')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directory, 'manifest.json'))
+
+
+def save_part(df, path):
+    df.to_parquet(path + '.part', index=False)
+    os.replace(path + '.part', path)
+
+
+def fetch_with_retries(fetch_page, query, label):
+    delay = BACKOFF
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fetch_page(query)
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise RuntimeError(f"{label} failed after {MAX_RETRIES} retries "
+                                   f"(saved pages are kept; rerun to resume): {e}") from e
+            print(f"  ⚠ {label}: {type(e).__name__}: {e} - retrying in {delay} s")
+            time.sleep(delay)
+            delay *= 2
+
+
+def is_fresh(manifest, ttl_days):
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(manifest['completed_at'])
+    return age.total_seconds() < ttl_days * 86400
+
+
+def start_over(staging, query, keys_query, key_var, fetch_page, chunk_size, endpoint):
+    """Fetch the keys and write a fresh manifest in the staging directory"""
+    keys_df = fetch_with_retries(fetch_page, keys_query, 'Keys')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    save_part(keys_df, os.path.join(staging, KEYS_FILE))
+    n_keys = keys_df[key_var].nunique()
+    manifest = {'query': query, 'keys_query': keys_query, 'key_var': key_var, 'endpoint': endpoint,
+                'chunk_size': chunk_size, 'keys': n_keys, 'chunks': -(-n_keys // chunk_size),
+                'pages': 0, 'rows': 0, 'completed_at': None,
+                'parts': {fingerprint(keys_query, endpoint): KEYS_FILE}}
+    save_manifest(staging, manifest)
+    print(f"  {n_keys:,} keys -> {manifest['chunks']} requests of up to {chunk_size:,}")
+    return manifest
+
+
+def paged_query(query, keys_query, key_var, fetch_page, chunk_size=CHUNK_SIZE,
+                endpoint=WIKIDATA_ENDPOINT, refresh=False, ttl_days=TTL_DAYS, pages_dir=PAGES_DIR):
+    """
+    Yield the result of `query` one chunk of `key_var` values (DataFrame) at a
+    time: saved chunks are read back from disk, missing ones fetched with
+    fetch_page(query_text) - first `keys_query` for the keys, then `query` bound
+    to each chunk of keys. A new fetch is built in <fingerprint>.new and only
+    replaces the saved result once complete.
+    """
+    key_var = key_var.lstrip('?')
+    directory = os.path.join(pages_dir, fingerprint(f"{keys_query}\n{query}", endpoint))
+    staging = directory + '.new'
+    saved = load_manifest(directory)
+    manifest = load_manifest(staging)
+
+    if manifest and not refresh and manifest['chunk_size'] == chunk_size:
+        if manifest['pages']:
+            print(f"  Resuming after page {manifest['pages'] - 1} ({manifest['rows']:,} rows saved)")
+    elif saved and not refresh and is_fresh(saved, ttl_days):
+        yield from read_pages(directory, saved)
+        return
+    else:
+        try:
+            manifest = start_over(staging, query, keys_query, key_var, fetch_page, chunk_size, endpoint)
+        except RuntimeError:
+            if saved is None or refresh:
+                raise
+            print(f"  ⚠ Refresh failed - using the result saved {saved['completed_at']}")
+            yield from read_pages(directory, saved)
+            return
+
+    yield from read_pages(staging, manifest)
+
+    keys = sorted(set(pd.read_parquet(os.path.join(staging, KEYS_FILE))[key_var]))
+    for number in range(manifest['pages'], manifest['chunks']):
+        text = with_values(query, key_var, keys[number * chunk_size:(number + 1) * chunk_size])
+        page = fetch_with_retries(fetch_page, text, f"Page {number}")
+        save_part(page, page_path(staging, number))
+
+        manifest['pages'] = number + 1
+        manifest['rows'] += len(page)
+        manifest['parts'][fingerprint(text, endpoint)] = os.path.basename(page_path(staging, number))
+        save_manifest(staging, manifest)
+        print(f"  Page {number + 1}/{manifest['chunks']}: {len(page):,} rows ({manifest['rows']:,} total)")
+        yield page
+
+    manifest['completed_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    save_manifest(staging, manifest)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+
+
+def find_part(query, endpoint=WIKIDATA_ENDPOINT, pages_dir=PAGES_DIR):
+    """Saved result (DataFrame) of a keys / chunk query sent by paged_query, or None"""
+    fp = fingerprint(query, endpoint)
+    if not os.path.isdir(pages_dir):
+        return None
+    for name in os.listdir(pages_dir):
+        manifest = load_manifest(os.path.join(pages_dir, name))
+        if manifest and fp in manifest.get('parts', {}):
+            return pd.read_parquet(os.path.join(pages_dir, name, manifest['parts'][fp]))
+    return None
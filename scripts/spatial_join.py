@@ -0,0 +1,88 @@
+"""
+SPATIAL JOIN - radius join between two point sets (lat/lon, metres)
+
+Replaces "geodesic() for every pair" loops:
+  1. a haversine BallTree over the right-hand points is queried once for all
+     left-hand points, with the radius inflated by SPHERE_MARGIN so no pair
+     that is within the radius on the WGS84 ellipsoid is missed
+  2. exact WGS84 geodesic distances are computed only for those candidates
+     (vectorized with pyproj when installed, geopy otherwise) and pairs
+     farther than the radius are dropped
+
+Output pairs are ordered like the nested loop (left, then right).
+
+Usage:
+    pairs = radius_join(p_lat, p_lon, d_lat, d_lon, radius_m=1000)
+    pairs[['left', 'right', 'distance_m']]      # positional indices + metres
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+try:
+    from pyproj import Geod
+    WGS84 = Geod(ellps='WGS84')
+except ImportError:
+    WGS84 = None
+    from geopy.distance import geodesic
+
+EARTH_RADIUS_M = 6_371_008.8
+SPHERE_MARGIN = 0.01     # sphere vs ellipsoid distances differ by < 0.6 %
+QUERY_CHUNK = 50_000     # left points per BallTree query
+
+
+def valid_coords(lat, lon):
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return ~(np.isnan(lat) | np.isnan(lon)) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+
+
+def geodesic_m(lat1, lon1, lat2, lon2):
+    """Exact WGS84 geodesic distance in metres, element-wise"""
+    lat1, lon1, lat2, lon2 = (np.asarray(a, dtype=float) for a in (lat1, lon1, lat2, lon2))
+    if WGS84 is not None:
+        return WGS84.inv(lon1, lat1, lon2, lat2)[2]
+    return np.array([geodesic((a, b), (c, d)).meters
+                     for a, b, c, d in zip(lat1, lon1, lat2, lon2)], dtype=float)
+
+
+def candidate_pairs(left_lat, left_lon, right_lat, right_lon, radius_m):
+    """(left, right) positional pairs within radius_m on the sphere (inflated by SPHERE_MARGIN)"""
+    left_ok = np.flatnonzero(valid_coords(left_lat, left_lon))
+    right_ok = np.flatnonzero(valid_coords(right_lat, right_lon))
+    empty = np.empty(0, dtype=np.int64)
+    if len(left_ok) == 0 or len(right_ok) == 0:
+        return empty, empty
+
+    to_rad = lambda lat, lon, idx: np.radians(np.column_stack([np.asarray(lat, dtype=float)[idx],
+                                                               np.asarray(lon, dtype=float)[idx]]))
+    tree = BallTree(to_rad(right_lat, right_lon, right_ok), metric='haversine')
+    radius = radius_m * (1 + SPHERE_MARGIN) / EARTH_RADIUS_M
+
+    lefts, rights = [], []
+    for start in range(0, len(left_ok), QUERY_CHUNK):
+        chunk = left_ok[start:start + QUERY_CHUNK]
+        found = tree.query_radius(to_rad(left_lat, left_lon, chunk), r=radius)
+        counts = np.fromiter((len(f) for f in found), dtype=np.int64, count=len(found))
+        lefts.append(np.repeat(chunk, counts))
+        rights.append(right_ok[np.concatenate(found)] if counts.sum() else empty)
+    return np.concatenate(lefts), np.concatenate(rights)
+
+
+def radius_join(left_lat, left_lon, right_lat, right_lon, radius_m):
+    """
+    All (left, right) pairs whose WGS84 geodesic distance is <= radius_m.
+    Returns a DataFrame with positional indices 'left', 'right' and 'distance_m'.
+    Points with missing or out-of-range coordinates never match.
+    """
+    left, right = candidate_pairs(left_lat, left_lon, right_lat, right_lon, radius_m)
+    lat1 = np.asarray(left_lat, dtype=float)[left]
+    lon1 = np.asarray(left_lon, dtype=float)[left]
+    lat2 = np.asarray(right_lat, dtype=float)[right]
+    lon2 = np.asarray(right_lon, dtype=float)[right]
+    dist = geodesic_m(lat1, lon1, lat2, lon2) if len(left) else np.empty(0)
+
+    pairs = pd.DataFrame({'left': left, 'right': right, 'distance_m': dist})
+    pairs = pairs[pairs['distance_m'] <= radius_m]
+    return pairs.sort_values(['left', 'right'], kind='stable', ignore_index=True)
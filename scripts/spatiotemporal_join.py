@@ -0,0 +1,285 @@
+"""
+SPATIO-TEMPORAL JOIN - ACLED events near each cultural-harm site, in a day window
+
+For every UNESCO damage site / stolen-object incident, finds the ACLED events
+within RADIUS_M metres and within [start - DAYS_BEFORE, end + DAYS_AFTER]:
+  * events are bucketed into radius-sized grid cells and sorted by (cell, day)
+  * each site binary-searches its 3x3 neighbouring cells for its day window,
+    so only events that are both close in space and in time are touched
+  * survivors are filtered by haversine distance (sphere, metres)
+
+Sites carry an interval: a UNESCO damage date is a single day, a stolen-object
+incident known only by year spans the whole year. Lag = days from the site
+interval to the event (negative = before, 0 = inside the interval).
+
+Outputs (per-site summaries):
+    processed_data/unesco_damage_acled_nearby.csv
+    processed_data/stolen_acled_nearby.csv
+
+Usage (from the repo root):
+    python scripts/spatiotemporal_join.py                 # radius/window from CONFIG
+    python scripts/spatiotemporal_join.py 2000 7 7        # radius_m days_before days_after
+    python scripts/spatiotemporal_join.py --benchmark 3000000
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+ACLED_PATH = 'processed_data/acled_clean.csv'
+UNESCO_PATH = 'raw_data/unesco_damage_sites.csv'
+STOLEN_PATH = 'data_stolen/5_stolen_objects_final.csv'
+OUT_UNESCO = 'processed_data/unesco_damage_acled_nearby.csv'
+OUT_STOLEN = 'processed_data/stolen_acled_nearby.csv'
+
+RADIUS_M = 5000
+DAYS_BEFORE = 14
+DAYS_AFTER = 14
+
+EARTH_RADIUS_M = 6_371_008.8
+M_PER_DEG = EARTH_RADIUS_M * np.pi / 180
+SITE_CHUNK = 2000        # sites per candidate-expansion batch
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def to_days(dates):
+    """Dates -> int days since epoch (NaT -> missing, as float NaN)"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    days = (dates - pd.Timestamp('1970-01-01')).dt.days
+    return days.to_numpy(dtype=float)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def grid_cells(lat, lon, cell_m, ref_lat):
+    """
+    Integer (row, col) cells of cell_m metres. Longitude is scaled by
+    cos(ref_lat) with ref_lat the highest |latitude| involved, so two points
+    closer than cell_m are always in the same or adjacent cells.
+    """
+    row = np.floor(lat * M_PER_DEG / cell_m).astype(np.int64)
+    col = np.floor(lon * M_PER_DEG * np.cos(np.radians(ref_lat)) / cell_m).astype(np.int64)
+    return row, col
+
+
+def cell_codes(row, col):
+    return (row + (1 << 31)) * (1 << 32) + (col + (1 << 31))
+
+
+def expand_ranges(lo, hi):
+    """Concatenated arange(lo[i], hi[i]) and the i each element came from"""
+    counts = hi - lo
+    owner = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    return np.arange(counts.sum()) + offsets, owner
+
+# ============================================================================
+# JOIN
+# ============================================================================
+
+def spatiotemporal_join(site_lat, site_lon, site_start, site_end,
+                        event_lat, event_lon, event_date,
+                        radius_m=RADIUS_M, days_before=DAYS_BEFORE, days_after=DAYS_AFTER):
+    """
+    All (site, event) pairs with distance <= radius_m and event day in
+    [site_start - days_before, site_end + days_after].
+    Returns a DataFrame with positional 'site', 'event', 'distance_m', 'lag_days'.
+    Sites or events with missing coordinates/dates never match.
+    """
+    site_lat = np.asarray(site_lat, dtype=float)
+    site_lon = np.asarray(site_lon, dtype=float)
+    site_start = to_days(site_start)
+    site_end = to_days(site_end)
+    event_lat = np.asarray(event_lat, dtype=float)
+    event_lon = np.asarray(event_lon, dtype=float)
+    event_day = to_days(event_date)
+
+    sites_ok = np.flatnonzero(~(np.isnan(site_lat) | np.isnan(site_lon)
+                                | np.isnan(site_start) | np.isnan(site_end)))
+    events_ok = np.flatnonzero(~(np.isnan(event_lat) | np.isnan(event_lon) | np.isnan(event_day)))
+    columns = {'site': np.int64, 'event': np.int64, 'distance_m': float, 'lag_days': np.int64}
+    if len(sites_ok) == 0 or len(events_ok) == 0:
+        return pd.DataFrame({c: np.empty(0, dtype=t) for c, t in columns.items()})
+
+    ref_lat = min(max(np.abs(site_lat[sites_ok]).max(), np.abs(event_lat[events_ok]).max()), 89.0)
+
+    # Events sorted by (cell, day); dense cell rank keeps the composite key small
+    e_row, e_col = grid_cells(event_lat[events_ok], event_lon[events_ok], radius_m, ref_lat)
+    e_code = cell_codes(e_row, e_col)
+    cells, e_rank = np.unique(e_code, return_inverse=True)
+    day0 = int(event_day[events_ok].min())
+    day_span = int(event_day[events_ok].max()) - day0 + 1
+    e_key = e_rank.astype(np.int64) * (day_span + 2) + (event_day[events_ok].astype(np.int64) - day0 + 1)
+    order = np.argsort(e_key, kind='stable')
+    e_key = e_key[order]
+    e_pos = events_ok[order]
+
+    frames = []
+    for start in range(0, len(sites_ok), SITE_CHUNK):
+        chunk = sites_ok[start:start + SITE_CHUNK]
+        s_row, s_col = grid_cells(site_lat[chunk], site_lon[chunk], radius_m, ref_lat)
+        first = np.clip(site_start[chunk] - days_before - day0 + 1, 0, day_span + 1).astype(np.int64)
+        last = np.clip(site_end[chunk] + days_after - day0 + 1, 0, day_span + 1).astype(np.int64)
+
+        lo_parts, hi_parts, owners = [], [], []
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                code = cell_codes(s_row + dr, s_col + dc)
+                rank = np.searchsorted(cells, code)
+                found = (rank < len(cells)) & (cells[np.minimum(rank, len(cells) - 1)] == code)
+                base = rank[found].astype(np.int64) * (day_span + 2)
+                lo_parts.append(np.searchsorted(e_key, base + first[found], side='left'))
+                hi_parts.append(np.searchsorted(e_key, base + last[found], side='right'))
+                owners.append(np.flatnonzero(found))
+
+        lo, hi, owner = np.concatenate(lo_parts), np.concatenate(hi_parts), np.concatenate(owners)
+        idx, which = expand_ranges(lo, hi)
+        site = chunk[owner[which]]
+        event = e_pos[idx]
+
+        dist = haversine_m(site_lat[site], site_lon[site], event_lat[event], event_lon[event])
+        near = dist <= radius_m
+        site, event, dist = site[near], event[near], dist[near]
+        day = event_day[event]
+        lag = np.where(day < site_start[site], day - site_start[site],
+                       np.where(day > site_end[site], day - site_end[site], 0)).astype(np.int64)
+        frames.append(pd.DataFrame({'site': site, 'event': event, 'distance_m': dist, 'lag_days': lag}))
+
+    links = pd.concat(frames, ignore_index=True)
+    return links.sort_values(['site', 'event'], kind='stable', ignore_index=True)
+
+
+def summarize_sites(links, n_sites, event_groups=None):
+    """
+    One row per site (positional index 0..n_sites-1):
+      n_events, nearest_event_m, nearest_event_lag_days (lag of the closest event),
+      closest_lag_days (signed lag with the smallest |lag|)
+    plus n_<group> counts when `event_groups` (one label per event) is given.
+    """
+    summary = pd.DataFrame(index=pd.RangeIndex(n_sites, name='site'))
+    summary['n_events'] = links.groupby('site').size().reindex(summary.index, fill_value=0)
+
+    if len(links):
+        nearest = links.loc[links.groupby('site')['distance_m'].idxmin()].set_index('site')
+        summary['nearest_event_m'] = nearest['distance_m'].round(1)
+        summary['nearest_event_lag_days'] = nearest['lag_days'].astype('Int64')
+        closest = links.assign(abs_lag=links['lag_days'].abs())
+        closest = closest.loc[closest.groupby('site')['abs_lag'].idxmin()].set_index('site')
+        summary['closest_lag_days'] = closest['lag_days'].astype('Int64')
+    else:
+        summary['nearest_event_m'] = np.nan
+        summary['nearest_event_lag_days'] = pd.array([pd.NA] * n_sites, dtype='Int64')
+        summary['closest_lag_days'] = pd.array([pd.NA] * n_sites, dtype='Int64')
+
+    if event_groups is not None and len(links):
+        groups = np.asarray(event_groups, dtype=object)[links['event'].to_numpy()]
+        counts = pd.crosstab(links['site'], groups).reindex(summary.index, fill_value=0)
+        counts.columns = [f'n_{c}' for c in counts.columns]
+        summary = summary.join(counts)
+    return summary
+
+# ============================================================================
+# DATASETS
+# ============================================================================
+
+def load_acled(path=ACLED_PATH):
+    acled = pd.read_csv(path, sep=';', usecols=lambda c: c in
+                        {'ACLED_Date', 'ACLED_Lat', 'ACLED_Lon', 'ACLED_EventType'})
+    acled['ACLED_Lat'] = pd.to_numeric(acled['ACLED_Lat'], errors='coerce')
+    acled['ACLED_Lon'] = pd.to_numeric(acled['ACLED_Lon'], errors='coerce')
+    return acled
+
+
+def unesco_sites(path=UNESCO_PATH):
+    unesco = pd.read_csv(path)
+    coords = unesco['Geo location'].astype(str).str.split(',', expand=True)
+    date = pd.to_datetime(unesco['Date of damage (first reported)'], errors='coerce')
+    return pd.DataFrame({
+        'name': unesco['Title of the damage site in English'],
+        'lat': pd.to_numeric(coords[0].str.strip(), errors='coerce'),
+        'lon': pd.to_numeric(coords[1].str.strip(), errors='coerce'),
+        'start': date,
+        'end': date,
+    })
+
+
+def stolen_sites(path=STOLEN_PATH):
+    stolen = pd.read_csv(path)
+    year = pd.to_datetime(stolen['year_incident'], errors='coerce').dt.year
+    return pd.DataFrame({
+        'id': stolen['id'],
+        'name': stolen['name'],
+        'lat': pd.to_numeric(stolen['latitude'], errors='coerce'),
+        'lon': pd.to_numeric(stolen['longitude'], errors='coerce'),
+        'start': pd.to_datetime(year.astype('Int64').astype(str) + '-01-01', errors='coerce'),
+        'end': pd.to_datetime(year.astype('Int64').astype(str) + '-12-31', errors='coerce'),
+    })
+
+
+def link_sites(sites, acled, radius_m=RADIUS_M, days_before=DAYS_BEFORE, days_after=DAYS_AFTER):
+    links = spatiotemporal_join(sites['lat'], sites['lon'], sites['start'], sites['end'],
+                                acled['ACLED_Lat'], acled['ACLED_Lon'], acled['ACLED_Date'],
+                                radius_m, days_before, days_after)
+    summary = summarize_sites(links, len(sites), acled.get('ACLED_EventType'))
+    return pd.concat([sites.reset_index(drop=True), summary.reset_index(drop=True)], axis=1)
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(n_events=3_000_000, n_sites=5_000, radius_m=RADIUS_M):
+    """Synthetic ACLED-like events clustered around front-line towns"""
+    rng = np.random.default_rng(0)
+    hubs = rng.uniform([46.0, 30.0], [51.5, 39.5], size=(300, 2))
+    hub = rng.integers(0, len(hubs), n_events)
+    lat = hubs[hub, 0] + rng.normal(0, 0.05, n_events)
+    lon = hubs[hub, 1] + rng.normal(0, 0.08, n_events)
+    dates = pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 4000, n_events), unit='D')
+
+    s_hub = rng.integers(0, len(hubs), n_sites)
+    s_lat = hubs[s_hub, 0] + rng.normal(0, 0.05, n_sites)
+    s_lon = hubs[s_hub, 1] + rng.normal(0, 0.08, n_sites)
+    s_date = pd.Timestamp('2022-02-24') + pd.to_timedelta(rng.integers(0, 1000, n_sites), unit='D')
+
+    print(f"{n_events:,} events x {n_sites:,} sites, {radius_m} m, ±{DAYS_BEFORE}/{DAYS_AFTER} days")
+    start = time.perf_counter()
+    links = spatiotemporal_join(s_lat, s_lon, s_date, s_date, lat, lon, dates, radius_m)
+    print(f"✓ {len(links):,} links in {time.perf_counter() - start:,.1f} s")
+    return links
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("CULTURAL HARM x ACLED (SPATIO-TEMPORAL JOIN)")
+    print("="*70)
+    if '--benchmark' in sys.argv:
+        args = [a for a in sys.argv[1:] if a != '--benchmark']
+        benchmark(int(args[0]) if args else 3_000_000)
+        sys.exit(0)
+
+    radius_m, days_before, days_after = RADIUS_M, DAYS_BEFORE, DAYS_AFTER
+    if len(sys.argv) == 4:
+        radius_m, days_before, days_after = float(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+
+    acled = load_acled()
+    print(f"✓ ACLED: {len(acled):,} events")
+    for label, sites, out in [('UNESCO damage', unesco_sites(), OUT_UNESCO),
+                              ('Stolen objects', stolen_sites(), OUT_STOLEN)]:
+        linked = link_sites(sites, acled, radius_m, days_before, days_after)
+        os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+        linked.to_csv(out, index=False)
+        print(f"✓ {label}: {(linked['n_events'] > 0).sum():,}/{len(linked):,} sites with events -> {out}")
@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import sys
+
+from fuzzy_match import fuzzy_matches, FIELDS as FUZZY_FIELDS
 
 # ============================================================================
 # 1. CARGAR DATOS
@@ -86,6 +89,44 @@ def extract_century(date_str):
 # 3. CRUCE DE DATOS
 # ============================================================================
 
+MIN_COMMON_WORDS = 3
+
+def build_token_index(stolen):
+    """
+    Índice invertido sobre los campos normalizados de los objetos robados:
+      name / author -> {valor normalizado: posiciones}
+      words         -> {palabra del nombre: posiciones ordenadas (np.array)}
+    Los valores vacíos no se indexan.
+    """
+    index = {'name': {}, 'author': {}, 'words': {}}
+    for pos, (name, author) in enumerate(zip(stolen['name_norm'], stolen['author_norm'])):
+        if name != '':
+            index['name'].setdefault(name, []).append(pos)
+            for word in set(name.split()):
+                index['words'].setdefault(word, []).append(pos)
+        if author != '':
+            index['author'].setdefault(author, []).append(pos)
+    index['words'] = {w: np.array(p, dtype=np.int64) for w, p in index['words'].items()}
+    return index
+
+def partial_name_candidates(words, postings, min_common=MIN_COMMON_WORDS):
+    """
+    Posiciones con al menos `min_common` palabras en común y cuántas comparten.
+    Un objeto que comparte `min_common` palabras aparece en al menos una de
+    las (k - min_common + 1) listas más cortas, así que solo esas generan
+    candidatos; las largas se consultan con búsqueda binaria.
+    """
+    lists = sorted((postings[w] for w in words if w in postings), key=len)
+    if len(lists) < min_common:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    candidates = np.unique(np.concatenate(lists[:len(lists) - min_common + 1]))
+    common = np.zeros(len(candidates), dtype=np.int64)
+    for plist in lists:
+        pos = np.searchsorted(plist, candidates)
+        common += (pos < len(plist)) & (plist[np.minimum(pos, len(plist) - 1)] == candidates)
+    keep = common >= min_common
+    return candidates[keep], common[keep]
+
 def find_matches(redlist, stolen):
     """Encuentra coincidencias entre Red List y objetos robados"""
     
@@ -110,86 +151,96 @@ def find_matches(redlist, stolen):
     print("  2. Coincidencia de autor + categoría similar")
     print("  3. Coincidencia parcial de nombre + autor")
     
-    for idx, red_obj in redlist.iterrows():
-        if idx % 10 == 0:
-            print(f"  Procesando objeto {idx+1}/{len(redlist)}...", end='\r')
-        
+    # Los candidatos salen del índice invertido, no de recorrer `stolen` entero
+    index = build_token_index(stolen)
+    stolen_cols = {c: stolen[c].tolist() for c in ['id', 'name', 'author', 'type', 'category']}
+    
+    def stolen_fields(pos):
+        return {
+            'stolen_id': stolen_cols['id'][pos],
+            'stolen_name': stolen_cols['name'][pos],
+            'stolen_author': stolen_cols['author'][pos],
+            'stolen_type': stolen_cols['type'][pos],
+            'stolen_category': stolen_cols['category'][pos],
+        }
+    
+    for i, red_obj in enumerate(redlist.to_dict('records')):
+        if i % 10 == 0:
+            print(f"  Procesando objeto {i+1}/{len(redlist)}...", end='\r')
+    
+        red_fields = {
+            'redlist_id': red_obj['ID'],
+            'redlist_title': red_obj['title'],
+            'redlist_author': red_obj['author'],
+            'redlist_category': red_obj['category'],
+        }
+    
         # Criterio 1: Coincidencia exacta de nombre
-        exact_matches = stolen[
-            (stolen['name_norm'] == red_obj['title_norm']) & 
-            (stolen['name_norm'] != '')
-        ]
-        
+        exact_matches = index['name'].get(red_obj['title_norm'], [])
+    
         if len(exact_matches) > 0:
-            for _, stolen_obj in exact_matches.iterrows():
+            for pos in exact_matches:
                 matches.append({
-                    'redlist_id': red_obj['ID'],
-                    'redlist_title': red_obj['title'],
-                    'redlist_author': red_obj['author'],
-                    'redlist_category': red_obj['category'],
-                    'stolen_id': stolen_obj['id'],
-                    'stolen_name': stolen_obj['name'],
-                    'stolen_author': stolen_obj['author'],
-                    'stolen_type': stolen_obj['type'],
-                    'stolen_category': stolen_obj['category'],
+                    **red_fields,
+                    **stolen_fields(pos),
                     'match_type': 'exact_name',
                     'confidence': 'high'
                 })
             continue
-        
+    
         # Criterio 2: Autor + categoría similar
         if red_obj['author_norm'] != '':
-            author_matches = stolen[
-                (stolen['author_norm'] == red_obj['author_norm']) &
-                (stolen['author_norm'] != '')
-            ]
-            
-            for _, stolen_obj in author_matches.iterrows():
+            for pos in index['author'].get(red_obj['author_norm'], []):
                 matches.append({
-                    'redlist_id': red_obj['ID'],
-                    'redlist_title': red_obj['title'],
-                    'redlist_author': red_obj['author'],
-                    'redlist_category': red_obj['category'],
-                    'stolen_id': stolen_obj['id'],
-                    'stolen_name': stolen_obj['name'],
-                    'stolen_author': stolen_obj['author'],
-                    'stolen_type': stolen_obj['type'],
-                    'stolen_category': stolen_obj['category'],
+                    **red_fields,
+                    **stolen_fields(pos),
                     'match_type': 'author_match',
                     'confidence': 'medium'
                 })
-        
+    
         # Criterio 3: Coincidencia parcial de nombre (al menos 3 palabras en común)
         if red_obj['title_norm'] != '':
             red_words = set(red_obj['title_norm'].split())
-            if len(red_words) >= 3:
-                for _, stolen_obj in stolen.iterrows():
-                    if stolen_obj['name_norm'] == '':
-                        continue
-                    
-                    stolen_words = set(stolen_obj['name_norm'].split())
-                    common_words = red_words & stolen_words
-                    
-                    if len(common_words) >= 3:
-                        matches.append({
-                            'redlist_id': red_obj['ID'],
-                            'redlist_title': red_obj['title'],
-                            'redlist_author': red_obj['author'],
-                            'redlist_category': red_obj['category'],
-                            'stolen_id': stolen_obj['id'],
-                            'stolen_name': stolen_obj['name'],
-                            'stolen_author': stolen_obj['author'],
-                            'stolen_type': stolen_obj['type'],
-                            'stolen_category': stolen_obj['category'],
-                            'match_type': 'partial_name',
-                            'confidence': 'low',
-                            'common_words': len(common_words)
-                        })
+            if len(red_words) >= MIN_COMMON_WORDS:
+                positions, common = partial_name_candidates(red_words, index['words'])
+                for pos, n_common in zip(positions.tolist(), common.tolist()):
+                    matches.append({
+                        **red_fields,
+                        **stolen_fields(pos),
+                        'match_type': 'partial_name',
+                        'confidence': 'low',
+                        'common_words': n_common
+                    })
     
     print(f"\n✓ Búsqueda completada")
     
     return pd.DataFrame(matches)
 
+def add_fuzzy_matches(matches, redlist, stolen, thresholds=None):
+    """Añade las coincidencias aproximadas (fuzzy_match) de pares aún no encontrados"""
+    print("\nBuscando coincidencias aproximadas (MinHash LSH)...")
+    fuzzy = fuzzy_matches(redlist, stolen, thresholds=thresholds)
+    if len(matches) > 0:
+        seen = pd.MultiIndex.from_frame(matches[['redlist_id', 'stolen_id']])
+        fuzzy = fuzzy[~pd.MultiIndex.from_frame(fuzzy[['redlist_id', 'stolen_id']]).isin(seen)]
+    fuzzy = fuzzy.drop_duplicates(['redlist_id', 'stolen_id'])
+    print(f"✓ {len(fuzzy)} coincidencias aproximadas nuevas")
+    return pd.concat([matches, fuzzy], ignore_index=True)
+
+def fuzzy_thresholds_from_args(argv):
+    """--fuzzy-title=0.9 / --fuzzy-author=0.8 -> {'title': 0.9, 'author': 0.8}"""
+    thresholds = {}
+    for arg in argv:
+        if arg.startswith('--fuzzy-') and '=' in arg:
+            field, value = arg[len('--fuzzy-'):].split('=', 1)
+            if field not in FUZZY_FIELDS:
+                sys.exit(f"❌ Campo desconocido en {arg}: usa --fuzzy-{{{','.join(FUZZY_FIELDS)}}}=<umbral>")
+            try:
+                thresholds[field] = float(value)
+            except ValueError:
+                sys.exit(f"❌ Umbral no numérico en {arg} (ej: --fuzzy-{field}=0.85)")
+    return thresholds
+
 # ============================================================================
 # 4. ANÁLISIS Y ESTADÍSTICAS
 # ============================================================================
@@ -328,6 +379,10 @@ if __name__ == "__main__":
     # Buscar coincidencias
     matches = find_matches(redlist, stolen)
     
+    # Coincidencias aproximadas (opcional): --fuzzy [--fuzzy-title=0.9 --fuzzy-author=0.85]
+    if '--fuzzy' in sys.argv:
+        matches = add_fuzzy_matches(matches, redlist, stolen, fuzzy_thresholds_from_args(sys.argv))
+    
     # Análisis
     analyze_data(redlist, stolen, matches)
     
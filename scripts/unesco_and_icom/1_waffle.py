@@ -1,6 +1,12 @@
 import pandas as pd
 import altair as alt
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from keyword_rules import RuleSet
+from data_sources import read_csv
 
 URL_UNESCO_PROTETTI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/2_ukraine_list_qid_coord.csv"
 URL_UNESCO_DANNEGGIATI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/cultural_damage_l4R_wiki_enriched.csv"
@@ -22,22 +28,30 @@ DAMAGE_CATEGORY_LABELS = [
 ]
 
 
-def map_damage_category(row):
-    text = f"{str(row.get('name', ''))} {str(row.get('instance_of_label', ''))} {str(row.get('Title of the damage site in English', ''))}".lower()
-    if any(k in text for k in ["religious", "church", "cathedral", "monastery", "собор"]):
-        return "Religious Heritage"
-    if any(k in text for k in ["museum", "музей", "gallery"]):
-        return "Museums & Arts"
-    if any(k in text for k in ["library", "archive"]):
-        return "Libraries & Archives"
-    return "Other Historic Sites"
+DAMAGE_CATEGORY_RULES = RuleSet([
+    ("Religious Heritage", ["religious", "church", "cathedral", "monastery", "собор"]),
+    ("Museums & Arts", ["museum", "музей", "gallery"]),
+    ("Libraries & Archives", ["library", "archive"]),
+], default="Other Historic Sites")
+
+DAMAGE_TEXT_COLS = ["name", "instance_of_label", "Title of the damage site in English"]
+
+
+def damage_texts(df):
+    parts = [df[c].astype(object).map(str) if c in df.columns else pd.Series("", index=df.index)
+             for c in DAMAGE_TEXT_COLS]
+    return (parts[0] + " " + parts[1] + " " + parts[2]).str.lower()
+
+
+def map_damage_category(df):
+    return DAMAGE_CATEGORY_RULES.classify(damage_texts(df))
 
 def main():
     print("Building the Protection Gap Grid...")
 
-    df_p = pd.read_csv(URL_UNESCO_PROTETTI, sep=';')
+    df_p = read_csv(URL_UNESCO_PROTETTI, sep=';')
     df_p["category"] = df_p["category"].str.strip()
-    df_d = pd.read_csv(URL_UNESCO_DANNEGGIATI)
+    df_d = read_csv(URL_UNESCO_DANNEGGIATI)
 
     waffle_elements = []
 
@@ -62,7 +76,8 @@ def main():
         })
 
     # b. unprotected damaged sites
-    df_d["mapped_cat"] = df_d.apply(map_damage_category, axis=1)
+    df_d["mapped_cat"] = map_damage_category(df_d)
+    print(DAMAGE_CATEGORY_RULES.report(damage_texts(df_d)).to_string(index=False))
     for _, row in df_d.iterrows():
         name = row.get("name") or row.get("Title of the damage site in English") or "Unnamed Site"
         waffle_elements.append({
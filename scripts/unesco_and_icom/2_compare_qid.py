@@ -1,5 +1,8 @@
-import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data_sources import read_csv
 
 URL_UNESCO_LIST = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/2_ukraine_list_qid_coord.csv"
 URL_UNESCO_DAMAGED = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/unesco-damage-sites-qid.csv"
@@ -9,9 +12,9 @@ def run_matching_analysis():
     print("--- Avvio Analisi di Matching ---")
     
     try:
-        df_u_list = pd.read_csv(URL_UNESCO_LIST, sep=';', on_bad_lines='skip')
-        df_u_damaged = pd.read_csv(URL_UNESCO_DAMAGED, sep=None, engine='python', on_bad_lines='skip')
-        df_l4r = pd.read_csv(URL_L4R, sep=None, engine='python', on_bad_lines='skip')
+        df_u_list = read_csv(URL_UNESCO_LIST, sep=';', on_bad_lines='skip')
+        df_u_damaged = read_csv(URL_UNESCO_DAMAGED, sep=None, engine='python', on_bad_lines='skip')
+        df_l4r = read_csv(URL_L4R, sep=None, engine='python', on_bad_lines='skip')
         print("Dati caricati correttamente.")
     except Exception as e:
         print(f"Errore nel caricamento: {e}")
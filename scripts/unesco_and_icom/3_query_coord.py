@@ -3,47 +3,22 @@ aggiungo coordinate ai siti di unesco list
 """
 
 import pandas as pd
-import requests
-import time
 import os
+import sys
 
-def get_wikidata_coordinates(qids):
-    """Interroga Wikidata per ottenere le coordinate di una lista di QID (P625)."""
-    endpoint_url = "https://query.wikidata.org/sparql"
-    
-    valid_qids = [q for q in qids if isinstance(q, str) and q.startswith('Q')]
-    if not valid_qids:
-        return {}
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from wikidata_batch import lookup_properties
 
-    qid_formatted = " ".join([f"wd:{q}" for q in valid_qids])
-    
-    query = f"""
-    SELECT ?item ?coords WHERE {{
-      VALUES ?item {{ {qid_formatted} }}
-      ?item wdt:P625 ?coords.
-    }}
-    """
-    
-    headers = {
-        'User-Agent': 'UNESCO-Bot/1.0 (https://example.org/; user@example.com)',
-        'Accept': 'application/sparql-results+json'
-    }
-    
-    try:
-        response = requests.get(endpoint_url, params={'query': query, 'format': 'json'}, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        results = {}
-        for row in data['results']['bindings']:
-            qid = row['item']['value'].split('/')[-1]
-            raw_coords = row['coords']['value'].replace('Point(', '').replace(')', '')
-            lon, lat = raw_coords.split(' ')
-            results[qid] = f"{lat}, {lon}"
-        return results
-    except Exception as e:
-        print(f"Errore durante l'interrogazione SPARQL: {e}")
-        return {}
+def get_wikidata_coordinates(qids):
+    """Interroga Wikidata per ottenere le coordinate di una lista di QID (P625), a blocchi."""
+    values = lookup_properties(qids, ["P625"])
+
+    results = {}
+    for qid, raw in zip(values['qid'], values['value']):
+        raw_coords = raw.replace('Point(', '').replace(')', '')
+        lon, lat = raw_coords.split(' ')
+        results[qid] = f"{lat}, {lon}"
+    return results
 
 def process_unesco_csv(input_path, output_path):
     if not os.path.exists(input_path):
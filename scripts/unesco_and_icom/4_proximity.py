@@ -1,8 +1,12 @@
 import pandas as pd
 import altair as alt
-from geopy.distance import geodesic
 import re
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from spatial_join import radius_join
+from data_sources import read_csv
 
 URL_UNESCO_PROTETTI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/2_ukraine_list_qid_coord.csv"
 URL_UNESCO_DANNEGGIATI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/cultural_damage_l4R_wiki_enriched.csv"
@@ -23,8 +27,8 @@ def categorize_distance(dist_m):
 
 def main():
     print("Caricamento dati...")
-    df_p = pd.read_csv(URL_UNESCO_PROTETTI, sep=";")
-    df_d = pd.read_csv(URL_UNESCO_DANNEGGIATI)
+    df_p = read_csv(URL_UNESCO_PROTETTI, sep=";")
+    df_d = read_csv(URL_UNESCO_DANNEGGIATI)
 
     df_p["p_coords"] = df_p["coordinates"].apply(parse_coords)
     df_p = df_p.dropna(subset=["p_coords"]).reset_index(drop=True)
@@ -32,27 +36,25 @@ def main():
     df_d['latitude'] = pd.to_numeric(df_d['latitude'], errors='coerce')
     df_d['longitude'] = pd.to_numeric(df_d['longitude'], errors='coerce')
     df_d = df_d.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
-    df_d["d_coords"] = list(zip(df_d["latitude"], df_d["longitude"]))
 
-    intersections = []
     print(f"Calcolo intersezioni spaziali per {len(df_p)} siti protetti...")
 
-    for _, p in df_p.iterrows():
-        for _, d in df_d.iterrows():
-            try:
-                dist_m = geodesic(p['p_coords'], d['d_coords']).meters
-                if dist_m <= 1000:
-                    intersections.append({
-                        'UNESCO_Protected_Name': p['name'],
-                        'UNESCO_Damaged_Name': d.get('name', d.get('Title of the damage site in English')),
-                        'Distance_m': round(dist_m, 1),
-                        'Category': p.get('category', 'N/A'),
-                        'Damage_Date': d.get('Date of damage (first reported)', '2022-2023')
-                    })
-            except:
-                continue
-
-    report_df = pd.DataFrame(intersections)
+    p_lat = df_p["p_coords"].str[0]
+    p_lon = df_p["p_coords"].str[1]
+    pairs = radius_join(p_lat, p_lon, df_d["latitude"], df_d["longitude"], radius_m=1000)
+    p = df_p.iloc[pairs["left"]].reset_index(drop=True)
+    d = df_d.iloc[pairs["right"]].reset_index(drop=True)
+
+    def column(df, name, default):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+    report_df = pd.DataFrame({
+        'UNESCO_Protected_Name': p['name'],
+        'UNESCO_Damaged_Name': column(d, 'name', column(d, 'Title of the damage site in English', None)),
+        'Distance_m': pairs['distance_m'].round(1),
+        'Category': column(p, 'category', 'N/A'),
+        'Damage_Date': column(d, 'Date of damage (first reported)', '2022-2023'),
+    })
 
     if report_df.empty:
         print("Nessuna intersezione trovata.")
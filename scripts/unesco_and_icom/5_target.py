@@ -1,8 +1,13 @@
 import pandas as pd
 import altair as alt
-from geopy.distance import geodesic
 import re
 import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from spatial_join import radius_join
+from data_sources import read_csv
 
 URL_UNESCO_PROTETTI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/2_ukraine_list_qid_coord.csv"
 URL_UNESCO_DANNEGGIATI = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/processed_data/cultural_damage_l4R_wiki_enriched.csv"
@@ -51,8 +56,8 @@ def circle_points(radius_m, n_points=120):
     return pd.DataFrame(pts)
 
 def main():
-    df_p = pd.read_csv(URL_UNESCO_PROTETTI, sep=";")
-    df_d = pd.read_csv(URL_UNESCO_DANNEGGIATI)
+    df_p = read_csv(URL_UNESCO_PROTETTI, sep=";")
+    df_d = read_csv(URL_UNESCO_DANNEGGIATI)
 
     df_p["p_coords"] = df_p["coordinates"].apply(parse_coords)
     d_coord_col = df_d.columns[df_d.columns.str.contains("Geo|coord", case=False)][0]
@@ -61,18 +66,25 @@ def main():
     df_p = df_p.dropna(subset=["p_coords"])
     df_d = df_d.dropna(subset=["d_coords"])
 
-    intersections = []
-    for _, p in df_p.iterrows():
-        for _, d in df_d.iterrows():
-            dist = geodesic(p["p_coords"], d["d_coords"]).meters
-            if dist <= 1000:
-                intersections.append({
-                    "UNESCO_Protected_Name": p["name"],
-                    "UNESCO_Damaged_Name": d.get("name") or d.get("Title of the damage site in English"),
-                    "Distance_m": round(dist, 1),
-                })
-
-    df_int = pd.DataFrame(intersections)
+    pairs = radius_join(
+        df_p["p_coords"].str[0], df_p["p_coords"].str[1],
+        df_d["d_coords"].str[0], df_d["d_coords"].str[1],
+        radius_m=1000,
+    )
+    p = df_p.iloc[pairs["left"]].reset_index(drop=True)
+    d = df_d.iloc[pairs["right"]].reset_index(drop=True)
+
+    titles = d.get("Title of the damage site in English", pd.Series(None, index=d.index, dtype=object))
+    if "name" in d.columns:
+        damaged_names = d["name"].where(d["name"] != "", titles)
+    else:
+        damaged_names = titles
+
+    df_int = pd.DataFrame({
+        "UNESCO_Protected_Name": p["name"],
+        "UNESCO_Damaged_Name": damaged_names,
+        "Distance_m": pairs["distance_m"].round(1),
+    })
     df_focus = df_int[df_int["UNESCO_Protected_Name"] == TARGET_SITE].copy()
 
     if df_focus.empty:
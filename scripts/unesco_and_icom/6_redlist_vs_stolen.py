@@ -1,6 +1,13 @@
 import pandas as pd
+import numpy as np
 import altair as alt
 import re
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from keyword_rules import RuleSet
+from data_sources import read_csv
 
 URL_RED_LIST = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/raw_data/red_list.csv"
 URL_STOLEN = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/refs/heads/main/data_stolen/5_stolen_objects_final.csv"
@@ -17,14 +24,6 @@ def safe_str(x) -> str:
     return str(x).strip()
 
 
-def text_blob(row, cols) -> str:
-    parts = []
-    for c in cols:
-        if c in row.index and pd.notna(row[c]):
-            parts.append(str(row[c]))
-    return " ".join(parts).lower()
-
-
 def extract_year(val):
     """Extract first 3–4 digit year from date_normalized/date fields (supports strings/ranges)."""
     if pd.isna(val):
@@ -102,27 +101,63 @@ ARCH_OBJECT_WEAK = [
 ]
 
 
-def normalize_redlist(cat: str) -> str:
+REDLIST_RULES = RuleSet([
+    ("PAINTINGS", ["painting"]),
+    ("ARCHAEOLOGY", ["archaeolog"]),
+    ("ICONS", ["icon"]),
+    ("BOOKS / MANUSCRIPTS", ["manuscript", "book"]),
+    ("RELIGIOUS OBJECTS", ["religious"]),
+], default="OTHER / MISC")
+
+
+def normalize_redlist(cats) -> pd.Series:
     """Red List → our 5 bins."""
-    cat_l = safe_str(cat).lower()
+    return REDLIST_RULES.classify(cats.map(safe_str))
+
+
+# All keyword lists compiled into one automaton: one pass per text blob
+ICOM_RULES = RuleSet([
+    ("icon", ICON_KW),
+    ("books", BOOKS_KW),
+    ("arch_context", ARCH_CONTEXT_KW),
+    ("arch_strong", ARCH_OBJECT_STRONG),
+    ("arch_weak", ARCH_OBJECT_WEAK),
+    ("religious", RELIGIOUS_KW),
+    ("painting", PAINTING_KW),
+])
+
+# Cues taken from the raw category label alone
+CATEGORY_CUES = RuleSet([
+    ("icon", ["icon"]),
+    ("books", ["manuscript", "book"]),
+    ("religious", ["religious"]),
+    ("painting", ["painting"]),
+])
+
+TEXT_COLS = [
+    "category", "title", "name", "description",
+    "object_type", "type", "materials", "technique", "notes"
+]
 
-    if "painting" in cat_l:
-        return "PAINTINGS"
-    if "archaeolog" in cat_l:
-        return "ARCHAEOLOGY"
-    if "icon" in cat_l:
-        return "ICONS"
-    if "manuscript" in cat_l or "book" in cat_l:
-        return "BOOKS / MANUSCRIPTS"
-    if "religious" in cat_l:
-        return "RELIGIOUS OBJECTS"
 
-    return "OTHER / MISC"
+def text_blobs(df, cols) -> pd.Series:
+    """Per row: non-null values of `cols` joined by spaces, lowercased."""
+    blobs = pd.Series("", index=df.index, dtype=object)
+    started = np.zeros(len(df), dtype=bool)
+    for c in cols:
+        if c not in df.columns:
+            continue
+        present = df[c].notna().to_numpy()
+        values = df[c].astype(object).map(str, na_action="ignore")
+        sep = np.where(started, " ", "")
+        blobs = blobs.where(~present, blobs + sep + values)
+        started |= present
+    return blobs.str.lower()
 
 
-def map_stolen_to_icom(row) -> str:
+def map_stolen_to_icom(df) -> pd.Series:
     """
-    Map stolen objects → ICOM categories using proxies.
+    Map stolen objects → ICOM categories using proxies (one label per row).
     Priority:
       1) ICONS
       2) BOOKS / MANUSCRIPTS
@@ -131,59 +166,47 @@ def map_stolen_to_icom(row) -> str:
       5) PAINTINGS
       6) OTHER / MISC
     """
-
-    cols_for_text = []
-    for c in [
-        "category", "title", "name", "description",
-        "object_type", "type", "materials", "technique", "notes"
-    ]:
-        if c in row.index:
-            cols_for_text.append(c)
-
-    blob = text_blob(row, cols_for_text)
-    cat_raw = safe_str(row.get("category", "")).lower()
-
-  
-    if ("icon" in cat_raw) or any(k in blob for k in ICON_KW):
-        return "ICONS"
-
-    if ("manuscript" in cat_raw) or ("book" in cat_raw) or any(k in blob for k in BOOKS_KW):
-        return "BOOKS / MANUSCRIPTS"
-
-    context_hit = any(k in blob for k in ARCH_CONTEXT_KW)
-    strong_hit = any(k in blob for k in ARCH_OBJECT_STRONG)
-    weak_hit = any(k in blob for k in ARCH_OBJECT_WEAK)
-
-    year = None
-    if "date_normalized" in row.index:
-        year = extract_year(row.get("date_normalized"))
-    elif "date" in row.index:
-        year = extract_year(row.get("date"))
-
-    early_date_hit = (year is not None and year <= ARCHAEOLOGY_DATE_THRESHOLD)
+    hits = ICOM_RULES.hits(text_blobs(df, TEXT_COLS))
+    hit = lambda name: hits[name].to_numpy()
+
+    if "category" in df.columns:
+        cat_raw = df["category"].map(safe_str)
+    else:
+        cat_raw = pd.Series("", index=df.index)
+    cat_hits = CATEGORY_CUES.hits(cat_raw)
+    cat_has = lambda name: cat_hits[name].to_numpy()
+
+    if "date_normalized" in df.columns:
+        years = df["date_normalized"].map(extract_year)
+    elif "date" in df.columns:
+        years = df["date"].map(extract_year)
+    else:
+        years = pd.Series(None, index=df.index, dtype=object)
+    early_date_hit = years.map(
+        lambda y: y is not None and y <= ARCHAEOLOGY_DATE_THRESHOLD
+    ).to_numpy(dtype=bool)
 
     # archaeology if:
     # - strong contextual cue
     # - OR strong object cue
     # - OR weak object cue + early date support
-    if context_hit or strong_hit or (weak_hit and early_date_hit):
-        return "ARCHAEOLOGY"
-
-    if ("religious" in cat_raw) or any(k in blob for k in RELIGIOUS_KW):
-        return "RELIGIOUS OBJECTS"
-
-    if ("painting" in cat_raw) or any(k in blob for k in PAINTING_KW):
-        return "PAINTINGS"
-
-    return "OTHER / MISC"
+    conditions = [
+        cat_has("icon") | hit("icon"),
+        cat_has("books") | hit("books"),
+        hit("arch_context") | hit("arch_strong") | (hit("arch_weak") & early_date_hit),
+        cat_has("religious") | hit("religious"),
+        cat_has("painting") | hit("painting"),
+    ]
+    choices = ["ICONS", "BOOKS / MANUSCRIPTS", "ARCHAEOLOGY", "RELIGIOUS OBJECTS", "PAINTINGS"]
+    return pd.Series(np.select(conditions, choices, default="OTHER / MISC"), index=df.index)
 
 
 def generate_chart():
-    df_r = pd.read_csv(URL_RED_LIST)
-    df_s = pd.read_csv(URL_STOLEN)
+    df_r = read_csv(URL_RED_LIST)
+    df_s = read_csv(URL_STOLEN)
 
-    df_r["cat_clean"] = df_r["category"].apply(normalize_redlist)
-    df_s["cat_clean"] = df_s.apply(map_stolen_to_icom, axis=1)
+    df_r["cat_clean"] = normalize_redlist(df_r["category"])
+    df_s["cat_clean"] = map_stolen_to_icom(df_s)
 
     red_counts = df_r["cat_clean"].value_counts().to_dict()
     stolen_counts = df_s["cat_clean"].value_counts().to_dict()
@@ -0,0 +1,406 @@
+"""
+VECTOR TILES - offline tile pyramid for the combined cultural-harm map
+
+Builds one Mapbox Vector Tile (MVT) pyramid from the stolen-objects,
+Hermitage, UNESCO-damage and ACLED point layers and writes it as a single
+static file:
+  * .pmtiles  -> read straight from any static host with HTTP range requests
+                 (MapLibre + the pmtiles protocol), no tile server
+  * .mbtiles  -> SQLite container for desktop GIS / tile tooling
+
+Per zoom level:
+  * below CLUSTER_MAX_ZOOM, points closer than CLUSTER_RADIUS screen pixels
+    are merged into one cluster feature (point_count + dominant group)
+  * attributes are thinned: each layer lists the minimum zoom at which an
+    attribute starts to travel with single points
+
+Usage (from the repo root):
+    python scripts/vector_tiles.py                 # both formats
+    python scripts/vector_tiles.py pmtiles         # only one of them
+"""
+
+import gzip
+import json
+import math
+import os
+import sqlite3
+import struct
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+OUTPUT_BASE = 'processed_data/cultural_harm_points'
+
+MIN_ZOOM = 0
+MAX_ZOOM = 14
+CLUSTER_MAX_ZOOM = 11     # from this zoom on every point is its own feature
+CLUSTER_RADIUS = 40       # px (on a 256 px tile)
+EXTENT = 4096             # MVT tile extent
+
+UKRAINE_BBOX = (22.0, 44.0, 41.5, 53.8)   # lon_min, lat_min, lon_max, lat_max
+
+# layer -> source file, coordinate columns, group column and attributes with
+# the minimum zoom at which they are kept on single points
+LAYERS = {
+    'stolen': {
+        'path': 'data_stolen/5_stolen_objects_final.csv',
+        'lat': 'latitude', 'lon': 'longitude',
+        'group': 'category',
+        'attributes': {'category': 0, 'id': 8, 'name': 11, 'place_incident': 11},
+    },
+    'hermitage': {
+        'path': 'data_hermitage/5_FINAL_hermitage_ukraine.csv',
+        'lat': 'latitude', 'lon': 'longitude',
+        'group': 'category',
+        'attributes': {'category': 0, 'period_category': 8, 'object_name': 11, 'find_location': 11},
+    },
+    'unesco': {
+        'path': 'raw_data/unesco_damage_sites.csv',
+        'geo_location': 'Geo location',
+        'group': 'Type of damanged site',
+        'attributes': {'Type of damanged site': 0, 'Region': 8,
+                       'Title of the damage site in English': 11,
+                       'Date of damage (first reported)': 11},
+    },
+    'acled': {
+        'path': 'raw_data/ACLED Data_Destruction_Looting.csv',
+        'lat': 'latitude', 'lon': 'longitude',
+        'group': 'sub_event_type',
+        'attributes': {'sub_event_type': 0, 'event_date': 8, 'event_id_cnty': 8,
+                       'location': 11, 'fatalities': 11},
+    },
+}
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+def load_layer(spec):
+    """Read a layer, returning a frame with lon/lat + its attribute columns"""
+    df = pd.read_csv(spec['path'])
+    if 'geo_location' in spec:
+        coords = df[spec['geo_location']].astype(str).str.split(',', expand=True)
+        df['lat'] = pd.to_numeric(coords[0].str.strip(), errors='coerce')
+        df['lon'] = pd.to_numeric(coords[1].str.strip(), errors='coerce') if coords.shape[1] > 1 else np.nan
+    else:
+        df['lat'] = pd.to_numeric(df[spec['lat']], errors='coerce')
+        df['lon'] = pd.to_numeric(df[spec['lon']], errors='coerce')
+
+    lon_min, lat_min, lon_max, lat_max = UKRAINE_BBOX
+    df = df[df['lat'].between(lat_min, lat_max) & df['lon'].between(lon_min, lon_max)]
+    columns = ['lon', 'lat'] + [c for c in spec['attributes'] if c in df.columns]
+    return df[columns].reset_index(drop=True)
+
+
+def load_layers(layers=LAYERS):
+    frames = {}
+    for name, spec in layers.items():
+        if not os.path.exists(spec['path']):
+            print(f"  ⚠ {name}: {spec['path']} not found, skipped")
+            continue
+        frames[name] = load_layer(spec)
+        print(f"  ✓ {name}: {len(frames[name]):,} points")
+    return frames
+
+# ============================================================================
+# CLUSTERING (one zoom level, vectorized)
+# ============================================================================
+
+def to_world_pixels(lon, lat, zoom):
+    """Web-Mercator pixel coordinates of a 256 px tile pyramid at `zoom`"""
+    size = 256 * 2 ** zoom
+    x = (np.asarray(lon, dtype=float) + 180.0) / 360.0 * size
+    sin = np.sin(np.radians(np.asarray(lat, dtype=float)))
+    y = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)) * size
+    return x, y
+
+
+def zoom_features(df, spec, zoom):
+    """
+    Features of one layer at one zoom: DataFrame with world-pixel x/y and the
+    properties that travel at this zoom (clusters only carry count + group).
+    """
+    x, y = to_world_pixels(df['lon'], df['lat'], zoom)
+    keep = [c for c, min_zoom in spec['attributes'].items() if min_zoom <= zoom and c in df.columns]
+
+    if zoom >= CLUSTER_MAX_ZOOM:
+        points = df[keep].copy()
+        points['x'], points['y'] = x, y
+        return points
+
+    group = spec['group'] if spec['group'] in df.columns else None
+    cells = pd.DataFrame({
+        'cx': np.floor(x / CLUSTER_RADIUS).astype(np.int64),
+        'cy': np.floor(y / CLUSTER_RADIUS).astype(np.int64),
+        'x': x, 'y': y,
+        'i': np.arange(len(df)),
+    })
+    grouped = cells.groupby(['cx', 'cy'], sort=False)
+    out = grouped.agg(x=('x', 'mean'), y=('y', 'mean'), point_count=('x', 'size'),
+                      first=('i', 'first')).reset_index(drop=True)
+
+    # single points keep their (thinned) attributes, clusters the dominant group
+    single = out['point_count'] == 1
+    props = df.loc[out['first'], keep].reset_index(drop=True).astype(object)
+    props.loc[~single] = None
+    if group is not None:
+        counts = cells.assign(g=df[group].to_numpy()).groupby(['cx', 'cy', 'g'], sort=False).size()
+        dominant = counts.sort_values(ascending=False, kind='stable').reset_index()
+        dominant = dominant.drop_duplicates(['cx', 'cy']).set_index(['cx', 'cy'])['g']
+        keys = cells.loc[out['first'], ['cx', 'cy']]
+        props[group] = dominant.reindex(pd.MultiIndex.from_frame(keys)).to_numpy()
+
+    result = pd.concat([out[['x', 'y']], props], axis=1)
+    result['point_count'] = out['point_count'].where(~single).astype('Int64')
+    return result
+
+# ============================================================================
+# MVT ENCODING (minimal protobuf writer, points only)
+# ============================================================================
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, wire_type, payload):
+    key = _varint((number << 3) | wire_type)
+    if wire_type == 2:
+        return key + _varint(len(payload)) + payload
+    return key + payload
+
+
+def _encode_value(value):
+    if isinstance(value, (bool, np.bool_)):
+        return _field(7, 0, _varint(int(value)))
+    if isinstance(value, (int, np.integer)):
+        return _field(6, 0, _varint(_zigzag(int(value)) & 0xFFFFFFFFFFFFFFFF))
+    if isinstance(value, (float, np.floating)):
+        if float(value).is_integer():
+            return _field(6, 0, _varint(_zigzag(int(value)) & 0xFFFFFFFFFFFFFFFF))
+        return _field(3, 1, struct.pack('<d', float(value)))
+    return _field(1, 2, str(value).encode('utf-8'))
+
+
+def encode_layer(name, features):
+    """features: iterable of (x, y, {key: value}) in tile coordinates"""
+    keys, values, body = {}, {}, bytearray()
+    for x, y, props in features:
+        tags = []
+        for key, value in props.items():
+            if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+                continue
+            k = keys.setdefault(key, len(keys))
+            v = values.setdefault((type(value).__name__, value), len(values))
+            tags += [k, v]
+        geometry = b''.join(_varint(v) for v in (9, _zigzag(int(x)), _zigzag(int(y))))
+        feature = (_field(2, 2, b''.join(_varint(t) for t in tags)) if tags else b'')
+        feature += _field(3, 0, _varint(1)) + _field(4, 2, geometry)
+        body += _field(2, 2, feature)
+
+    layer = _field(15, 0, _varint(2)) + _field(1, 2, name.encode('utf-8')) + bytes(body)
+    layer += b''.join(_field(3, 2, k.encode('utf-8')) for k in keys)
+    layer += b''.join(_field(4, 2, _encode_value(v)) for (_, v) in values)
+    layer += _field(5, 0, _varint(EXTENT))
+    return _field(3, 2, layer)
+
+# ============================================================================
+# PYRAMID
+# ============================================================================
+
+def build_tiles(frames, layers=LAYERS, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """Yield ((z, x, y), gzipped MVT bytes) for every non-empty tile"""
+    for zoom in range(min_zoom, max_zoom + 1):
+        per_tile = {}
+        for name, df in frames.items():
+            feats = zoom_features(df, layers[name], zoom)
+            if feats.empty:
+                continue
+            tx = np.floor(feats['x'] / 256).astype(np.int64)
+            ty = np.floor(feats['y'] / 256).astype(np.int64)
+            lx = np.round((feats['x'] - tx * 256) / 256 * EXTENT).astype(np.int64)
+            ly = np.round((feats['y'] - ty * 256) / 256 * EXTENT).astype(np.int64)
+            props = feats.drop(columns=['x', 'y']).astype(object)
+            records = props.where(props.notna(), None).to_dict('records')
+            for key, idx in pd.Series(range(len(feats))).groupby([tx, ty]).groups.items():
+                per_tile.setdefault(key, []).append(
+                    (name, [(lx.iat[i], ly.iat[i], records[i]) for i in idx])
+                )
+        for (x, y), tile_layers in sorted(per_tile.items()):
+            data = b''.join(encode_layer(name, feats) for name, feats in tile_layers)
+            yield (zoom, int(x), int(y)), gzip.compress(data, mtime=0)
+        print(f"  z{zoom:<2} {len(per_tile):>6,} tiles")
+
+
+def tilejson_metadata(frames, layers=LAYERS):
+    lon_min, lat_min, lon_max, lat_max = UKRAINE_BBOX
+    vector_layers = []
+    for name in frames:
+        fields = {c: 'String' for c in layers[name]['attributes']}
+        fields['point_count'] = 'Number'
+        vector_layers.append({'id': name, 'fields': fields,
+                              'minzoom': MIN_ZOOM, 'maxzoom': MAX_ZOOM})
+    return {
+        'name': 'cultural_harm_points',
+        'format': 'pbf',
+        'minzoom': MIN_ZOOM,
+        'maxzoom': MAX_ZOOM,
+        'bounds': [lon_min, lat_min, lon_max, lat_max],
+        'center': [(lon_min + lon_max) / 2, (lat_min + lat_max) / 2, 5],
+        'vector_layers': vector_layers,
+    }
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+def write_mbtiles(path, tiles, metadata):
+    if os.path.exists(path):
+        os.remove(path)
+    con = sqlite3.connect(path)
+    con.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+    con.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, '
+                'tile_row INTEGER, tile_data BLOB)')
+    con.execute('CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)')
+    # MBTiles rows follow the TMS scheme (y flipped)
+    con.executemany('INSERT INTO tiles VALUES (?, ?, ?, ?)',
+                    ((z, x, (1 << z) - 1 - y, data) for (z, x, y), data in tiles))
+    meta = {k: v for k, v in metadata.items() if k != 'vector_layers'}
+    meta['bounds'] = ','.join(map(str, metadata['bounds']))
+    meta['center'] = ','.join(map(str, metadata['center']))
+    meta['json'] = json.dumps({'vector_layers': metadata['vector_layers']})
+    con.executemany('INSERT INTO metadata VALUES (?, ?)', ((k, str(v)) for k, v in meta.items()))
+    con.commit()
+    con.close()
+
+
+def zxy_to_tileid(z, x, y):
+    """PMTiles v3 tile id: tiles of lower zooms first, then Hilbert order"""
+    acc = ((1 << (2 * z)) - 1) // 3
+    d, s = 0, (1 << z) >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = s - 1 - x, s - 1 - y
+            x, y = y, x
+        s >>= 1
+    return acc + d
+
+
+def _serialize_directory(entries):
+    """entries: sorted list of (tile_id, offset, length, run_length)"""
+    out = bytearray(_varint(len(entries)))
+    last = 0
+    for tile_id, _, _, _ in entries:
+        out += _varint(tile_id - last)
+        last = tile_id
+    for _, _, _, run in entries:
+        out += _varint(run)
+    for _, _, length, _ in entries:
+        out += _varint(length)
+    for i, (_, offset, _, _) in enumerate(entries):
+        prev = entries[i - 1] if i else None
+        out += _varint(0 if prev and offset == prev[1] + prev[2] else offset + 1)
+    return gzip.compress(bytes(out), mtime=0)
+
+
+def _build_directories(entries, root_budget=16384 - 127):
+    """Root directory (+ leaf directories when the root alone would not fit)"""
+    root = _serialize_directory(entries)
+    if len(root) <= root_budget:
+        return root, b''
+    leaf_size = 4096
+    while True:
+        leaves, root_entries = bytearray(), []
+        for i in range(0, len(entries), leaf_size):
+            chunk = entries[i:i + leaf_size]
+            leaf = _serialize_directory(chunk)
+            root_entries.append((chunk[0][0], len(leaves), len(leaf), 0))
+            leaves += leaf
+        root = _serialize_directory(root_entries)
+        if len(root) <= root_budget:
+            return root, bytes(leaves)
+        leaf_size *= 2
+
+
+def write_pmtiles(path, tiles, metadata):
+    tiles = sorted(((zxy_to_tileid(z, x, y), data) for (z, x, y), data in tiles))
+    entries, blob, offset = [], bytearray(), 0
+    for tile_id, data in tiles:
+        entries.append((tile_id, offset, len(data), 1))
+        blob += data
+        offset += len(data)
+
+    root, leaves = _build_directories(entries)
+    meta = gzip.compress(json.dumps(metadata).encode('utf-8'), mtime=0)
+
+    root_offset = 127
+    meta_offset = root_offset + len(root)
+    leaf_offset = meta_offset + len(meta)
+    data_offset = leaf_offset + len(leaves)
+    lon_min, lat_min, lon_max, lat_max = metadata['bounds']
+    center_lon, center_lat, center_zoom = metadata['center']
+    e7 = lambda v: int(round(v * 1e7))
+
+    header = b'PMTiles' + struct.pack(
+        '<B11Q6B4iB2i', 3,
+        root_offset, len(root), meta_offset, len(meta), leaf_offset, len(leaves),
+        data_offset, len(blob), len(entries), len(entries), len(entries),
+        1,                      # clustered
+        2, 2, 1,                # internal gzip, tile gzip, tile type MVT
+        metadata['minzoom'], metadata['maxzoom'],
+        e7(lon_min), e7(lat_min), e7(lon_max), e7(lat_max),
+        center_zoom, e7(center_lon), e7(center_lat),
+    )
+    assert len(header) == 127
+    with open(path, 'wb') as f:
+        f.write(header + root + meta + leaves + bytes(blob))
+
+
+WRITERS = {
+    'mbtiles': write_mbtiles,
+    'pmtiles': write_pmtiles,
+}
+
+
+def export(formats=tuple(WRITERS), output_base=OUTPUT_BASE, layers=LAYERS):
+    print("Loading point layers...")
+    frames = load_layers(layers)
+    if not frames:
+        print("⚠ No layers to export")
+        return
+    print("\nBuilding tile pyramid...")
+    tiles = list(build_tiles(frames, layers))
+    metadata = tilejson_metadata(frames, layers)
+
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+    for fmt in formats:
+        path = f'{output_base}.{fmt}'
+        WRITERS[fmt](path, tiles, metadata)
+        print(f"✓ {path} ({os.path.getsize(path)/1024:,.1f} KB, {len(tiles):,} tiles)")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("EXPORTING OFFLINE VECTOR TILES")
+    print("="*70)
+    export(sys.argv[1:] or tuple(WRITERS))
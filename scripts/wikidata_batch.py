@@ -0,0 +1,172 @@
+"""
+WIKIDATA BATCH - property lookup for many QIDs through the SPARQL endpoint
+
+Replaces "every QID in one VALUES clause, one GET":
+  * QIDs are split into CHUNK_SIZE chunks, each sent as a POST (no URL limit)
+  * chunks run on MAX_WORKERS threads behind a shared rate limit
+    (at most one request every MIN_INTERVAL seconds)
+  * 429 / 5xx / timeouts are retried with exponential backoff + jitter,
+    honouring Retry-After; a chunk that keeps timing out (timeout, 5xx,
+    truncated JSON) is split in two, at most MAX_SPLIT_DEPTH times, so one slow
+    entity only costs its own part. Outages and 429s fail the chunk unsplit
+  * QIDs that still fail are reported (warning, or RuntimeError with strict=True)
+
+Works for any direct property: P625 coordinates, P571 inception, P170 creator...
+Entity values come back as bare QIDs, literals as their lexical form.
+
+Usage:
+    from wikidata_batch import lookup_properties
+    values = lookup_properties(qids, ["P625", "P571"])
+    values[['qid', 'property', 'value']]          # one row per statement value
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+ENDPOINT = "https://query.wikidata.org/sparql"
+USER_AGENT = "DisperseArt/1.0 (https://github.com/csalguero10/DisperseArt_InformationVisualization)"
+CHUNK_SIZE = 200         # QIDs per request
+MAX_WORKERS = 4          # WDQS allows 5 concurrent queries per client
+MIN_INTERVAL = 0.25      # seconds between request starts (all threads)
+MAX_RETRIES = 5
+BACKOFF = 1.0            # first retry delay, doubled each time
+TIMEOUT = 60
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SPLIT_STATUS = {500, 502, 504}   # WDQS query timeouts surface as these
+MAX_SPLIT_DEPTH = 3      # 200 QIDs -> at most 8 parts of 25
+
+ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+PROP_PREFIX = "http://www.wikidata.org/prop/direct/"
+
+
+class RateLimiter:
+    """At most one acquire() every `interval` seconds, shared by all threads"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def valid_qids(qids):
+    """Unique, order-preserving QIDs that look like Q<digits>"""
+    seen = {}
+    for q in qids:
+        if isinstance(q, str) and q.strip()[:1] == "Q" and q.strip()[1:].isdigit():
+            seen.setdefault(q.strip(), None)
+    return list(seen)
+
+
+def build_query(qids, properties):
+    items = " ".join(f"wd:{q}" for q in qids)
+    props = " ".join(f"wdt:{p}" for p in properties)
+    return f"""
+    SELECT ?item ?prop ?value WHERE {{
+      VALUES ?item {{ {items} }}
+      VALUES ?prop {{ {props} }}
+      ?item ?prop ?value .
+    }}
+    """
+
+
+def parse_bindings(data):
+    rows = []
+    for row in data["results"]["bindings"]:
+        value = row["value"]["value"]
+        if row["value"]["type"] == "uri" and value.startswith(ENTITY_PREFIX):
+            value = value[len(ENTITY_PREFIX):]
+        rows.append((row["item"]["value"].rsplit("/", 1)[-1],
+                     row["prop"]["value"].replace(PROP_PREFIX, ""),
+                     value))
+    return rows
+
+
+def post_query(session, limiter, query, endpoint=ENDPOINT):
+    """POST one query with retries; returns the parsed JSON"""
+    delay = BACKOFF
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            response = session.post(endpoint, data={"query": query, "format": "json"}, timeout=TIMEOUT)
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response.json()
+            retry_after = response.headers.get("Retry-After", "")
+            wait = float(retry_after) if retry_after.isdigit() else delay
+            error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            wait, error = delay, e
+        if attempt == MAX_RETRIES:
+            raise error
+        time.sleep(wait + random.uniform(0, wait / 2))
+        delay *= 2
+
+
+def too_big(error):
+    """Failures that a smaller query can avoid (timeouts), unlike outages or 429s"""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in SPLIT_STATUS
+    return isinstance(error, (requests.ReadTimeout, ValueError, KeyError))
+
+
+def lookup_chunk(session, limiter, qids, properties, endpoint, failed, depth=0):
+    """Rows for one chunk; if it keeps timing out retry each half, else give up"""
+    try:
+        return parse_bindings(post_query(session, limiter, build_query(qids, properties), endpoint))
+    except (requests.RequestException, ValueError, KeyError) as e:
+        if len(qids) > 1 and depth < MAX_SPLIT_DEPTH and too_big(e):
+            half = len(qids) // 2
+            return (lookup_chunk(session, limiter, qids[:half], properties, endpoint, failed, depth + 1)
+                    + lookup_chunk(session, limiter, qids[half:], properties, endpoint, failed, depth + 1))
+        print(f"⚠️ {len(qids)} QIDs ({qids[0]}...): {e}")
+        failed.extend(qids)
+        return []
+
+
+def lookup_properties(qids, properties, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS,
+                      min_interval=MIN_INTERVAL, endpoint=ENDPOINT, strict=False):
+    """
+    All values of `properties` (e.g. ["P625"]) for `qids`.
+    Returns a DataFrame (qid, property, value), one row per statement value.
+    """
+    qids = valid_qids(qids)
+    properties = [p.replace("wdt:", "") for p in properties]
+    chunks = [qids[i:i + chunk_size] for i in range(0, len(qids), chunk_size)]
+    limiter = RateLimiter(min_interval)
+    failed = []
+
+    with requests.Session() as session:
+        session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/sparql-results+json"})
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            parts = list(pool.map(
+                lambda chunk: lookup_chunk(session, limiter, chunk, properties, endpoint, failed), chunks))
+
+    rows = [row for part in parts for row in part]
+    print(f"✓ Wikidata: {len(qids):,} QIDs x {len(properties)} properties -> {len(rows):,} values "
+          f"({len(chunks)} requests)")
+    if failed:
+        message = f"{len(failed):,} QIDs failed after retries: {', '.join(failed[:10])}"
+        if strict:
+            raise RuntimeError(message)
+        print(f"⚠️ {message}")
+    return pd.DataFrame(rows, columns=["qid", "property", "value"])
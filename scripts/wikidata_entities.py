@@ -0,0 +1,250 @@
+"""
+WIKIDATA ENTITIES - batched, cached access to the Wikidata action API
+
+Replaces "one wbgetentities request per entity":
+  * entity IDs are collected first and fetched BATCH_SIZE (= 50, the API
+    maximum) per wbgetentities call
+  * every entity and every wbsearchentities result is kept in a SQLite cache
+        processed_data/wikidata_entities.sqlite
+    so a rerun (or another script) only requests what it has not seen within
+    TTL_DAYS
+  * live requests are spaced MIN_INTERVAL apart and 429 / 5xx / timeouts are
+    retried with backoff, honouring Retry-After
+
+EntityCache is thread-safe; EntityBatcher lets concurrent asyncio tasks ask for
+entities and fetches their IDs together, BATCH_SIZE per call.
+
+Entities are returned exactly as wbgetentities gives them ({'id', 'claims',
+'labels', ...}); None when the request failed or the ID is not in the response.
+
+Usage:
+    from wikidata_entities import EntityCache
+    cache = EntityCache()
+    candidates = cache.search("Maria Prymachenko")       # wbsearchentities
+    entities = cache.get_entities(["Q234496", "Q2066793"])
+    entities["Q234496"]["claims"]["P569"]
+
+    batcher = EntityBatcher(cache)                         # inside asyncio tasks
+    await batcher.prefetch(ids)                            # then cache.get_entities(ids) is local
+
+    python scripts/wikidata_entities.py Q234496 Q2066793 ...
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import requests
+
+from wikidata_batch import RateLimiter, USER_AGENT
+
+# ============================================================================
+# CONFIG
+# ============================================================================
+
+API_URL = "https://www.wikidata.org/w/api.php"
+CACHE_PATH = "processed_data/wikidata_entities.sqlite"
+BATCH_SIZE = 50          # wbgetentities accepts at most 50 IDs per call
+TTL_DAYS = 30
+MIN_INTERVAL = 0.1       # seconds between live requests
+MAX_RETRIES = 4
+BACKOFF = 1.0            # first retry delay, doubled each time
+TIMEOUT = 30
+BATCH_WAIT = 0.2         # seconds EntityBatcher waits for a batch to fill up
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+PROPS = "claims|labels|descriptions"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, data TEXT);
+CREATE TABLE IF NOT EXISTS searches (key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, data TEXT NOT NULL);
+"""
+
+
+class EntityCache:
+    """wbgetentities / wbsearchentities through a persistent cache"""
+
+    def __init__(self, path=CACHE_PATH, session=None, api_url=API_URL, ttl_days=TTL_DAYS,
+                 min_interval=MIN_INTERVAL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.api_url = api_url
+        self.max_age = ttl_days * 86400
+        self.limiter = RateLimiter(min_interval)
+        self.session = session or requests.Session()
+        if session is None:
+            self.session.headers.update({"User-Agent": USER_AGENT})
+        self.requests = 0            # live API calls made by this instance
+
+    # ------------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------------
+
+    def call(self, params):
+        """GET one API call with retries; returns the parsed JSON"""
+        delay = BACKOFF
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                response = self.session.get(self.api_url, params={**params, "format": "json"},
+                                            timeout=TIMEOUT)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = response.headers.get("Retry-After", "")
+                wait = float(retry_after) if retry_after.isdigit() else delay
+                error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                wait, error = delay, e
+            if attempt == MAX_RETRIES:
+                raise error
+            time.sleep(wait)
+            delay *= 2
+
+    # ------------------------------------------------------------------------
+    # CACHE
+    # ------------------------------------------------------------------------
+
+    def cached(self, table, keys):
+        """{key: parsed data} of the fresh cache rows among `keys`"""
+        found = {}
+        oldest = time.time() - self.max_age
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            with self.lock:
+                rows = self.con.execute(
+                    f"SELECT key, data FROM {table} WHERE fetched_at >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [oldest, *chunk]).fetchall()
+            found.update((key, json.loads(data)) for key, data in rows)
+        return found
+
+    def store(self, table, items):
+        now = time.time()
+        rows = [(key, now, json.dumps(data, ensure_ascii=False)) for key, data in items]
+        with self.lock:
+            self.con.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", rows)
+            self.con.commit()
+
+    # ------------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------------
+
+    def get_entities(self, ids, props=PROPS, languages="en"):
+        """
+        {id: entity or None} for `ids`: cached entities are reused, the rest are
+        fetched BATCH_SIZE per wbgetentities call. A batch that fails after
+        retries is reported and its IDs map to None (not cached).
+        """
+        ids = list(dict.fromkeys(i for i in ids if i))
+        entities = self.cached_entities(ids, props, languages)
+        missing = [i for i in ids if i not in entities]
+        suffix = f"|{props}|{languages}"
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start:start + BATCH_SIZE]
+            try:
+                data = self.call({"action": "wbgetentities", "ids": "|".join(batch),
+                                  "props": props, "languages": languages})
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️ wbgetentities failed for {len(batch)} IDs ({batch[0]}...): {e}")
+                entities.update((i, None) for i in batch)
+                continue
+            returned = data.get("entities", {})
+            for entity in list(returned.values()):      # redirected IDs come back under the target
+                if "redirects" in entity:
+                    returned.setdefault(entity["redirects"]["from"], entity)
+            fetched = {i: returned.get(i) for i in batch}
+            self.store("entities", [(i + suffix, entity) for i, entity in fetched.items()])
+            entities.update(fetched)
+        return entities
+
+    def cached_entities(self, ids, props=PROPS, languages="en"):
+        """{id: entity} of the `ids` already in the cache (no request)"""
+        suffix = f"|{props}|{languages}"
+        hits = self.cached("entities", [i + suffix for i in ids])
+        return {i: hits[i + suffix] for i in ids if i + suffix in hits}
+
+    def search(self, text, limit=5, language="en"):
+        """wbsearchentities items for `text` (cached); raises requests errors after retries"""
+        key = f"{language}|{limit}|{text}"
+        hit = self.cached("searches", [key])
+        if key in hit:
+            return hit[key]
+        data = self.call({"action": "wbsearchentities", "language": language, "type": "item",
+                          "limit": limit, "search": text})
+        results = data.get("search", [])
+        self.store("searches", [(key, results)])
+        return results
+
+    def close(self):
+        self.con.close()
+
+
+class EntityBatcher:
+    """
+    Shared by concurrent asyncio tasks: prefetch(ids) waits until those entities
+    are in the cache. IDs requested by different tasks are pooled and fetched
+    BATCH_SIZE per call (in a worker thread), a partial batch after BATCH_WAIT.
+    """
+
+    def __init__(self, cache, wait=BATCH_WAIT):
+        self.cache = cache
+        self.wait = wait
+        self.futures = {}            # id -> future, resolved once fetched (or failed)
+        self.pending = []
+        self.timer = None
+
+    async def prefetch(self, ids):
+        loop = asyncio.get_running_loop()
+        ids = [i for i in dict.fromkeys(ids) if i]
+        known = self.cache.cached_entities([i for i in ids if i not in self.futures])
+        futures = []
+        for i in ids:
+            if i in known:
+                continue
+            if i not in self.futures:
+                self.futures[i] = loop.create_future()
+                self.pending.append(i)
+            futures.append(self.futures[i])
+
+        while len(self.pending) >= BATCH_SIZE:
+            self.send(self.pending[:BATCH_SIZE])
+            self.pending = self.pending[BATCH_SIZE:]
+        if self.pending and self.timer is None:
+            self.timer = loop.call_later(self.wait, self.flush)
+        await asyncio.gather(*futures)
+
+    def flush(self):
+        self.timer = None
+        if self.pending:
+            self.send(self.pending)
+            self.pending = []
+
+    def send(self, batch):
+        task = asyncio.ensure_future(asyncio.to_thread(self.cache.get_entities, batch))
+        task.add_done_callback(lambda _, batch=batch: self.resolve(batch))
+
+    def resolve(self, batch):
+        # failed batches resolve too: get_entities already reported them
+        for i in batch:
+            if not self.futures[i].done():
+                self.futures[i].set_result(None)
+
+
+if __name__ == "__main__":
+    cache = EntityCache()
+    start = time.perf_counter()
+    entities = cache.get_entities(sys.argv[1:])
+    for qid, entity in entities.items():
+        label = (entity or {}).get("labels", {}).get("en", {}).get("value", "-")
+        print(f"{qid}: {label}")
+    print(f"✓ {len(entities)} entities, {cache.requests} requests, {time.perf_counter() - start:.2f} s")
@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from keyword_rules import RuleSet
+from data_sources import read_csv
 
 plt.style.use("default")
 
@@ -9,7 +15,7 @@ plt.style.use("default")
 # LOAD UNESCO
 # -----------------------
 URL_UNESCO = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/main/raw_data/unesco_damage_sites.csv"
-unesco = pd.read_csv(URL_UNESCO)
+unesco = read_csv(URL_UNESCO)
 OUTFILE = "unesco_types_and_periods.png"
 plt.savefig(OUTFILE, dpi=200, bbox_inches="tight")
 
@@ -51,34 +57,22 @@ unesco_clean = unesco.loc[~mask_header].copy()
 # -------------------------
 # 2) Recode type (clean semantic mapping)
 # -------------------------
-def recode_type(row):
+# Title keywords, checked in this order before falling back to the raw UNESCO label
+SITE_TYPE_RULES = RuleSet([
+    ("religious site", ["church", "cathedral", "chapel", "monastery", "house of prayer"]),
+    ("theatre / cultural institution", ["theatre", "theater", "concert hall", "house of culture", "philharmonic"]),
+    ("education", ["academy", "university", "conservatory", "school"]),
+    ("museum", ["museum", "gallery"]),
+    ("library", ["library"]),
+    ("archive", ["archive"]),
+    ("archaeological site", ["archaeological"]),
+])
+
+
+def recode_raw_type(row):
     raw = row.get("site_type", "")
     title = str(row.get("title_en", "")).lower()
 
-    # religious
-    if any(k in title for k in ["church", "cathedral", "chapel", "monastery", "house of prayer"]):
-        return "religious site"
-
-    # theatre / cultural institution
-    if any(k in title for k in ["theatre", "theater", "concert hall", "house of culture", "philharmonic"]):
-        return "theatre / cultural institution"
-
-    # education
-    if any(k in title for k in ["academy", "university", "conservatory", "school"]):
-        return "education"
-
-    # museums / libraries / archives
-    if ("museum" in title) or ("gallery" in title):
-        return "museum"
-    if "library" in title:
-        return "library"
-    if "archive" in title:
-        return "archive"
-
-    # archaeological
-    if "archaeological" in title:
-        return "archaeological site"
-
     # normalize raw
     if isinstance(raw, str):
         raw = raw.strip().lower()
@@ -107,7 +101,15 @@ def recode_type(row):
     return "other"
 
 
-unesco_clean["site_type_clean"] = unesco_clean.apply(recode_type, axis=1)
+def recode_types(df):
+    types = SITE_TYPE_RULES.classify(df["title_en"].astype(str))
+    no_keyword = types.isna()
+    if no_keyword.any():
+        types[no_keyword] = df[no_keyword].apply(recode_raw_type, axis=1)
+    return types
+
+
+unesco_clean["site_type_clean"] = recode_types(unesco_clean)
 
 # Optional dedup (same title + region + date)
 DEDUP = True
@@ -214,8 +216,6 @@ period_counts = (
     .astype(int)
 )
 
-period_counts = period_counts.sort_index(key=lambda s: [order_new.index(x) for x in s])
-
 # Coverage print
 total = len(unesco_clean)
 parsed = int(unesco_clean["year_built_num_ext"].notna().sum())
@@ -2,8 +2,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import re
+import os
+import sys
 from matplotlib.lines import Line2D
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from data_sources import read_csv
+
 
 # geopandas stack
 import geopandas as gpd
@@ -101,9 +106,9 @@ def region_from_coords(lat, lon):
 # LOAD DATA
 # -----------------------
 print("Loading datasets...")
-stolen = pd.read_csv(URL_STOLEN)
-unesco = pd.read_csv(URL_UNESCO)
-acled  = pd.read_csv(URL_ACLED, sep=";")
+stolen = read_csv(URL_STOLEN)
+unesco = read_csv(URL_UNESCO)
+acled  = read_csv(URL_ACLED, sep=";")
 print("✓ stolen:", stolen.shape, "| unesco:", unesco.shape, "| acled:", acled.shape)
 
 # -----------------------
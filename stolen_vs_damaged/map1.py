@@ -1,12 +1,14 @@
-import json
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from oblast_geometry import load_oblast_geojson, WEB_TOPOJSON
+
 # ============================================================
 # CONFIG
 # ============================================================
-GEOJSON_PATH = r"stolen vs damaged\geoBoundaries-UKR-ADM1-all\geoBoundaries-UKR-ADM1.geojson"
+# simplified + quantized topology built by oblast_geometry.py (created on first run)
+TOPOJSON_PATH = WEB_TOPOJSON
 OUT_HTML = "ukraine_oblast_hover_map_dropdown.html"
 
 # ============================================================
@@ -52,10 +54,10 @@ df["pct_stolen"] = np.where(df["total"] > 0, df["stolen_objects"] / df["total"]
 df["total_log"] = np.log10(1.0 + df["total"])
 
 # ============================================================
-# LOAD GEOJSON + build a reference table
+# LOAD GEOMETRY + build a reference table
 # ============================================================
-with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
-    ukr_geo = json.load(f)
+# one light GeoJSON, shared by every dropdown metric (they only restyle z)
+ukr_geo = load_oblast_geojson(TOPOJSON_PATH)
 
 geo_rows = []
 for feat in ukr_geo["features"]:
@@ -149,5 +151,5 @@ fig.update_layout(
     )],
 )
 
-fig.write_html(OUT_HTML, include_plotlyjs=True)
+fig.write_html(OUT_HTML, include_plotlyjs="cdn")
 print("Saved:", OUT_HTML)
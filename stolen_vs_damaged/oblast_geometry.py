@@ -0,0 +1,265 @@
+"""
+Geometry prep for the oblast choropleths.
+
+Turns the full-resolution geoBoundaries ADM1 GeoJSON into a small
+TopoJSON-style topology:
+  1. coordinates are quantized onto an integer grid
+  2. rings are cut into arcs at junctions, so a border shared by two
+     oblasts is stored (and simplified) only once
+  3. every arc is simplified with Douglas-Peucker, keeping its end points,
+     so neighbouring oblasts still meet exactly after simplification
+  4. arcs are delta-encoded as in the TopoJSON spec
+
+map1.py reads the topology back with load_oblast_geojson() and hands a
+single, light GeoJSON to the one Choropleth trace that all dropdown
+metrics restyle.
+
+Usage:
+    python stolen_vs_damaged/oblast_geometry.py
+"""
+
+import json
+import os
+
+import numpy as np
+
+# ============================================================
+# CONFIG
+# ============================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_GEOJSON = os.path.join(BASE_DIR, "geoBoundaries-UKR-ADM1-all", "geoBoundaries-UKR-ADM1.geojson")
+WEB_TOPOJSON = os.path.join(BASE_DIR, "geoBoundaries-UKR-ADM1-all", "geoBoundaries-UKR-ADM1_web.topojson")
+
+QUANTIZATION = 10_000    # grid size per axis (TopoJSON "quantization"), ~150 m over Ukraine
+TOLERANCE = 2            # Douglas-Peucker tolerance, in grid units
+KEEP_PROPERTIES = ["shapeISO", "shapeName"]
+
+
+# ============================================================
+# QUANTIZATION
+# ============================================================
+def _iter_polygons(geometry):
+    if geometry["type"] == "Polygon":
+        yield geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        yield from geometry["coordinates"]
+
+
+def _bbox(features):
+    xs, ys = [], []
+    for feat in features:
+        for polygon in _iter_polygons(feat["geometry"]):
+            for ring in polygon:
+                arr = np.asarray(ring, dtype=float)
+                xs.extend([arr[:, 0].min(), arr[:, 0].max()])
+                ys.extend([arr[:, 1].min(), arr[:, 1].max()])
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _quantize_ring(ring, translate, scale):
+    arr = np.asarray(ring, dtype=float)[:, :2]
+    q = np.rint((arr - translate) / scale).astype(np.int64)
+    # drop consecutive duplicates created by snapping to the grid
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    q = q[keep]
+    if len(q) and tuple(q[0]) != tuple(q[-1]):
+        q = np.vstack([q, q[:1]])
+    return [tuple(p) for p in q.tolist()]
+
+
+# ============================================================
+# TOPOLOGY (cut rings at junctions + dedup shared arcs)
+# ============================================================
+def _find_junctions(rings):
+    """A point is a junction when it is reached from different neighbours."""
+    neighbours = {}
+    for ring in rings:
+        points = ring[:-1]  # closed ring, last == first
+        n = len(points)
+        for i, p in enumerate(points):
+            pair = frozenset((points[i - 1], points[(i + 1) % n]))
+            neighbours.setdefault(p, set()).add(pair)
+    return {p for p, pairs in neighbours.items() if len(pairs) > 1}
+
+
+def _cut_ring(ring, junctions):
+    points = ring[:-1]
+    starts = [i for i, p in enumerate(points) if p in junctions]
+    if not starts:
+        # no neighbours: start on the smallest point so that the same ring
+        # seen from both sides (e.g. Kyiv city inside Kyiv oblast) dedups
+        first = points.index(min(points))
+        return [points[first:] + points[:first] + [points[first]]]
+    # rotate so the ring starts on a junction, then split at each junction
+    first = starts[0]
+    rotated = points[first:] + points[:first] + [points[first]]
+    arcs, current = [], [rotated[0]]
+    for p in rotated[1:]:
+        current.append(p)
+        if p in junctions:
+            arcs.append(current)
+            current = [p]
+    return arcs
+
+
+def _douglas_peucker(points, tolerance):
+    arr = np.asarray(points, dtype=float)
+    n = len(arr)
+    if n <= 2:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = arr[a + 1:b]
+        start, end = arr[a], arr[b]
+        d = end - start
+        norm = np.hypot(d[0], d[1])
+        if norm == 0:
+            dist = np.hypot(seg[:, 0] - start[0], seg[:, 1] - start[1])
+        else:
+            dist = np.abs(d[0] * (seg[:, 1] - start[1]) - d[1] * (seg[:, 0] - start[0])) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = a + 1 + i
+            keep[split] = True
+            stack.append((a, split))
+            stack.append((split, b))
+    return [points[i] for i in np.flatnonzero(keep)]
+
+
+def _simplify_arc(arc, tolerance):
+    if arc[0] == arc[-1] and len(arc) > 4:
+        # closed arc (island / ring without neighbours): split in two halves
+        # so Douglas-Peucker has two distinct end points to work with
+        mid = len(arc) // 2
+        left = _douglas_peucker(arc[:mid + 1], tolerance)
+        right = _douglas_peucker(arc[mid:], tolerance)
+        return left + right[1:]
+    return _douglas_peucker(arc, tolerance)
+
+
+def build_topology(geojson, quantization=QUANTIZATION, tolerance=TOLERANCE,
+                   keep_properties=KEEP_PROPERTIES):
+    """Build a quantized, simplified TopoJSON topology from a GeoJSON FeatureCollection."""
+    features = geojson["features"]
+    x0, y0, x1, y1 = _bbox(features)
+    scale = np.array([(x1 - x0) / (quantization - 1), (y1 - y0) / (quantization - 1)])
+    translate = np.array([x0, y0])
+
+    # quantize every ring once
+    feature_rings = []
+    for feat in features:
+        polygons = []
+        for polygon in _iter_polygons(feat["geometry"]):
+            rings = [_quantize_ring(r, translate, scale) for r in polygon]
+            polygons.append([r for r in rings if len(r) >= 4])
+        feature_rings.append([p for p in polygons if p])
+
+    all_rings = [r for polygons in feature_rings for p in polygons for r in p]
+    junctions = _find_junctions(all_rings)
+
+    arcs, arc_index = [], {}
+
+    def arc_id(arc):
+        key = tuple(arc)
+        if key in arc_index:
+            return arc_index[key]
+        rev = tuple(reversed(arc))
+        if rev in arc_index:
+            return ~arc_index[rev]
+        arc_index[key] = len(arcs)
+        arcs.append(arc)
+        return arc_index[key]
+
+    geometries = []
+    for feat, polygons in zip(features, feature_rings):
+        polys_arcs = [[[arc_id(a) for a in _cut_ring(ring, junctions)] for ring in p] for p in polygons]
+        props = {k: feat.get("properties", {}).get(k) for k in keep_properties}
+        if len(polys_arcs) == 1:
+            geometries.append({"type": "Polygon", "arcs": polys_arcs[0], "properties": props})
+        else:
+            geometries.append({"type": "MultiPolygon", "arcs": polys_arcs, "properties": props})
+
+    # simplify each unique arc once -> shared borders stay identical
+    encoded = []
+    for arc in arcs:
+        simple = np.asarray(_simplify_arc(arc, tolerance), dtype=np.int64)
+        delta = np.vstack([simple[:1], np.diff(simple, axis=0)])
+        encoded.append(delta.tolist())
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {"oblasts": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded,
+    }
+
+
+# ============================================================
+# DECODING (TopoJSON -> GeoJSON for plotly)
+# ============================================================
+def topology_to_geojson(topology, object_name="oblasts", decimals=3):
+    """Rebuild a GeoJSON FeatureCollection with coordinates rounded to `decimals`."""
+    scale = np.asarray(topology["transform"]["scale"])
+    translate = np.asarray(topology["transform"]["translate"])
+
+    decoded = []
+    for arc in topology["arcs"]:
+        pts = np.cumsum(np.asarray(arc, dtype=float), axis=0) * scale + translate
+        decoded.append(np.round(pts, decimals).tolist())
+
+    def ring_coords(arc_ids):
+        coords = []
+        for i in arc_ids:
+            pts = decoded[i] if i >= 0 else decoded[~i][::-1]
+            coords.extend(pts if not coords else pts[1:])
+        return coords
+
+    features = []
+    for geom in topology["objects"][object_name]["geometries"]:
+        if geom["type"] == "Polygon":
+            coords = [ring_coords(r) for r in geom["arcs"]]
+        else:
+            coords = [[ring_coords(r) for r in p] for p in geom["arcs"]]
+        features.append({
+            "type": "Feature",
+            "properties": geom.get("properties", {}),
+            "geometry": {"type": geom["type"], "coordinates": coords},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def load_oblast_geojson(topojson_path=WEB_TOPOJSON, source_path=SOURCE_GEOJSON):
+    """Return the light oblast GeoJSON, building the topology first if it is missing."""
+    if not os.path.exists(topojson_path):
+        prepare(source_path, topojson_path)
+    with open(topojson_path, "r", encoding="utf-8") as f:
+        topology = json.load(f)
+    return topology_to_geojson(topology)
+
+
+def prepare(source_path=SOURCE_GEOJSON, out_path=WEB_TOPOJSON):
+    with open(source_path, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    topology = build_topology(geojson)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(topology, f, separators=(",", ":"))
+
+    n_in = sum(len(r) for feat in geojson["features"]
+               for p in _iter_polygons(feat["geometry"]) for r in p)
+    n_out = sum(len(a) for a in topology["arcs"])
+    print(f"✓ {len(geojson['features'])} oblasts | {n_in:,} -> {n_out:,} points "
+          f"in {len(topology['arcs'])} arcs")
+    print(f"✓ {os.path.getsize(source_path)/1024:,.0f} KB -> {os.path.getsize(out_path)/1024:,.0f} KB")
+    print("Saved:", out_path)
+    return topology
+
+
+if __name__ == "__main__":
+    prepare()
@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from data_sources import read_csv
 
 plt.style.use("default")
 
@@ -18,9 +23,9 @@ URL_STOLEN = "https://raw.githubusercontent.com/csalguero10/DisperseArt_Informat
 URL_UNESCO = "https://raw.githubusercontent.com/csalguero10/DisperseArt_InformationVisualization/main/raw_data/unesco_damage_sites.csv"
 URL_ACLED  = "https://media.githubusercontent.com/media/csalguero10/DisperseArt_InformationVisualization/bc92f709426671effb51f96261de4a53e2ac7b1b/processed_data/acled_clean.csv"
 
-stolen = pd.read_csv(URL_STOLEN)
-unesco = pd.read_csv(URL_UNESCO)
-acled  = pd.read_csv(URL_ACLED, sep=";")
+stolen = read_csv(URL_STOLEN)
+unesco = read_csv(URL_UNESCO)
+acled  = read_csv(URL_ACLED, sep=";")
 
 # -----------------------
 # YEARS: STOLEN (incident year) + UNESCO